@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Backfill script for TowerScoreBoardBot
+Populates derived columns for rows that were written before those columns existed.
+Run after dashboard_backend/init_db.py has added the new columns.
+"""
+
+from dashboard_backend.models import UserData, UserDataHistory, UserTierHistory, UserStats, NUMERIC_STATS_FIELDS
+from gemini_sql_parser import (
+    SessionLocal,
+    tier_numeric_columns,
+    upsert_tier_best,
+    add_tier_history,
+    stats_numeric_columns,
+    upsert_stats_latest,
+)
+
+BATCH_SIZE = 500
+
+def backfill_tier_columns():
+    """Fill the numeric tier summary and sort key columns of user_data from the T1..T18 strings"""
+    print("🔧 Backfilling numeric tier columns...")
+
+    db = SessionLocal()
+    try:
+        updated = 0
+        for user in db.query(UserData).yield_per(BATCH_SIZE):
+            tier_values = {f"T{i}": getattr(user, f"T{i}") for i in range(1, 19)}
+            for column, value in tier_numeric_columns(tier_values).items():
+                setattr(user, column, value)
+            updated += 1
+        db.commit()
+        print(f"✅ Backfilled {updated} user_data rows")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Error backfilling tier columns: {e}")
+        raise
+    finally:
+        db.close()
+
+def backfill_tier_best():
+    """Populate user_tier_best from the current user_data tier strings"""
+    print("🔧 Backfilling user_tier_best...")
+
+    db = SessionLocal()
+    try:
+        users = db.query(UserData.discordid, *[getattr(UserData, f"T{i}") for i in range(1, 19)]).all()
+        for discordid, *tier_strings in users:
+            upsert_tier_best(db, discordid, {f"T{i}": tier_str for i, tier_str in enumerate(tier_strings, 1)})
+        db.commit()
+        print(f"✅ Backfilled tier rows for {len(users)} users")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Error backfilling user_tier_best: {e}")
+        raise
+    finally:
+        db.close()
+
+def backfill_tier_history():
+    """Convert full user_data_history snapshots into user_tier_history deltas.
+
+    A delta is written whenever a tier's string differs from the user's previous
+    snapshot. Deltas that already exist (same user, tier and timestamp) are skipped,
+    so the conversion can be re-run safely.
+    """
+    print("🔧 Backfilling user_tier_history from snapshots...")
+
+    db = SessionLocal()
+    try:
+        existing = set(db.query(UserTierHistory.discordid, UserTierHistory.tier, UserTierHistory.timestamp).all())
+        snapshots = db.query(UserDataHistory).order_by(
+            UserDataHistory.discordid,
+            UserDataHistory.timestamp,
+            UserDataHistory.id
+        ).yield_per(BATCH_SIZE)
+
+        added = 0
+        previous_user, previous = None, {}
+        for snapshot in snapshots:
+            if snapshot.discordid != previous_user:
+                previous_user, previous = snapshot.discordid, {}
+            changed = {}
+            for i in range(1, 19):
+                tier_str = getattr(snapshot, f"T{i}") or "Wave: 0 Coins: 0"
+                if tier_str != previous.get(i, "Wave: 0 Coins: 0") and (snapshot.discordid, i, snapshot.timestamp) not in existing:
+                    changed[f"T{i}"] = tier_str
+                previous[i] = tier_str
+            add_tier_history(db, snapshot.discordid, changed, timestamp=snapshot.timestamp)
+            added += len(changed)
+        db.commit()
+        print(f"✅ Backfilled {added} tier history deltas")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Error backfilling user_tier_history: {e}")
+        raise
+    finally:
+        db.close()
+
+def backfill_stats_columns():
+    """Fill the numeric <field>_value and sortable <field>_key columns of user_stats from the stat strings"""
+    print("🔧 Backfilling numeric stats columns...")
+
+    db = SessionLocal()
+    try:
+        updated = 0
+        for stats in db.query(UserStats).yield_per(BATCH_SIZE):
+            stats_data = {field: getattr(stats, field) for field in NUMERIC_STATS_FIELDS}
+            for column, value in stats_numeric_columns(stats_data).items():
+                setattr(stats, column, value)
+            updated += 1
+        db.commit()
+        print(f"✅ Backfilled {updated} user_stats rows")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Error backfilling stats columns: {e}")
+        raise
+    finally:
+        db.close()
+
+def backfill_stats_latest():
+    """Populate user_stats_latest with each user's most recent user_stats row"""
+    print("🔧 Backfilling user_stats_latest...")
+
+    db = SessionLocal()
+    try:
+        latest_rows = db.query(UserStats).distinct(UserStats.discordid).order_by(
+            UserStats.discordid,
+            UserStats.timestamp.desc(),
+            UserStats.id.desc()
+        ).all()
+        for stats in latest_rows:
+            upsert_stats_latest(db, stats, timestamp=stats.timestamp)
+        db.commit()
+        print(f"✅ Backfilled latest stats for {len(latest_rows)} users")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Error backfilling user_stats_latest: {e}")
+        raise
+    finally:
+        db.close()
+
+def main():
+    backfill_tier_columns()
+    backfill_tier_best()
+    backfill_tier_history()
+    backfill_stats_columns()
+    backfill_stats_latest()
+    print("🎉 Backfill completed!")
+
+if __name__ == "__main__":
+    main()
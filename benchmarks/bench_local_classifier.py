@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Benchmark: accuracy and latency of the local screenshot classifier.
+
+classify_locally decides stats / tier / unknown from the layout; uploads it
+is confident about (confidence >= LOCAL_CLASSIFIER_THRESHOLD) skip the
+Gemini classification. For each threshold the report shows coverage (share
+of stats and tier screenshots decided locally) and precision (share of local
+decisions that were right). A wrong local decision sends a screenshot to the
+wrong extraction prompt, so pick the lowest threshold with precision 100%.
+The default threshold is above 1, so the local path stays off until then.
+
+Uses the synthetic set from screenshot_fixtures.py unless --manifest points
+at a hand-labelled one; tune the threshold on real screenshots.
+
+Run from the repository root:
+    python3 benchmarks/bench_local_classifier.py [--manifest path/manifest.json] [count per label]
+"""
+
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gemini_processor import classify_locally, LOCAL_CLASSIFIER_THRESHOLD
+from screenshot_fixtures import generate, load_manifest, LABELS
+
+THRESHOLDS = [0.5, 0.6, 0.7, 0.8, 0.85, 0.9, 0.95]
+
+def run(fixtures: list):
+    results = []
+    for label, image, _ in fixtures:
+        image.load()
+        start = time.perf_counter()
+        verdict = classify_locally(image)
+        results.append((label, verdict, (time.perf_counter() - start) * 1000))
+
+    latencies = sorted(ms for _, _, ms in results)
+    print(f"\n📊 {len(results)} screenshots")
+    print(f"  latency: p50 {statistics.median(latencies):.1f} ms, "
+          f"p95 {latencies[int(len(latencies) * 0.95) - 1]:.1f} ms, max {latencies[-1]:.1f} ms")
+
+    print("\n  confusion (rows: label, columns: verdict at any confidence)")
+    print("  " + " " * 9 + "".join(f"{verdict:>9}" for verdict in LABELS))
+    for label in LABELS:
+        counts = [sum(1 for l, v, _ in results if l == label and v["image_type"] == verdict) for verdict in LABELS]
+        print(f"  {label:<9}" + "".join(f"{count:>9}" for count in counts))
+
+    screens = [(label, verdict) for label, verdict, _ in results if label != "unknown"]
+    print("\n  threshold  coverage  precision  wrong")
+    for threshold in THRESHOLDS:
+        decided = [
+            (label, verdict) for label, verdict, _ in results
+            if verdict["image_type"] != "unknown" and verdict["confidence"] >= threshold
+        ]
+        right = sum(1 for label, verdict in decided if label == verdict["image_type"])
+        coverage = sum(1 for label, verdict in decided if label != "unknown") / len(screens) if screens else 0
+        precision = right / len(decided) if decided else 1.0
+        marker = "  ← LOCAL_CLASSIFIER_THRESHOLD" if threshold == LOCAL_CLASSIFIER_THRESHOLD else ""
+        print(f"  {threshold:>9.2f}  {coverage:>8.0%}  {precision:>9.1%}  {len(decided) - right:>5}{marker}")
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if args[:1] == ["--manifest"]:
+        fixtures = load_manifest(args[1])
+    else:
+        fixtures = generate(int(args[0]) if args else 40)
+    run(fixtures)
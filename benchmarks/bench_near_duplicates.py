@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark: near-duplicate screenshot detection.
+
+For rendered stats and tier screens, compares a re-screenshot of the same
+screen (new clock and battery in the status bar, different JPEG quality)
+with a screenshot where one value changed (a tier's wave or one stat digit).
+Reports the dHash distance and thumbnail difference of both, and how often
+gemini_processor would reuse the earlier result: a re-screenshot should
+always be reused, a changed screen never.
+
+Run from the repository root:
+    python3 benchmarks/bench_near_duplicates.py [screens per kind]   (default 50)
+"""
+
+import copy
+import os
+import random
+import statistics
+import sys
+import time
+from io import BytesIO
+
+from PIL import Image, ImageDraw
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from bk_tree import BKTree, hamming
+from gemini_processor import (
+    screenshot_fingerprint, thumbnail_bytes, same_screen, NEAR_DUPLICATE_DISTANCE, THUMBNAIL_TOLERANCE,
+)
+from screenshot_fixtures import render_stats, render_tier, _status_bar
+
+def rescreenshot(image: Image.Image, rng: random.Random) -> Image.Image:
+    """The same screen shot again: a new status bar and a different JPEG quality"""
+    image = image.copy()
+    draw = ImageDraw.Draw(image)
+    draw.rectangle((0, 0, image.width, image.width * 0.09), fill=image.getpixel((2, image.height - 2)))
+    _status_bar(draw, image.width, rng, (230, 230, 230))
+    buffer = BytesIO()
+    image.save(buffer, "JPEG", quality=rng.randint(50, 95))
+    return Image.open(BytesIO(buffer.getvalue())).convert("RGB")
+
+def change_one_value(data: dict, kind: str, rng: random.Random) -> dict:
+    data = copy.deepcopy(data)
+    if kind == "tier":
+        data["tiers"][str(rng.randint(1, 18))]["wave"] += rng.randint(1, 9)
+    else:
+        key = rng.choice(list(data)[1:])
+        value = data[key]
+        data[key] = value[:-2] + str((int(value[-2]) + rng.randint(1, 9)) % 10) + value[-1]
+    return data
+
+def thumbnail_difference(a: Image.Image, b: Image.Image) -> int:
+    return int(np.abs(np.asarray(a, dtype=np.int16) - np.asarray(b, dtype=np.int16)).max())
+
+def run(count: int):
+    outcomes = {"re-screenshot": [], "one value changed": []}
+    fingerprint_ms = []
+    for seed in range(count):
+        for kind, render in [("tier", render_tier), ("stats", render_stats)]:
+            rng = random.Random(seed + 1000)
+            screen, data = render(random.Random(seed))
+            changed, _ = render(random.Random(seed), change_one_value(data, kind, rng))
+
+            first = rescreenshot(screen, rng)
+            start = time.perf_counter()
+            first_hash, first_thumbnail = screenshot_fingerprint(first)
+            fingerprint_ms.append((time.perf_counter() - start) * 1000)
+            stored = thumbnail_bytes(first_thumbnail)
+
+            for name, image in [("re-screenshot", rescreenshot(screen, rng)), ("one value changed", rescreenshot(changed, rng))]:
+                image_hash, thumbnail = screenshot_fingerprint(image)
+                distance = hamming(first_hash, image_hash)
+                reused = distance <= NEAR_DUPLICATE_DISTANCE and same_screen(thumbnail, stored)
+                outcomes[name].append((distance, thumbnail_difference(first_thumbnail, thumbnail), reused))
+
+    print(f"\n📊 {count} screens per kind (stats, tier); dHash radius {NEAR_DUPLICATE_DISTANCE}, "
+          f"thumbnail tolerance {THUMBNAIL_TOLERANCE}")
+    for name, rows in outcomes.items():
+        distances = [distance for distance, _, _ in rows]
+        differences = [difference for _, difference, _ in rows]
+        reused = sum(1 for _, _, was_reused in rows if was_reused)
+        print(f"  {name:<18} dHash {min(distances)}-{max(distances)} bits, "
+              f"thumbnail diff {min(differences)}-{max(differences)}, reused {reused}/{len(rows)}")
+    print(f"  fingerprint: p50 {statistics.median(fingerprint_ms):.1f} ms")
+
+    # Lookup cost in a user's tree
+    rng = random.Random(count)
+    tree = BKTree()
+    for i in range(200):
+        tree.add(rng.getrandbits(64), i)
+    probe = rng.getrandbits(64)
+    start = time.perf_counter()
+    for _ in range(1000):
+        tree.search(probe, NEAR_DUPLICATE_DISTANCE)
+    print(f"  BK-tree search among 200 hashes: {(time.perf_counter() - start):.3f} ms per search")
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
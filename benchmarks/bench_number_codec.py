@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Benchmark: number_codec parsing and formatting throughput.
+
+The corpus mimics what uploads and leaderboards parse: stats values such as
+"$42.62 M" or "1.04D" and tier strings such as "Wave: 4512 Coins: 3.20q",
+drawn from a few thousand distinct strings the way real users repeat them.
+legacy_parse is the old parse_numeric_value, which re-sorted the suffix
+table and rebuilt its regex on every call.
+
+Run from the repository root:
+    python3 benchmarks/bench_number_codec.py [corpus size]   (default 100000)
+
+The same cases run under pytest-benchmark in test_bench_number_codec.py.
+"""
+
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dashboard_backend import number_codec
+from dashboard_backend.number_codec import (
+    SUFFIXES, parse_number, parse_decimal, numeric_sort_key, parse_tier_string, format_number,
+)
+
+DISTINCT_VALUES = 5000
+
+def legacy_parse(raw_value) -> float:
+    """The pre-codec parse_numeric_value, kept here as the baseline"""
+    value = str(raw_value)
+    if not value or value.lower() == "null":
+        return 0.0
+    value = value.replace("$", "").replace(",", "").strip()
+    suffix_alternation = "|".join(sorted(SUFFIXES.keys(), key=len, reverse=True))
+    match = re.match(rf"^(-?\d+(?:\.\d+)?)(?:\s*(?:{suffix_alternation}))?$", value)
+    if match:
+        suffix = None
+        for suf in sorted(SUFFIXES.keys(), key=len, reverse=True):
+            if value.endswith(suf):
+                suffix = suf
+                break
+        number = float(match.group(1))
+        return number * SUFFIXES[suffix] if suffix else number
+    try:
+        return float(value)
+    except ValueError:
+        return 0.0
+
+def make_corpus(size: int, rng: random.Random) -> tuple:
+    """(stats values, tier strings), each sampled from DISTINCT_VALUES distinct strings"""
+    suffixes = list(SUFFIXES)
+    distinct_values = [
+        f"{rng.choice(['', '$'])}{rng.uniform(1, 999):.2f}{rng.choice(['', ' '])}{rng.choice(suffixes)}"
+        for _ in range(DISTINCT_VALUES)
+    ] + [str(rng.randint(1, 900_000)) for _ in range(DISTINCT_VALUES // 10)]
+    distinct_tiers = [
+        f"Wave: {rng.randint(1, 12_000)} Coins: {rng.uniform(1, 999):.2f}{rng.choice(suffixes)}"
+        for _ in range(DISTINCT_VALUES)
+    ]
+    return rng.choices(distinct_values, k=size), rng.choices(distinct_tiers, k=size)
+
+def clear_caches():
+    for function in (number_codec._parse_float, number_codec._parse_decimal, number_codec._string_sort_key,
+                     number_codec._parse_tier, format_number):
+        function.cache_clear()
+
+def per_second(func, items) -> float:
+    start = time.perf_counter()
+    for item in items:
+        func(item)
+    return len(items) / (time.perf_counter() - start)
+
+def run(size: int):
+    rng = random.Random(size)
+    values, tiers = make_corpus(size, rng)
+    numbers = [parse_number(value) for value in values]
+
+    # Sanity check: the codec agrees with the old parser on the whole corpus
+    assert all(parse_number(value) == legacy_parse(value) for value in values)
+
+    results = {}
+    results["parse: legacy (regex per call)"] = per_second(legacy_parse, values)
+    clear_caches()
+    results["parse: codec, cold cache"] = per_second(parse_number, values)
+    results["parse: codec, warm cache"] = per_second(parse_number, values)
+    clear_caches()
+    results["parse_decimal: codec, cold"] = per_second(parse_decimal, values)
+    results["sort key: codec, warm"] = per_second(numeric_sort_key, values)
+    clear_caches()
+    results["tier string: codec, cold"] = per_second(parse_tier_string, tiers)
+    results["tier string: codec, warm"] = per_second(parse_tier_string, tiers)
+    clear_caches()
+    results["format: codec, cold"] = per_second(format_number, numbers)
+    results["format: codec, warm"] = per_second(format_number, numbers)
+
+    print(f"\n📊 {size:,} strings ({DISTINCT_VALUES:,} distinct values and tier strings)")
+    for name, rate in results.items():
+        print(f"  {name:<32} {rate:14,.0f} /s")
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100_000]
+    for size in sizes:
+        run(size)
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Benchmark: image preprocessing before the Gemini requests.
+
+For each setting, reports per screenshot the bytes sent to Gemini and the
+time to produce them, against the baseline of passing the full-size PIL
+image, which the SDK encodes as lossless WebP on every request. Upload
+bytes are the screenshots saved as PNG, as phones share them.
+
+With --extract (needs GOOGLE_API_KEY and spends API quota), each screenshot
+is also extracted with every setting and the values compared with the ones
+drawn on it (the manifest's "data"), giving extraction accuracy per setting.
+
+Run from the repository root:
+    python3 benchmarks/bench_preprocessing.py [--manifest path/manifest.json] [--extract] [count per label]
+"""
+
+import os
+import statistics
+import sys
+import time
+from io import BytesIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import gemini_processor
+from screenshot_fixtures import generate, load_manifest
+
+# name -> gemini_processor settings; None is the SDK baseline
+SETTINGS = {
+    "baseline (SDK, full size)": None,
+    "webp lossless (default)": {"PREPROCESS_FORMAT": "webp", "PREPROCESS_QUALITY": 100, "PREPROCESS_MAX_EDGE": 0},
+    "webp lossless, crop, 1600px": {"PREPROCESS_FORMAT": "webp", "PREPROCESS_QUALITY": 100, "PREPROCESS_MAX_EDGE": 1600,
+                                    "PREPROCESS_CROP": True},
+    "png, crop, 1600px": {"PREPROCESS_FORMAT": "png", "PREPROCESS_MAX_EDGE": 1600, "PREPROCESS_CROP": True},
+    "webp q90, crop, 1600px": {"PREPROCESS_FORMAT": "webp", "PREPROCESS_QUALITY": 90, "PREPROCESS_MAX_EDGE": 1600,
+                               "PREPROCESS_CROP": True},
+    "webp q90, crop, 1600px, grey": {"PREPROCESS_FORMAT": "webp", "PREPROCESS_QUALITY": 90, "PREPROCESS_MAX_EDGE": 1600,
+                                     "PREPROCESS_CROP": True, "PREPROCESS_GRAYSCALE": True},
+    "webp q80, crop, 1200px": {"PREPROCESS_FORMAT": "webp", "PREPROCESS_QUALITY": 80, "PREPROCESS_MAX_EDGE": 1200,
+                               "PREPROCESS_CROP": True},
+}
+
+def apply(settings: dict):
+    gemini_processor.PREPROCESS_IMAGES = True
+    gemini_processor.PREPROCESS_GRAYSCALE = False
+    gemini_processor.PREPROCESS_CROP = False
+    for name, value in settings.items():
+        setattr(gemini_processor, name, value)
+
+def baseline_blob(image) -> bytes:
+    """What the SDK sends for a PIL image that is not backed by a file"""
+    buffer = BytesIO()
+    image.save(buffer, format="webp", lossless=True)
+    return buffer.getvalue()
+
+def encoded(image, settings) -> bytes:
+    if settings is None:
+        return baseline_blob(image)
+    apply(settings)
+    return gemini_processor.prepare_model_image(image)["data"]
+
+def flatten(data: dict) -> dict:
+    """{"tiers.3.wave": "4512", ...} for comparing extracted values with drawn ones"""
+    flat = {}
+    for key, value in data.items():
+        if isinstance(value, dict):
+            flat.update({f"{key}.{inner}": inner_value for inner, inner_value in flatten(value).items()})
+        else:
+            flat[key] = str(value).replace(" ", "")
+    return flat
+
+def extraction_accuracy(label: str, image, settings, data: dict) -> float:
+    """Share of drawn values the extraction returned exactly"""
+    model_image = image
+    if settings is not None:
+        apply(settings)
+        model_image = gemini_processor.prepare_model_image(image)
+    extract = gemini_processor.extract_stats_data if label == "stats" else gemini_processor.extract_tier_data
+    extracted = flatten(extract(model_image))
+    expected = flatten(data)
+    return sum(1 for key, value in expected.items() if extracted.get(key) == value) / len(expected)
+
+def run(fixtures: list, extract: bool):
+    screens = [(label, image, data) for label, image, data in fixtures if label in ("stats", "tier")]
+    uploads = []
+    for _, image, _ in screens:
+        buffer = BytesIO()
+        image.save(buffer, "PNG")
+        uploads.append(len(buffer.getvalue()))
+    print(f"\n📊 {len(screens)} screenshots, upload size p50 {statistics.median(uploads) / 1024:,.0f} KiB")
+    print(f"  {'setting':<28} {'sent KiB':>9} {'vs baseline':>12} {'prep ms':>8}" + (f" {'accuracy':>9}" if extract else ""))
+
+    baseline_bytes = None
+    for name, settings in SETTINGS.items():
+        sizes, times, accuracy = [], [], []
+        for label, image, data in screens:
+            start = time.perf_counter()
+            sizes.append(len(encoded(image, settings)))
+            times.append((time.perf_counter() - start) * 1000)
+            if extract and data:
+                accuracy.append(extraction_accuracy(label, image, settings, data))
+        total = sum(sizes)
+        baseline_bytes = baseline_bytes or total
+        line = (f"  {name:<28} {statistics.median(sizes) / 1024:>9,.0f} {total / baseline_bytes:>11.0%} "
+                f"{statistics.median(times):>8.0f}")
+        if extract:
+            line += f" {statistics.mean(accuracy):>9.1%}"
+        print(line)
+    print("  (baseline encoding is repeated for every Gemini request; preprocessed blobs once per upload)")
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    extract = "--extract" in args
+    args = [arg for arg in args if arg != "--extract"]
+    if args[:1] == ["--manifest"]:
+        fixtures = load_manifest(args[1])
+    else:
+        fixtures = generate(int(args[0]) if args else 10)
+    run(fixtures, extract)
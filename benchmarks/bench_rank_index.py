@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Benchmark: RankIndex versus scan-and-sort for tier leaderboards.
+
+Scan-and-sort is what the leaderboard commands used to do on every request:
+collect each user's (wave, coins) for the tier and sort all of them.
+RankIndex is updated once per upload and answers reads from the index.
+
+Run from the repository root:
+    python3 benchmarks/bench_rank_index.py [user counts...]   (default 10000 100000)
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rank_index import RankIndex
+
+READS = 200
+UPDATES = 2000
+
+def make_users(count: int, rng: random.Random) -> dict:
+    """discordid -> (wave, coins sort key) with realistic ties on wave"""
+    return {
+        str(100_000_000 + i): (rng.randint(1, 12_000), rng.randint(100 * 10**15, 150 * 10**15))
+        for i in range(count)
+    }
+
+def scan_and_sort_top(users: dict, count: int) -> list:
+    rows = sorted(users.items(), key=lambda item: item[1], reverse=True)
+    return rows[:count]
+
+def scan_and_sort_rank(users: dict, member: str) -> int:
+    rows = sorted(users.items(), key=lambda item: item[1], reverse=True)
+    return next(i for i, (discordid, _) in enumerate(rows, 1) if discordid == member)
+
+def timed(func, repeat: int) -> float:
+    """Average milliseconds per call"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1000
+
+def run(count: int):
+    rng = random.Random(count)
+    users = make_users(count, rng)
+    members = list(users)
+
+    start = time.perf_counter()
+    index = RankIndex.build(users.items(), seed=count)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    sort_reads = max(READS // (count // 10_000 or 1), 5)
+    probe = rng.choice(members)
+
+    results = {
+        "bulk build index (once)": build_ms,
+        "top 10: scan-and-sort": timed(lambda: scan_and_sort_top(users, 10), sort_reads),
+        "top 10: RankIndex": timed(lambda: index.top(10), READS),
+        "rank of user: scan-and-sort": timed(lambda: scan_and_sort_rank(users, probe), sort_reads),
+        "rank of user: RankIndex": timed(lambda: index.rank(probe), READS),
+        "around rank: RankIndex": timed(lambda: index.around(count // 2, 5), READS),
+    }
+
+    def upload():
+        member = rng.choice(members)
+        wave, coins = users[member]
+        users[member] = (wave + rng.randint(0, 50), coins + rng.randint(0, 10**12))
+        index.update(member, users[member])
+    results["upload update: RankIndex"] = timed(upload, UPDATES)
+
+    # Sanity check: both approaches return the same top keys
+    assert [key for _, key in scan_and_sort_top(users, 10)] == [key for _, _, key in index.top(10)]
+
+    print(f"\n📊 {count:,} users")
+    for name, ms in results.items():
+        print(f"  {name:<32} {ms:10.4f} ms")
+
+if __name__ == "__main__":
+    counts = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000]
+    for count in counts:
+        run(count)
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Labelled screenshot fixtures for the image benchmarks.
+
+A fixture set is a directory of images plus manifest.json:
+    [{"file": "stats_000.png", "label": "stats", "data": {...}}, ...]
+with label "stats", "tier" or "unknown" and, for rendered screens, the
+values drawn on them. Real screenshots can be labelled by hand in the same
+format and passed to the benchmarks with --manifest.
+
+Without one, the benchmarks render a synthetic set here: stats and tier
+screens in the game's layout (light text on a dark flat background, label
+and value columns) at common phone resolutions, with status bars, JPEG
+artefacts and scaling, plus non-table images (photos, chat screenshots,
+gameplay) labelled "unknown".
+
+Run from the repository root to write a set to disk:
+    python3 benchmarks/screenshot_fixtures.py <directory> [count per label]   (default 40)
+"""
+
+import json
+import os
+import random
+import sys
+from io import BytesIO
+
+from PIL import Image, ImageDraw, ImageFilter, ImageFont
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gemini_processor import STATS_KEYS, TIER_NUMBERS
+
+PHONE_SIZES = [(1080, 2340), (1170, 2532), (1284, 2778), (1080, 1920), (750, 1334), (1242, 2208)]
+SUFFIXES = ["K", "M", "B", "T", "q", "Q", "s", "S", "O", "N", "D"]
+LABELS = ("stats", "tier", "unknown")
+
+def _font(size: int):
+    return ImageFont.load_default(size=size)
+
+def _value(rng: random.Random) -> str:
+    return f"{rng.uniform(1, 999):.2f}{rng.choice(SUFFIXES)}"
+
+def _canvas(rng: random.Random):
+    width, height = rng.choice(PHONE_SIZES)
+    background = tuple(rng.randint(10, 45) for _ in range(3))
+    image = Image.new("RGB", (width, height), background)
+    return image, ImageDraw.Draw(image), background
+
+def _status_bar(draw, width: int, rng: random.Random, text_colour):
+    font = _font(width // 30)
+    draw.text((width * 0.06, width * 0.03), f"{rng.randint(1, 12)}:{rng.randint(0, 59):02d}", font=font, fill=text_colour)
+    draw.text((width * 0.78, width * 0.03), f"{rng.randint(5, 100)}%", font=font, fill=text_colour)
+
+def _row_cards(draw, width: int, top: float, pitch: float, rows: int, background):
+    """Faint alternating row backgrounds, below the text contrast"""
+    card = tuple(min(channel + 14, 255) for channel in background)
+    for row in range(0, rows, 2):
+        y = top + row * pitch
+        draw.rectangle((width * 0.03, y - pitch * 0.15, width * 0.97, y + pitch * 0.75), fill=card)
+
+def render_stats(rng: random.Random, data: dict = None):
+    """A stats screen; data overrides the drawn values without changing the layout"""
+    image, draw, background = _canvas(rng)
+    width, height = image.size
+    text = tuple(rng.randint(200, 255) for _ in range(3))
+    font = _font(width // rng.randint(22, 28))
+    _status_bar(draw, width, rng, text)
+    draw.text((width * 0.4, height * 0.08), "Stats", font=_font(width // 16), fill=text)
+
+    drawn = {key: _value(rng) for key in STATS_KEYS}
+    drawn["game_started"] = f"{rng.randint(1, 28):02d}{rng.randint(1, 12):02d}{rng.randint(2019, 2025)}"
+    data = data or drawn
+    top, pitch = height * 0.16, height * rng.uniform(0.036, 0.042)
+    _row_cards(draw, width, top, pitch, len(STATS_KEYS), background)
+    for row, key in enumerate(STATS_KEYS):
+        y = top + row * pitch
+        value = data[key]
+        draw.text((width * 0.07, y), key.replace("_", " ").title(), font=font, fill=text)
+        draw.text((width * 0.93 - draw.textlength(value, font=font), y), value, font=font, fill=text)
+    return image, data
+
+def render_tier(rng: random.Random, data: dict = None):
+    """A tier screen; data overrides the drawn values without changing the layout"""
+    image, draw, background = _canvas(rng)
+    width, height = image.size
+    text = tuple(rng.randint(200, 255) for _ in range(3))
+    font = _font(width // rng.randint(22, 28))
+    _status_bar(draw, width, rng, text)
+
+    drawn = {
+        "summary": {"thorn_damage": _value(rng), "waves_skipped": str(rng.randint(0, 90_000))},
+        "tiers": {str(i): {"wave": rng.randint(0, 12_000), "coins": _value(rng)} for i in TIER_NUMBERS}
+    }
+    data = data or drawn
+    for row, (label, key) in enumerate([("Thorn Damage", "thorn_damage"), ("Waves Skipped", "waves_skipped")]):
+        value = data["summary"][key]
+        y = height * 0.07 + row * height * 0.035
+        draw.text((width * 0.07, y), label, font=font, fill=text)
+        draw.text((width * 0.93 - draw.textlength(value, font=font), y), value, font=font, fill=text)
+
+    top, pitch = height * 0.2, height * rng.uniform(0.036, 0.04)
+    for x, heading in [(0.07, "Tier"), (0.42, "Wave"), (0.72, "Coins")]:
+        draw.text((width * x, top - pitch * 1.2), heading, font=font, fill=text)
+    _row_cards(draw, width, top, pitch, len(TIER_NUMBERS), background)
+    for row, tier_num in enumerate(TIER_NUMBERS):
+        y = top + row * pitch
+        tier = data["tiers"][str(tier_num)]
+        draw.text((width * 0.07, y), f"Tier {tier_num}", font=font, fill=text)
+        draw.text((width * 0.42, y), str(tier["wave"]), font=font, fill=text)
+        draw.text((width * 0.72, y), tier["coins"], font=font, fill=text)
+    return image, data
+
+def render_unknown(rng: random.Random):
+    kind = rng.choice(["photo", "chat", "gameplay"])
+    width, height = rng.choice(PHONE_SIZES)
+    if kind == "photo":
+        # Smooth gradients with noise and shapes: no dominant colour, no text rows
+        image = Image.effect_noise((width // 8, height // 8), rng.randint(40, 90)).convert("RGB")
+        image = Image.merge("RGB", [image.getchannel(0).point(lambda v, shift=shift: (v + shift) % 256) for shift in (0, 85, 170)])
+        image = image.resize((width, height), Image.BICUBIC).filter(ImageFilter.GaussianBlur(3))
+        draw = ImageDraw.Draw(image)
+        for _ in range(12):
+            x, y = rng.randint(0, width), rng.randint(0, height)
+            draw.ellipse((x, y, x + rng.randint(50, 400), y + rng.randint(50, 400)), fill=tuple(rng.randint(0, 255) for _ in range(3)))
+        return image, {"kind": kind}
+
+    image = Image.new("RGB", (width, height), tuple(rng.randint(10, 60) for _ in range(3)))
+    draw = ImageDraw.Draw(image)
+    text = tuple(rng.randint(200, 255) for _ in range(3))
+    if kind == "chat":
+        # Left-aligned paragraphs: one column per line
+        font = _font(width // 26)
+        y = height * 0.08
+        while y < height * 0.9:
+            words = " ".join(rng.choice(["tower", "wave", "coins", "gg", "nice", "run", "tier", "lol", "what", "build"])
+                             for _ in range(rng.randint(2, 8)))
+            draw.text((width * 0.05, y), words, font=font, fill=text)
+            y += height * rng.uniform(0.03, 0.06)
+    else:
+        # Arena: a tower in the middle, enemies around it, a short HUD line
+        draw.text((width * 0.05, height * 0.05), f"Wave {rng.randint(1, 9000)}", font=_font(width // 20), fill=text)
+        cx, cy = width // 2, height // 2
+        draw.rectangle((cx - 60, cy - 60, cx + 60, cy + 60), fill=(200, 200, 255))
+        for _ in range(rng.randint(20, 80)):
+            x, y = rng.randint(0, width), rng.randint(int(height * 0.15), int(height * 0.85))
+            draw.rectangle((x, y, x + 25, y + 25), fill=(255, rng.randint(0, 120), rng.randint(0, 120)))
+    return image, {"kind": kind}
+
+RENDERERS = {"stats": render_stats, "tier": render_tier, "unknown": render_unknown}
+
+def distort(image: Image.Image, rng: random.Random) -> Image.Image:
+    """What sharing does to a screenshot: scaling and lossy compression"""
+    scale = rng.uniform(0.5, 1.0)
+    image = image.resize((round(image.width * scale), round(image.height * scale)), Image.BILINEAR)
+    if rng.random() < 0.6:
+        buffer = BytesIO()
+        image.save(buffer, "JPEG", quality=rng.randint(40, 90))
+        image = Image.open(BytesIO(buffer.getvalue())).convert("RGB")
+    return image
+
+def generate(count_per_label: int = 40, seed: int = 7) -> list:
+    """[(label, PIL image, drawn data)] for a deterministic synthetic set"""
+    rng = random.Random(seed)
+    fixtures = []
+    for label in LABELS:
+        for _ in range(count_per_label):
+            image, data = RENDERERS[label](rng)
+            fixtures.append((label, distort(image, rng), data))
+    return fixtures
+
+def write_fixture_set(directory: str, count_per_label: int = 40, seed: int = 7) -> str:
+    """Write a synthetic set and its manifest; returns the manifest path"""
+    os.makedirs(directory, exist_ok=True)
+    manifest = []
+    for index, (label, image, data) in enumerate(generate(count_per_label, seed)):
+        file_name = f"{label}_{index:03d}.png"
+        image.save(os.path.join(directory, file_name))
+        manifest.append({"file": file_name, "label": label, "data": data})
+    path = os.path.join(directory, "manifest.json")
+    with open(path, "w") as manifest_file:
+        json.dump(manifest, manifest_file, indent=1)
+    return path
+
+def load_manifest(path: str) -> list:
+    """[(label, PIL image, data or None)] from a manifest.json"""
+    directory = os.path.dirname(os.path.abspath(path))
+    with open(path) as manifest_file:
+        entries = json.load(manifest_file)
+    return [
+        (entry["label"], Image.open(os.path.join(directory, entry["file"])), entry.get("data"))
+        for entry in entries
+    ]
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python3 benchmarks/screenshot_fixtures.py <directory> [count per label]")
+        sys.exit(1)
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+    print(f"✅ Wrote {write_fixture_set(sys.argv[1], count)}")
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+pytest-benchmark suite for number_codec parsing and formatting.
+
+Same corpus and legacy baseline as bench_number_codec.py. Each benchmark
+processes the whole corpus once per round; "cold" rounds start from empty
+codec caches. Skipped when pytest-benchmark is not installed.
+
+Run from the repository root:
+    pip install pytest-benchmark
+    python3 -m pytest benchmarks/test_bench_number_codec.py --benchmark-only
+    (add --benchmark-compare to compare with a saved run, see --benchmark-autosave)
+"""
+
+import random
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from bench_number_codec import make_corpus, legacy_parse, clear_caches
+from dashboard_backend.number_codec import parse_number, parse_decimal, numeric_sort_key, parse_tier_string, format_number
+
+CORPUS_SIZE = 20_000
+ROUNDS = 5
+
+@pytest.fixture(scope="module")
+def corpus():
+    values, tiers = make_corpus(CORPUS_SIZE, random.Random(CORPUS_SIZE))
+    return values, tiers, [parse_number(value) for value in values]
+
+def run_all(func, items):
+    for item in items:
+        func(item)
+
+def bench(benchmark, func, items, cold: bool):
+    """Time func over items; cold rounds clear the codec caches first, warm ones fill them once"""
+    if not cold:
+        run_all(func, items)
+    benchmark.pedantic(run_all, args=(func, items), setup=clear_caches if cold else None, rounds=ROUNDS)
+
+def test_codec_agrees_with_legacy_parser(corpus):
+    values, _, _ = corpus
+    assert all(parse_number(value) == legacy_parse(value) for value in values)
+
+def test_parse_legacy(benchmark, corpus):
+    bench(benchmark, legacy_parse, corpus[0], cold=True)
+
+@pytest.mark.parametrize("cold", [True, False], ids=["cold", "warm"])
+def test_parse_number(benchmark, corpus, cold):
+    bench(benchmark, parse_number, corpus[0], cold)
+
+def test_parse_decimal_cold(benchmark, corpus):
+    bench(benchmark, parse_decimal, corpus[0], cold=True)
+
+def test_sort_key_warm(benchmark, corpus):
+    bench(benchmark, numeric_sort_key, corpus[0], cold=False)
+
+@pytest.mark.parametrize("cold", [True, False], ids=["cold", "warm"])
+def test_parse_tier_string(benchmark, corpus, cold):
+    bench(benchmark, parse_tier_string, corpus[1], cold)
+
+@pytest.mark.parametrize("cold", [True, False], ids=["cold", "warm"])
+def test_format_number(benchmark, corpus, cold):
+    bench(benchmark, format_number, corpus[2], cold)
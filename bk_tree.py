@@ -0,0 +1,62 @@
+"""
+BK-tree over integer hashes under Hamming distance.
+
+Each node's children are keyed by their distance to the node, so by the
+triangle inequality a search within radius r only descends into children
+whose edge lies in [d - r, d + r], where d is the query's distance to the
+node. Near-duplicate lookups among a user's earlier screenshots then touch
+a small part of the tree instead of every hash.
+"""
+
+class _Node:
+    __slots__ = ("key", "values", "children")
+
+    def __init__(self, key, value):
+        self.key = key
+        self.values = [value]
+        self.children = {}
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+class BKTree:
+    """Values stored under integer hashes; equal hashes share a node"""
+
+    def __init__(self):
+        self._root = None
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def add(self, key: int, value):
+        self._size += 1
+        if self._root is None:
+            self._root = _Node(key, value)
+            return
+        node = self._root
+        while True:
+            distance = hamming(key, node.key)
+            if distance == 0:
+                node.values.append(value)
+                return
+            child = node.children.get(distance)
+            if child is None:
+                node.children[distance] = _Node(key, value)
+                return
+            node = child
+
+    def search(self, key: int, max_distance: int) -> list:
+        """[(distance, value)] for every value within max_distance of key, nearest first"""
+        found = []
+        pending = [self._root] if self._root is not None else []
+        while pending:
+            node = pending.pop()
+            distance = hamming(key, node.key)
+            if distance <= max_distance:
+                found.extend((distance, value) for value in node.values)
+            for edge, child in node.children.items():
+                if distance - max_distance <= edge <= distance + max_distance:
+                    pending.append(child)
+        found.sort(key=lambda item: item[0])
+        return found
@@ -4,16 +4,25 @@ import re
 import asyncio
 from datetime import datetime
 from dotenv import load_dotenv
-from discord.ext import commands
+from discord.ext import commands, tasks
 from sqlalchemy.orm import Session
-from dashboard_backend.database import SessionLocal
-from dashboard_backend.models import UserData, UserDataHistory, BotAdmin, UserStats
-from gemini_processor import process_image
-from gemini_sql_parser import process_gemini_result, parse_numeric_value
+from dashboard_backend.database import SessionLocal, engine, get_pool_metrics
+from dashboard_backend.history_retention import apply_history_retention
+from dashboard_backend.tier_history import load_snapshots
+from dashboard_backend.leaderboard_snapshot import materialize, board_label, top_percent
+from dashboard_backend.models import UserData, UserDataHistory, BotAdmin, UserStats, UserStatsLatest
+from gemini_processor import process_image_bytes
+from image_fetch import admission_error, fetch_attachment, close_session
+from dashboard_backend.number_codec import parse_tier_string
+from gemini_sql_parser import process_gemini_result
+from leaderboard_cache import LeaderboardCache
+from upload_queue import UploadQueue
 
 load_dotenv()
 
 TOKEN = os.environ.get("DISCORD_TOKEN")
+# Seconds between writes of changed leaderboards to leaderboard_snapshot for the dashboard
+LEADERBOARD_SNAPSHOT_INTERVAL = int(os.environ.get("LEADERBOARD_SNAPSHOT_INTERVAL", "30"))
 
 if TOKEN is None:
     raise ValueError("No Discord bot token found in environment variables.")
@@ -22,7 +31,14 @@ if TOKEN is None:
 intents = discord.Intents.default()
 intents.message_content = True
 intents.members = True  # Need this to access member information for display name updates
-bot = commands.Bot(command_prefix="!", intents=intents)
+
+class TowerBot(commands.Bot):
+    async def close(self):
+        # Release the pooled download connections before the event loop stops
+        await close_session()
+        await super().close()
+
+bot = TowerBot(command_prefix="!", intents=intents)
 
 class UploadOnlyHelp(commands.MinimalHelpCommand):
     async def send_bot_help(self, mapping):
@@ -45,8 +61,9 @@ class UploadOnlyHelp(commands.MinimalHelpCommand):
                 "`!leader` — Overall ranking by highest tier achieved (shows wave/coins)\n"
                 "`!leadercoins` — Top 10 highest coins per user (shows tier)\n"
                 "`!leaderwaves` — Top 10 highest wave per user (shows tier)\n"
-                "`!leadertier` — Top 10 for a specific tier: `!leadertier t13`\n"
-                "`!leaderstats` — Top 10 for any stats category: `!leaderstats waves`"
+                "`!leadertier` — Top 10 for a specific tier: `!leadertier t13`, or `!leadertier all`\n"
+                "`!leaderstats` — Top 10 for any stats category: `!leaderstats waves`\n"
+                "Add a page number for more: `!leader 3`, `!leadertier t13 2`"
             ),
             inline=False
         )
@@ -54,6 +71,7 @@ class UploadOnlyHelp(commands.MinimalHelpCommand):
             name="My Data",
             value=(
                 "`!mystats` — Show your most recent saved stats\n"
+                "`!myrank` — Show your rank on every leaderboard\n"
                 "`!mytiers` — Show all your tiers (T1..T18) with Waves and Coins"
             ),
             inline=False
@@ -76,19 +94,59 @@ def get_user_lock(user_id: str) -> asyncio.Lock:
         _user_locks[user_id] = lock
     return lock
 
-async def async_process_image(image_url: str, force_type: str = None) -> dict:
-    """Run synchronous image processing in a background thread.
+async def async_process_image(attachment, force_type: str = None, discord_id: str = None) -> dict:
+    """Download an attachment on the event loop, then process it in a background thread.
 
-    Offloads CPU/IO heavy work to a thread so the event loop remains responsive.
+    Only the CPU-heavy work (decoding, hashing, Gemini calls) takes a thread;
+    the download is async and capped at MAX_IMAGE_BYTES.
     """
-    return await asyncio.to_thread(process_image, image_url, force_type)
+    image_bytes = await fetch_attachment(attachment)
+    return await asyncio.to_thread(process_image_bytes, image_bytes, force_type, discord_id)
+
+# Uploads wait here for one of UPLOAD_WORKERS extraction workers
+upload_queue = UploadQueue()
+
+def describe_wait(seconds: float) -> str:
+    if seconds < 60:
+        return f"about {max(round(seconds / 5) * 5, 5)}s"
+    return f"about {round(seconds / 60)} min"
+
+def queue_status(position: int, wait_seconds: float) -> str:
+    return f"🔄 Processing image... Please wait.\n⏳ Queue position: {position} ({describe_wait(wait_seconds)})"
 
 async def async_process_gemini_result(gemini_result: dict, discord_id: str, discord_name: str) -> dict:
     """Run synchronous database work in a background thread.
 
-    Prevents blocking the event loop during DB operations.
+    Prevents blocking the event loop during DB operations. Once the upload is
+    committed, the saved values are written through to the leaderboard cache.
     """
-    return await asyncio.to_thread(process_gemini_result, gemini_result, discord_id, discord_name)
+    result = await asyncio.to_thread(process_gemini_result, gemini_result, discord_id, discord_name)
+    if result.get("success"):
+        # Waits for a load in progress; updates are idempotent if the load already saw this commit
+        cache = await get_leaderboard_cache()
+        if gemini_result.get("image_type") == "tier":
+            updated_tiers = result.get("tier_data", {}).get("updated_tiers", {})
+            cache.update_tiers(discord_id, discord_name, updated_tiers)
+        elif gemini_result.get("image_type") == "stats":
+            cache.update_stats(discord_id, discord_name, result.get("stats", {}))
+    return result
+
+leaderboard_cache = LeaderboardCache()
+_leaderboard_cache_lock = asyncio.Lock()
+
+async def get_leaderboard_cache() -> LeaderboardCache:
+    """Return the leaderboard cache, loading it from the database on first use"""
+    if not leaderboard_cache.loaded:
+        async with _leaderboard_cache_lock:
+            if not leaderboard_cache.loaded:
+                def load():
+                    session = get_db_session()
+                    try:
+                        leaderboard_cache.load(session)
+                    finally:
+                        session.close()
+                await asyncio.to_thread(load)
+    return leaderboard_cache
 
 def get_db_session():
     """Create and return a new database session.
@@ -174,6 +232,11 @@ async def update_all_display_names():
                     UserStats.discordid == discord_id
                 ).update({"discordname": new_name})
                 
+                # Update UserStatsLatest
+                session.query(UserStatsLatest).filter(
+                    UserStatsLatest.discordid == discord_id
+                ).update({"discordname": new_name})
+                
                 # Update UserData
                 data_updated = session.query(UserData).filter(
                     UserData.discordid == discord_id
@@ -207,49 +270,6 @@ async def update_all_display_names():
         session.close()
 
 
-def parse_wave_coins(tier_str):
-    """Parse wave number and coin amount from a tier string.
-    
-    Args:
-        tier_str (str): Tier string in format "Wave: X Coins: Y"
-        
-    Returns:
-        tuple: (wave_number, coin_amount) where wave is int and coins is float
-    """
-    # Extract wave number using regex
-    wave_match = re.search(r"Wave:\s*(\d+)", tier_str)
-    # Extract coins with optional suffix (K, M, B, T, Q)
-    coins_match = re.search(r"Coins:\s*([\d.,]+[KMBTQ]?)", tier_str)
-
-    wave = int(wave_match.group(1)) if wave_match else 0
-
-    coins_str = coins_match.group(1) if coins_match else "0"
-    multiplier = 1
-    
-    # Convert suffix to numeric multiplier
-    if coins_str.endswith("K"):
-        multiplier = 1_000
-        coins_str = coins_str[:-1]
-    elif coins_str.endswith("M"):
-        multiplier = 1_000_000
-        coins_str = coins_str[:-1]
-    elif coins_str.endswith("B"):
-        multiplier = 1_000_000_000
-        coins_str = coins_str[:-1]
-    elif coins_str.endswith("T"):
-        multiplier = 1_000_000_000_000
-        coins_str = coins_str[:-1]
-    elif coins_str.endswith("Q"):
-        multiplier = 1_000_000_000_000_000
-        coins_str = coins_str[:-1]
-
-    try:
-        coins = float(coins_str.replace(",", "")) * multiplier
-    except:
-        coins = 0
-
-    return wave, coins
-
 def save_user_data(discord_id, discord_name, tier_data):
     """Save or update user tier data in the database.
     
@@ -330,6 +350,34 @@ def is_bot_admin(discord_id):
         session.close()
 
 
+@tasks.loop(hours=24)
+async def history_maintenance():
+    """Create upcoming history partitions and apply the history retention policy once a day."""
+    try:
+        summary = await asyncio.to_thread(apply_history_retention, engine)
+        print(
+            f"🗄️ History maintenance: created {len(summary['created'])} partition(s), "
+            f"downsampled {summary['downsampled']} row(s), dropped {len(summary['dropped'])} partition(s)"
+        )
+    except Exception as e:
+        print(f"❌ Error during history maintenance: {e}")
+
+@tasks.loop(seconds=LEADERBOARD_SNAPSHOT_INTERVAL)
+async def leaderboard_snapshots():
+    """Materialize the leaderboards that changed since the last run for the dashboard."""
+    cache = await get_leaderboard_cache()
+    boards = cache.take_dirty()
+    if not boards:
+        return
+    # Rows are built on the event loop, where the cache is updated; only the write runs in a thread
+    rows = {board: cache.snapshot_rows(board) for board in boards}
+    try:
+        generation = await asyncio.to_thread(materialize, rows)
+        print(f"📋 Materialized {len(rows)} leaderboard(s) as generation {generation}")
+    except Exception as e:
+        cache.mark_dirty(boards)
+        print(f"❌ Error materializing leaderboards: {e}")
+
 @bot.event
 async def on_ready():
     print(f"✅ Bot is online as {bot.user}")
@@ -339,6 +387,16 @@ async def on_ready():
     # Update display names for all users in database
     await update_all_display_names()
     
+    # Build the leaderboard cache once names are current; uploads keep it up to date
+    leaderboard_cache.loaded = False
+    await get_leaderboard_cache()
+    print(f"✅ Leaderboard cache loaded")
+    
+    if not history_maintenance.is_running():
+        history_maintenance.start()
+    if not leaderboard_snapshots.is_running():
+        leaderboard_snapshots.start()
+    
     print(f"🎯 Ready to process game screenshots!")
 
 # MOTHBALLED: commands_list moved to mothballed_commands.py
@@ -349,21 +407,12 @@ async def on_ready():
 
 # MOTHBALLED: leaderwaves moved to mothballed_commands.py
 
-def format_number_suffix(num: float) -> str:
-    """Format a number with a suffix (K, M, B, T, Q) and one decimal if needed."""
-    abs_num = abs(num)
-    if abs_num >= 1_000_000_000_000_000:
-        return f"{num/1_000_000_000_000_000:.2f}Q".rstrip('0').rstrip('.')
-    elif abs_num >= 1_000_000_000_000:
-        return f"{num/1_000_000_000_000:.2f}T".rstrip('0').rstrip('.')
-    elif abs_num >= 1_000_000_000:
-        return f"{num/1_000_000_000:.2f}B".rstrip('0').rstrip('.')
-    elif abs_num >= 1_000_000:
-        return f"{num/1_000_000:.2f}M".rstrip('0').rstrip('.')
-    elif abs_num >= 1_000:
-        return f"{num/1_000:.2f}K".rstrip('0').rstrip('.')
-    else:
-        return str(int(num))
+def leaderboard_page(total: int, page: int, per_page: int):
+    """Return (start rank, page count) for a 1-based page, or None if the page does not exist."""
+    pages = max((total + per_page - 1) // per_page, 1)
+    if not 1 <= page <= pages:
+        return None
+    return (page - 1) * per_page + 1, pages
 
 # MOTHBALLED: leadercoins moved to mothballed_commands.py
 
@@ -391,13 +440,13 @@ async def showdata(ctx):
         else:
             response += "No current user data found.\n"
         
-        rows = session.query(UserDataHistory).all()
-        if rows:
+        names = {row.discordid: row.discordname for row in rows}
+        snapshots = list(load_snapshots(session))
+        if snapshots:
             response += "**Historical Entries:**\n"
-            for row in rows:
-                discordname = row.discordname
-                timestamp = row.timestamp
-                tiers = "\n".join([f"T{i+1}: {getattr(row, f'T{i+1}')}" for i in range(18)])
+            for discordid, timestamp, snapshot in snapshots:
+                discordname = names.get(discordid, discordid)
+                tiers = "\n".join([f"T{i+1}: {snapshot[f'T{i+1}']}" for i in range(18)])
                 response += f"__{discordname}__ at {timestamp}\n{tiers}\n\n"
         else:
             response += "No history found.\n"
@@ -417,6 +466,23 @@ async def showdata_error(ctx, error):
         await ctx.send("❌ You do not have permission to use this command.")
 
 
+@bot.command(help="Show database connection pool and upload queue metrics for the bot process.")
+async def poolstats(ctx):
+    """Shows connection pool usage, checkout wait and churn, and the upload queue. (Bot Admins only)"""
+    if not is_bot_admin(str(ctx.author.id)):
+        await ctx.send("❌ You do not have permission to use this command.")
+        return
+
+    metrics = get_pool_metrics()
+    lines = [f"{name}: {value}" for name, value in metrics.items()]
+    queue_lines = [f"{name}: {value}" for name, value in upload_queue.stats().items()]
+    await ctx.send(
+        "🔌 Connection pool:\n```\n" + "\n".join(lines) + "```"
+        + "📥 Upload queue:\n```\n" + "\n".join(queue_lines) + "```"
+    )
+
+poolstats.hidden = True
+
 
 @bot.event
 async def on_message(message):
@@ -485,24 +551,41 @@ async def listbotadmins(ctx):
 
 @bot.command(name="upload", help="Upload any game screenshot (stats or tier) - AI will auto-detect the type.")
 async def upload(ctx):
-    """Process uploaded game screenshots concurrently using background tasks.
+    """Process uploaded game screenshots through the upload queue.
 
     Supports both stats screenshots and tier screenshots. Uses Gemini AI to extract
-    data and saves to the appropriate database table. Heavy work is offloaded to
-    threads to keep the bot responsive. A per-user lock prevents races if the
-    same user uploads multiple images simultaneously.
+    data and saves to the appropriate database table. Uploads are queued for a
+    fixed pool of workers; when the queue is full the upload is turned away, and
+    a queued upload is told its position and estimated wait, updated as the
+    queue moves. A per-user lock prevents races if the same user uploads
+    multiple images simultaneously.
     """
     if not ctx.message.attachments:
         await ctx.send("Please attach a screenshot of your game data (stats or tier).")
         return
     
     attachment = ctx.message.attachments[0]
-    processing_msg = await ctx.send("🔄 Processing image... Please wait.")
+    problem = admission_error(attachment)
+    if problem:
+        await ctx.send(f"❌ {problem}")
+        return
+    busy_text = "⏳ The bot is busy with other uploads right now. Please try again in a few minutes."
+    if upload_queue.full():
+        await ctx.send(busy_text)
+        return
+    position, wait_seconds = upload_queue.estimate()
+    queued = wait_seconds > 0
+    processing_msg = await ctx.send(queue_status(position, wait_seconds) if queued else "🔄 Processing image... Please wait.")
+
+    async def show_position(position: int, wait_seconds: float):
+        await processing_msg.edit(content=queue_status(position, wait_seconds))
 
     async def process_upload_task():
         try:
-            # Run CPU/IO-heavy image handling in a background thread
-            gemini_result = await async_process_image(attachment.url)
+            if queued:
+                await processing_msg.edit(content="🔄 Processing image... Please wait.")
+            # Download on the event loop, then run CPU-heavy image handling in a background thread
+            gemini_result = await async_process_image(attachment, discord_id=str(ctx.author.id))
 
             if not gemini_result.get("success"):
                 await processing_msg.edit(content=f"❌ Failed to process image: {gemini_result.get('error', 'Unknown error')}")
@@ -541,114 +624,79 @@ async def upload(ctx):
             # Ensure other uploads continue even if this one fails
             await processing_msg.edit(content=f"❌ **Processing Error:** {str(e)}\n\nPlease make sure you uploaded a clear game screenshot.")
 
-    # Fire-and-forget to avoid blocking this command on processing
-    asyncio.create_task(process_upload_task())
+    # The command returns at once; a worker runs the job when its turn comes
+    if not upload_queue.submit(process_upload_task, show_position if queued else None, position):
+        await processing_msg.edit(content=busy_text)
 
 ## MOTHBALLED: uploadwaves moved to mothballed_commands.py
 
-@bot.command(name="leadercoins", help="Show each user's highest coins across all tiers (Top 10), with tier.")
-async def leadercoins(ctx):
-    """Display the top 10 users by their single highest coins value across any tier.
+@bot.command(name="leadercoins", help="Show each user's highest coins across all tiers (10 per page), with tier. Usage: !leadercoins [page]")
+async def leadercoins(ctx, page: int = 1):
+    """Display users by their single highest coins value across any tier, 10 per page.
 
-    - Parses each user's tier strings (T1..T18)
-    - Finds the maximum coins value (numeric) per user
+    - Ranks on the exact coin sort keys held in the leaderboard cache
     - Displays the preserved coin string (with suffix) for readability
-    - Sorted descending, top 10 rows
+    - Sorted descending; page 1 is the top 10
     """
-    session = get_db_session()
     try:
-        users = session.query(UserData).all()
-
-        per_user: list[tuple[str, float, str, int]] = []
-        for user in users:
-            max_coins_value = -1.0
-            max_coins_display = "0"
-            best_tier_index = 0
-
-            for tier_index in range(1, 19):
-                tier_str = getattr(user, f"T{tier_index}")
-                if not tier_str:
-                    continue
-                # Use existing parser for numeric comparison
-                _, coins_value = parse_wave_coins(tier_str)
-                if coins_value > max_coins_value:
-                    max_coins_value = coins_value
-                    # Preserve original display (e.g., 16.78B)
-                    m = re.search(r"Coins:\s*(\S+)", tier_str)
-                    max_coins_display = m.group(1) if m else "0"
-                    best_tier_index = tier_index
-
-            per_user.append((user.discordname, max_coins_value, max_coins_display, best_tier_index))
-
-        # Sort by numeric coins, descending
-        per_user.sort(key=lambda x: x[1], reverse=True)
+        cache = await get_leaderboard_cache()
+        bounds = leaderboard_page(cache.size("coins"), page, 10)
+        if bounds is None:
+            await ctx.send(f"❌ Page {page} does not exist.")
+            return
+        start, pages = bounds
 
-        header = "Player | Tier | Highest Coins"
+        header = "Rank | Player | Tier | Highest Coins"
         lines = [header, "-" * len(header)]
-        for name, _, coins_str, tier_idx in per_user[:10]:
+        for rank, (name, tier_idx, coins_str) in enumerate(cache.coins(10, start), start):
             tier_label = f"T{tier_idx}" if tier_idx else "-"
-            lines.append(f"{name} | {tier_label} | {coins_str}")
+            lines.append(f"{rank} | {name} | {tier_label} | {coins_str}")
 
         leaderboard_text = "\n".join(lines)
-        await ctx.send(f"💰 Leadercoins (Top 10):\n```\n{leaderboard_text}```")
+        await ctx.send(f"💰 Leadercoins (Page {page}/{pages}):\n```\n{leaderboard_text}```")
     except Exception as e:
         await ctx.send(f"❌ Error retrieving leadercoins: {e}")
-    finally:
-        session.close()
 
-@bot.command(name="leaderwaves", help="Show each user's highest wave across all tiers (Top 10), with tier.")
-async def leaderwaves(ctx):
-    """Display the top 10 users by their single highest wave across any tier.
+@bot.command(name="leaderwaves", help="Show each user's highest wave across all tiers (10 per page), with tier. Usage: !leaderwaves [page]")
+async def leaderwaves(ctx, page: int = 1):
+    """Display users by their single highest wave across any tier, 10 per page.
 
-    - Parses each user's tier strings (T1..T18)
-    - Finds the maximum wave (numeric) per user
+    - Ranks on the highest waves held in the leaderboard cache
     - Displays the wave as an integer
-    - Sorted descending, top 10 rows
+    - Sorted descending; page 1 is the top 10
     """
-    session = get_db_session()
     try:
-        users = session.query(UserData).all()
-
-        per_user: list[tuple[str, int, int]] = []
-        for user in users:
-            max_wave_value = -1
-            best_tier_index = 0
-
-            for tier_index in range(1, 19):
-                tier_str = getattr(user, f"T{tier_index}")
-                if not tier_str:
-                    continue
-                wave_value, _ = parse_wave_coins(tier_str)
-                if wave_value > max_wave_value:
-                    max_wave_value = wave_value
-                    best_tier_index = tier_index
-
-            per_user.append((user.discordname, max_wave_value, best_tier_index))
-
-        # Sort by wave, descending
-        per_user.sort(key=lambda x: x[1], reverse=True)
+        cache = await get_leaderboard_cache()
+        bounds = leaderboard_page(cache.size("waves"), page, 10)
+        if bounds is None:
+            await ctx.send(f"❌ Page {page} does not exist.")
+            return
+        start, pages = bounds
 
-        header = "Player | Tier | Highest Wave"
+        header = "Rank | Player | Tier | Highest Wave"
         lines = [header, "-" * len(header)]
-        for name, wave, tier_idx in per_user[:10]:
+        for rank, (name, tier_idx, wave) in enumerate(cache.waves(10, start), start):
             tier_label = f"T{tier_idx}" if tier_idx else "-"
-            lines.append(f"{name} | {tier_label} | {wave}")
+            lines.append(f"{rank} | {name} | {tier_label} | {wave}")
 
         leaderboard_text = "\n".join(lines)
-        await ctx.send(f"🌊 Leaderwaves (Top 10):\n```\n{leaderboard_text}```")
+        await ctx.send(f"🌊 Leaderwaves (Page {page}/{pages}):\n```\n{leaderboard_text}```")
     except Exception as e:
         await ctx.send(f"❌ Error retrieving leaderwaves: {e}")
-    finally:
-        session.close()
 
-@bot.command(name="leadertier", help="Top 10 users for a specific tier, showing Waves and Coins.")
-async def leadertier(ctx, tier: str):
-    """Show the Top 10 users for a given tier with both waves and coins.
+@bot.command(name="leadertier", help="Users for a specific tier (10 per page), showing Waves and Coins. Usage: !leadertier t1 [page] or !leadertier all")
+async def leadertier(ctx, tier: str, page: int = 1):
+    """Show the users for a given tier with both waves and coins, 10 per page.
 
-    Usage: !leadertier t1  (or !leadertier 1)
-    Columns: Player | Waves | Coins | Tier
+    Usage: !leadertier t1  (or !leadertier 1, !leadertier t1 2 for page 2)
+           !leadertier all  (top 5 of every tier)
+    Columns: Rank | Player | Waves | Coins | Tier
     Sorted by Waves descending.
     """
+    if tier.lower() == "all":
+        await leadertier_all(ctx)
+        return
+
     # Parse tier argument as tN or N
     match = re.match(r"^t?(\d{1,2})$", tier.lower())
     if not match:
@@ -659,97 +707,89 @@ async def leadertier(ctx, tier: str):
         await ctx.send("❌ Tier number must be between 1 and 18.")
         return
 
-    session = get_db_session()
     try:
-        users = session.query(UserData).all()
-        results: list[tuple[str, int, str, int]] = []  # (name, wave, coins_display, tier)
-
-        for user in users:
-            tier_str = getattr(user, f"T{tier_num}")
-            if not tier_str:
-                continue
-            wave_value, _coins_numeric = parse_wave_coins(tier_str)
-            if wave_value <= 0:
-                continue
-            coins_match = re.search(r"Coins:\s*(\S+)", tier_str)
-            coins_display = coins_match.group(1) if coins_match else "0"
-            results.append((user.discordname, wave_value, coins_display, tier_num))
-
-        # Sort by waves desc, take top 10
-        results.sort(key=lambda r: r[1], reverse=True)
-        header = "Player | Waves | Coins | Tier"
-        lines = [header, "-" * len(header)]
-        for name, wave_value, coins_display, tier_idx in results[:10]:
-            lines.append(f"{name} | {wave_value} | {coins_display} | T{tier_idx}")
-
-        if len(lines) == 2:
+        cache = await get_leaderboard_cache()
+        total = cache.size(f"tier:{tier_num}")
+        if total == 0:
             await ctx.send(f"No data found for Tier {tier_num} yet.")
             return
+        bounds = leaderboard_page(total, page, 10)
+        if bounds is None:
+            await ctx.send(f"❌ Page {page} does not exist.")
+            return
+        start, pages = bounds
+
+        header = "Rank | Player | Waves | Coins | Tier"
+        lines = [header, "-" * len(header)]
+        for rank, (name, wave_value, coins_display) in enumerate(cache.tier(tier_num, 10, start), start):
+            lines.append(f"{rank} | {name} | {wave_value} | {coins_display} | T{tier_num}")
 
         leaderboard_text = "\n".join(lines)
-        await ctx.send(f"🏅 Leadertier (T{tier_num}) — Top 10:\n```\n{leaderboard_text}```")
+        await ctx.send(f"🏅 Leadertier (T{tier_num}) — Page {page}/{pages}:\n```\n{leaderboard_text}```")
     except Exception as e:
         await ctx.send(f"❌ Error retrieving tier leaderboard: {e}")
-    finally:
-        session.close()
 
-@bot.command(name="leader", help="Overall ranking by highest tier achieved, with that tier's waves/coins.")
-async def leader(ctx):
-    """Show each user's highest tier achieved and the wave/coins at that tier.
+async def leadertier_all(ctx, limit: int = 5):
+    """Send the top rows of every tier, packed into as few messages as Discord allows."""
+    try:
+        cache = await get_leaderboard_cache()
+
+        blocks = []
+        for tier_num, rows in cache.tiers(limit).items():
+            if not rows:
+                continue
+            lines = [f"T{tier_num}"]
+            for rank, (name, wave_value, coins_display) in enumerate(rows, 1):
+                lines.append(f"  {rank} | {name} | {wave_value} | {coins_display}")
+            blocks.append("\n".join(lines))
+
+        if not blocks:
+            await ctx.send("No tier data found yet.")
+            return
+
+        # Discord caps messages at 2000 characters
+        messages = [""]
+        for block in blocks:
+            if messages[-1] and len(messages[-1]) + len(block) > 1800:
+                messages.append("")
+            messages[-1] = f"{messages[-1]}\n{block}" if messages[-1] else block
+
+        await ctx.send(f"🏅 Leadertier — Top {limit} of every tier (Rank | Player | Waves | Coins):\n```\n{messages[0]}```")
+        for message in messages[1:]:
+            await ctx.send(f"```\n{message}```")
+    except Exception as e:
+        await ctx.send(f"❌ Error retrieving tier leaderboards: {e}")
+
+@bot.command(name="leader", help="Overall ranking by highest tier achieved, with that tier's waves/coins. Usage: !leader [page]")
+async def leader(ctx, page: int = 1):
+    """Show each user's highest tier achieved and the wave/coins at that tier, 25 per page.
 
     Ranking is by highest tier number (descending). If multiple users share the
     same highest tier, tie-break by that tier's wave (desc), then coins (desc).
-    Columns: Player | Tier | Waves | Coins
+    Columns: Rank | Player | Tier | Waves | Coins
     """
-    session = get_db_session()
     try:
-        users = session.query(UserData).all()
-        rows: list[tuple[str, int, int, float, str]] = []
-        # (name, best_tier_index, wave_value, coins_value_numeric, coins_display)
-
-        for user in users:
-            best_tier_index = 0
-            best_wave = -1
-            best_coins_numeric = -1.0
-            best_coins_display = "0"
-
-            # Find the highest tier that has any data
-            for tier_index in range(18, 0, -1):
-                tier_str = getattr(user, f"T{tier_index}")
-                if not tier_str:
-                    continue
-                wave_value, coins_value_numeric = parse_wave_coins(tier_str)
-                # Consider a tier as achieved if there's any non-zero data
-                if wave_value > 0 or coins_value_numeric > 0:
-                    best_tier_index = tier_index
-                    best_wave = wave_value
-                    best_coins_numeric = coins_value_numeric
-                    m = re.search(r"Coins:\s*(\S+)", tier_str)
-                    best_coins_display = m.group(1) if m else "0"
-                    break
-
-            rows.append((user.discordname, best_tier_index, best_wave, best_coins_numeric, best_coins_display))
-
-        # Sort by: highest tier desc, then wave desc, then coins desc
-        rows.sort(key=lambda r: (r[1], r[2], r[3]), reverse=True)
-
-        header = "Player | Tier | Waves | Coins"
+        # Sorted by: highest tier desc, then wave desc, then coins desc
+        cache = await get_leaderboard_cache()
+        bounds = leaderboard_page(cache.size("leader"), page, 25)
+        if bounds is None:
+            await ctx.send(f"❌ Page {page} does not exist.")
+            return
+        start, pages = bounds
+
+        header = "Rank | Player | Tier | Waves | Coins"
         lines = [header, "-" * len(header)]
-        for name, tier_idx, wave, _coins_num, coins_disp in rows[:25]:
-            tier_label = f"T{tier_idx}" if tier_idx else "-"
-            lines.append(f"{name} | {tier_label} | {wave if wave >= 0 else 0} | {coins_disp}")
+        for rank, (name, tier_idx, wave, coins_disp) in enumerate(cache.leader(25, start), start):
+            lines.append(f"{rank} | {name} | T{tier_idx} | {wave} | {coins_disp}")
 
         leaderboard_text = "\n".join(lines)
-        await ctx.send(f"🏆 Leader — Overall by Highest Tier:\n```\n{leaderboard_text}```")
+        await ctx.send(f"🏆 Leader — Overall by Highest Tier (Page {page}/{pages}):\n```\n{leaderboard_text}```")
     except Exception as e:
         await ctx.send(f"❌ Error retrieving leader: {e}")
-    finally:
-        session.close()
 
-@bot.command(name="leaderstats", help="Show top players for a specific stats category (e.g., !leaderstats waves).")
-async def leaderstats(ctx, category: str):
-    """Display the top 10 players for a specific stats category."""
-    session = get_db_session()
+@bot.command(name="leaderstats", help="Show top players for a specific stats category (e.g., !leaderstats waves [page]).")
+async def leaderstats(ctx, category: str, page: int = 1):
+    """Display the players for a specific stats category, 10 per page."""
     try:
         # Map category aliases to database column names
         category_map = {
@@ -804,63 +844,60 @@ async def leaderstats(ctx, category: str):
         db_column = category_map[category_lower]
         display_name = display_names[category_lower]
         
-        # Get the most recent stats for each user and sort by the specified category
-        # We need to use a subquery to get the latest stats per user
-        from sqlalchemy import func, desc
-        
-        # Subquery to get the latest timestamp for each user
-        latest_stats = session.query(
-            UserStats.discordid,
-            func.max(UserStats.timestamp).label('latest_timestamp')
-        ).group_by(UserStats.discordid).subquery()
-        
-        # Main query to get the latest stats for each user
-        results = session.query(
-            UserStats.discordname,
-            getattr(UserStats, db_column)
-        ).join(
-            latest_stats,
-            (UserStats.discordid == latest_stats.c.discordid) & 
-            (UserStats.timestamp == latest_stats.c.latest_timestamp)
-        ).filter(
-            getattr(UserStats, db_column).isnot(None),
-            getattr(UserStats, db_column) != ""
-        ).all()
-        
-        # Sort results by numeric value (handling suffixes like K, M, B, T)
-        def parse_stat_value(value_str):
-            """Parse a stat value string to numeric value for sorting."""
-            if not value_str:
-                return 0.0
-            return parse_numeric_value(value_str)
-        
-        # Sort by numeric value descending
-        results.sort(key=lambda x: parse_stat_value(x[1]), reverse=True)
-        results = results[:10]  # Take top 10 after sorting
-        
-        if not results:
+        # The cache holds each user's latest stats, ranked on the exact sort keys
+        cache = await get_leaderboard_cache()
+        total = cache.size(f"stats:{db_column}")
+        if total == 0:
             await ctx.send(f"❌ No data found for {display_name}")
             return
+        bounds = leaderboard_page(total, page, 10)
+        if bounds is None:
+            await ctx.send(f"❌ Page {page} does not exist.")
+            return
+        start, pages = bounds
+        results = cache.stats(db_column, 10, start)
             
         header = "Rank | Player | Value"
         lines = [header, "-" * len(header)]
-        for rank, (name, value) in enumerate(results, 1):
+        for rank, (name, value) in enumerate(results, start):
             lines.append(f"{rank} | {name} | {value}")
             
         leaderboard_text = "\n".join(lines)
-        await ctx.send(f"📊 Leaderstats {display_name} (Top 10):\n```\n{leaderboard_text}```")
+        await ctx.send(f"📊 Leaderstats {display_name} (Page {page}/{pages}):\n```\n{leaderboard_text}```")
         
     except Exception as e:
         await ctx.send(f"❌ Error retrieving leaderstats: {e}")
-    finally:
-        session.close()
+
+@bot.command(name="myrank", help="Show your rank and percentile on every leaderboard.")
+async def myrank(ctx):
+    """Display the caller's rank on every leaderboard they appear on.
+
+    Ranks come from the leaderboard cache's rank indexes (O(log n) per board).
+    Top % is the caller's rank as a share of everyone ranked on that board.
+    """
+    try:
+        cache = await get_leaderboard_cache()
+        ranks = cache.ranks(str(ctx.author.id))
+        if not ranks:
+            await ctx.send("❌ You are not on any leaderboard yet. Use !upload with a tier or stats screenshot.")
+            return
+
+        header = "Leaderboard | Rank | Top %"
+        lines = [header, "-" * len(header)]
+        for board, (rank, total) in ranks.items():
+            lines.append(f"{board_label(board)} | {rank}/{total} | {top_percent(rank, total)}%")
+
+        ranks_text = "\n".join(lines)
+        await ctx.send(f"🎯 Your Ranks:\n```\n{ranks_text}```")
+    except Exception as e:
+        await ctx.send(f"❌ Error retrieving your ranks: {e}")
 
 @bot.command(name="mystats", help="Show your most recent saved stats.")
 async def mystats(ctx):
     """Display the caller's most recently saved stats record in a compact list."""
     session = get_db_session()
     try:
-        stats = session.query(UserStats).filter(UserStats.discordid == str(ctx.author.id)).order_by(UserStats.timestamp.desc()).first()
+        stats = session.get(UserStatsLatest, str(ctx.author.id))
         if not stats:
             await ctx.send("❌ No stats found. Use !upload with a stats screenshot to save your stats.")
             return
@@ -909,14 +946,7 @@ async def mytiers(ctx):
         header = "Tier | Wave | Coins"
         lines = [header, "-" * len(header)]
         for i in range(1, 19):
-            t = getattr(user, f"T{i}")
-            if not t:
-                wave = 0
-                coins_disp = "0"
-            else:
-                wave, _coins_num = parse_wave_coins(t)
-                m = re.search(r"Coins:\s*(\S+)", t)
-                coins_disp = m.group(1) if m else "0"
+            wave, _, coins_disp = parse_tier_string(getattr(user, f"T{i}"))
             lines.append(f"T{i} | {wave} | {coins_disp}")
 
         block = "\n".join(lines)
@@ -59,7 +59,7 @@ class StatsCog(commands.Cog):
         
         try:
             # Process image with Gemini, force stats classification for this command
-            gemini_result = process_image(attachment.url, force_type="stats")
+            gemini_result = process_image(attachment.url, force_type="stats", discord_id=str(ctx.author.id))
             
             if not gemini_result["success"]:
                 await processing_msg.edit(content=f"❌ Failed to process image: {gemini_result.get('error', 'Unknown error')}")
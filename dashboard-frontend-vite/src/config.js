@@ -1,6 +1,11 @@
 // API Configuration
 export const API_BASE_URL = import.meta.env.VITE_API_URL || 'http://www.toweraus.com';
 
+// Leaderboards are fetched a page at a time; `after` and `generation` come from the last row already shown
+export const LEADERBOARD_PAGE_SIZE = 20;
+const page = (after = 0, generation = null) =>
+  `limit=${LEADERBOARD_PAGE_SIZE}&after=${after}` + (generation != null ? `&generation=${generation}` : '');
+
 // API Endpoints
 export const API_ENDPOINTS = {
   AUTH: {
@@ -14,13 +19,14 @@ export const API_ENDPOINTS = {
     REMOVE_BOT_ADMIN: `${API_BASE_URL}/api/admin/remove-bot-admin`,
   },
   LEADERBOARD: {
-    WAVE: `${API_BASE_URL}/api/leaderboard/wave`,
-    COINS: `${API_BASE_URL}/api/leaderboard/coins`,
-    TIER: (tier) => `${API_BASE_URL}/api/leaderboard/tier/${tier}`,
+    WAVE: (after, generation) => `${API_BASE_URL}/api/leaderboard/wave?${page(after, generation)}`,
+    COINS: (after, generation) => `${API_BASE_URL}/api/leaderboard/coins?${page(after, generation)}`,
+    TIER: (tier, after, generation) => `${API_BASE_URL}/api/leaderboard/tier/${tier}?${page(after, generation)}`,
+    TIERS: `${API_BASE_URL}/api/leaderboard/tiers?limit=${LEADERBOARD_PAGE_SIZE}`,
   },
   STATS: {
     OVERVIEW: `${API_BASE_URL}/api/stats/overview`,
-    LEADERBOARD: (field) => `${API_BASE_URL}/api/stats-leaderboard?field=${field}`,
+    LEADERBOARD: (field, after, generation) => `${API_BASE_URL}/api/stats-leaderboard?field=${field}&${page(after, generation)}`,
   },
   USER: {
     PROGRESS: (tier) => `${API_BASE_URL}/api/user/progress?tier=${tier}`,
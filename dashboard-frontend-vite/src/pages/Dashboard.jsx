@@ -1,8 +1,14 @@
 import React, { useState, useEffect } from 'react';
 import { LineChart, Line, XAxis, YAxis, CartesianGrid, Tooltip, ResponsiveContainer } from 'recharts';
-import { API_ENDPOINTS } from '../config';
+import { API_ENDPOINTS, LEADERBOARD_PAGE_SIZE } from '../config';
 import './Dashboard.css';
 
+// Must match SUFFIXES in dashboard_backend/number_codec.py (checked by test_number_codec.py)
+const NUMBER_SUFFIXES = [
+  ['ad', 1e45], ['ac', 1e42], ['ab', 1e39], ['aa', 1e36], ['D', 1e33], ['N', 1e30], ['O', 1e27],
+  ['S', 1e24], ['s', 1e21], ['Q', 1e18], ['q', 1e15], ['T', 1e12], ['B', 1e9], ['M', 1e6], ['K', 1e3],
+];
+
 export default function Dashboard() {
   const [userData, setUserData] = useState(null);
   const [allUsers, setAllUsers] = useState([]);
@@ -17,6 +23,8 @@ export default function Dashboard() {
   const [selectedTierForLeaderboard, setSelectedTierForLeaderboard] = useState(1);
   const [tierLeaderboard, setTierLeaderboard] = useState([]);
   const [tierLeaderboardLoading, setTierLeaderboardLoading] = useState(false);
+  // First page of every tier, fetched once in a single request
+  const [allTierLeaderboards, setAllTierLeaderboards] = useState(null);
   const [adminMessage, setAdminMessage] = useState('');
   const [progressData, setProgressData] = useState([]);
   const [selectedTier, setSelectedTier] = useState('t1');
@@ -47,6 +55,8 @@ export default function Dashboard() {
   const [statsLeaderboard, setStatsLeaderboard] = useState([]);
   const [selectedStatsField, setSelectedStatsField] = useState(NUMERIC_STATS_FIELDS[0].value);
   const [statsLeaderboardLoading, setStatsLeaderboardLoading] = useState(false);
+  // Whether the last page fetched for each leaderboard was full, i.e. more rows may follow
+  const [leaderboardHasMore, setLeaderboardHasMore] = useState({});
 
   useEffect(() => {
     fetchUserData();
@@ -84,6 +94,7 @@ export default function Dashboard() {
   };
 
   const fetchAllData = async () => {
+    setAllTierLeaderboards(null);
     try {
       // First, try to fetch bot admins to determine user permissions
       let isAdmin = false;
@@ -105,19 +116,21 @@ export default function Dashboard() {
 
       // Fetch leaderboard and stats data for all users
       const [waveRes, coinsRes, statsRes] = await Promise.all([
-        fetch(API_ENDPOINTS.LEADERBOARD.WAVE, { credentials: 'include' }),
-        fetch(API_ENDPOINTS.LEADERBOARD.COINS, { credentials: 'include' }),
+        fetch(API_ENDPOINTS.LEADERBOARD.WAVE(), { credentials: 'include' }),
+        fetch(API_ENDPOINTS.LEADERBOARD.COINS(), { credentials: 'include' }),
         fetch(API_ENDPOINTS.STATS.OVERVIEW, { credentials: 'include' })
       ]);
 
       if (waveRes.ok) {
         const waveData = await waveRes.json();
         setWaveLeaderboard(waveData);
+        setLeaderboardHasMore(prev => ({ ...prev, wave: waveData.length === LEADERBOARD_PAGE_SIZE }));
       }
 
       if (coinsRes.ok) {
         const coinsData = await coinsRes.json();
         setCoinsLeaderboard(coinsData);
+        setLeaderboardHasMore(prev => ({ ...prev, coins: coinsData.length === LEADERBOARD_PAGE_SIZE }));
       }
 
       if (statsRes.ok) {
@@ -161,27 +174,16 @@ export default function Dashboard() {
     }
   };
 
+  // Same rules as format_number in the backend: q = 1e15, Q = 1e18, and a value
+  // that would round to 1000 of one suffix gets the next one (999999 is "1.00M")
   const formatNumber = (num) => {
-    if (num >= 1e60) return (num / 1e60).toFixed(2) + 'ad';
-    if (num >= 1e57) return (num / 1e57).toFixed(2) + 'ac';
-    if (num >= 1e54) return (num / 1e54).toFixed(2) + 'ab';
-    if (num >= 1e51) return (num / 1e51).toFixed(2) + 'aa';
-    if (num >= 1e48) return (num / 1e48).toFixed(2) + 'D';
-    if (num >= 1e45) return (num / 1e45).toFixed(2) + 'N';
-    if (num >= 1e42) return (num / 1e42).toFixed(2) + 'O';
-    if (num >= 1e39) return (num / 1e39).toFixed(2) + 'S';
-    if (num >= 1e36) return (num / 1e36).toFixed(2) + 's';
-    if (num >= 1e33) return (num / 1e33).toFixed(2) + 'Q';
-    if (num >= 1e30) return (num / 1e30).toFixed(2) + 'q';
-    if (num >= 1e27) return (num / 1e27).toFixed(2) + 'T';
-    if (num >= 1e24) return (num / 1e24).toFixed(2) + 'B';
-    if (num >= 1e21) return (num / 1e21).toFixed(2) + 'M';
-    if (num >= 1e18) return (num / 1e18).toFixed(2) + 'K';
-    if (num >= 1e15) return (num / 1e15).toFixed(2) + 'Q';
-    if (num >= 1e12) return (num / 1e12).toFixed(2) + 'T';
-    if (num >= 1e9) return (num / 1e9).toFixed(2) + 'B';
-    if (num >= 1e6) return (num / 1e6).toFixed(2) + 'M';
-    if (num >= 1e3) return (num / 1e3).toFixed(2) + 'K';
+    for (let i = 0; i < NUMBER_SUFFIXES.length; i++) {
+      let [suffix, multiplier] = NUMBER_SUFFIXES[i];
+      if (num >= multiplier) {
+        if (i > 0 && Number((num / multiplier).toFixed(2)) >= 1000) [suffix, multiplier] = NUMBER_SUFFIXES[i - 1];
+        return (num / multiplier).toFixed(2) + suffix;
+      }
+    }
     return num.toString();
   };
 
@@ -268,14 +270,24 @@ export default function Dashboard() {
   };
 
   const fetchTierLeaderboard = async (tier) => {
+    const showTier = (tiers) => {
+      const data = tiers[tier] || [];
+      setTierLeaderboard(data);
+      setLeaderboardHasMore(prev => ({ ...prev, tier: data.length === LEADERBOARD_PAGE_SIZE }));
+    };
+    if (allTierLeaderboards) {
+      showTier(allTierLeaderboards);
+      return;
+    }
     setTierLeaderboardLoading(true);
     try {
-      const response = await fetch(API_ENDPOINTS.LEADERBOARD.TIER(tier), {
+      const response = await fetch(API_ENDPOINTS.LEADERBOARD.TIERS, {
         credentials: 'include'
       });
       if (response.ok) {
-        const data = await response.json();
-        setTierLeaderboard(data);
+        const tiers = await response.json();
+        setAllTierLeaderboards(tiers);
+        showTier(tiers);
       }
     } catch (error) {
       console.error('Error fetching tier leaderboard:', error);
@@ -291,6 +303,7 @@ export default function Dashboard() {
       if (response.ok) {
         const data = await response.json();
         setStatsLeaderboard(data);
+        setLeaderboardHasMore(prev => ({ ...prev, stats: data.length === LEADERBOARD_PAGE_SIZE }));
       }
     } catch (error) {
       setStatsLeaderboard([]);
@@ -299,6 +312,34 @@ export default function Dashboard() {
     }
   };
 
+  // Fetch the next page of the visible leaderboard, continuing after its last rank
+  // in the same snapshot generation; if that generation expired (410), start over
+  const loadMoreLeaderboard = async () => {
+    const boards = {
+      wave: [waveLeaderboard, setWaveLeaderboard, (after, generation) => API_ENDPOINTS.LEADERBOARD.WAVE(after, generation)],
+      coins: [coinsLeaderboard, setCoinsLeaderboard, (after, generation) => API_ENDPOINTS.LEADERBOARD.COINS(after, generation)],
+      tier: [tierLeaderboard, setTierLeaderboard, (after, generation) => API_ENDPOINTS.LEADERBOARD.TIER(selectedTierForLeaderboard, after, generation)],
+      stats: [statsLeaderboard, setStatsLeaderboard, (after, generation) => API_ENDPOINTS.STATS.LEADERBOARD(selectedStatsField, after, generation)],
+    };
+    const [rows, setRows, url] = boards[leaderboardType];
+    const last = rows.length > 0 ? rows[rows.length - 1] : null;
+    try {
+      let response = await fetch(url(last ? last.rank : 0, last ? last.generation : null), { credentials: 'include' });
+      let restarted = false;
+      if (response.status === 410) {
+        response = await fetch(url(0, null), { credentials: 'include' });
+        restarted = true;
+      }
+      if (response.ok) {
+        const data = await response.json();
+        setRows(prev => (restarted ? data : [...prev, ...data]));
+        setLeaderboardHasMore(prev => ({ ...prev, [leaderboardType]: data.length === LEADERBOARD_PAGE_SIZE }));
+      }
+    } catch (error) {
+      console.error('Error fetching more leaderboard rows:', error);
+    }
+  };
+
   useEffect(() => {
     if (activeTab === 'progress') {
       fetchProgressData(selectedTier);
@@ -504,7 +545,7 @@ export default function Dashboard() {
                   </div>
                   {waveLeaderboard.map((entry, index) => (
                     <div key={index} className="table-row">
-                      <span className="rank">#{index + 1}</span>
+                      <span className="rank">#{entry.rank}</span>
                       <span className="player">{entry.username}</span>
                       <span className="wave">{entry.max_wave}</span>
                       <span className="tier">{entry.tier}</span>
@@ -523,7 +564,7 @@ export default function Dashboard() {
                   </div>
                   {coinsLeaderboard.map((entry, index) => (
                     <div key={index} className="table-row">
-                      <span className="rank">#{index + 1}</span>
+                      <span className="rank">#{entry.rank}</span>
                       <span className="player">{entry.username}</span>
                       <span className="coins">{formatNumber(entry.max_coins)}</span>
                       <span className="tier">{entry.tier}</span>
@@ -545,7 +586,7 @@ export default function Dashboard() {
                   ) : tierLeaderboard.length > 0 ? (
                     tierLeaderboard.map((entry, index) => (
                       <div key={index} className="table-row">
-                        <span className="rank">#{index + 1}</span>
+                        <span className="rank">#{entry.rank}</span>
                         <span className="player">{entry.username}</span>
                         <span className="wave">{entry.wave}</span>
                         <span className="coins">{entry.coins_formatted}</span>
@@ -568,7 +609,7 @@ export default function Dashboard() {
                   ) : statsLeaderboard.length > 0 ? (
                     statsLeaderboard.map((entry, index) => (
                       <div key={index} className="table-row">
-                        <span className="rank">#{index + 1}</span>
+                        <span className="rank">#{entry.rank}</span>
                         <span className="player">{entry.username}</span>
                         <span className="wave">{formatNumber(entry.value)}</span>
                       </div>
@@ -578,6 +619,11 @@ export default function Dashboard() {
                   )}
                 </div>
               )}
+              {leaderboardHasMore[leaderboardType] && (
+                <button className="view-btn load-more-btn" onClick={loadMoreLeaderboard}>
+                  Load more
+                </button>
+              )}
             </div>
           </div>
         )}
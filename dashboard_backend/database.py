@@ -1,7 +1,26 @@
+"""
+Shared database engine for the bot, the Gemini parser, the dashboard and the scripts.
+
+Every module in a process uses the one engine created here, so each process
+holds a single connection pool. Pool sizing comes from the environment and can
+be set per process role (DB_PROCESS_ROLE, e.g. BOT or DASHBOARD):
+
+    DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE   defaults
+    DB_POOL_SIZE_<ROLE>, DB_MAX_OVERFLOW_<ROLE>, ...                  per-role overrides
+
+A process can use at most pool_size + max_overflow connections; the sum over
+all processes must stay below Postgres max_connections. get_pool_metrics()
+reports checkout wait time, overflow usage and connection churn to size this.
+"""
+
 import os
-from sqlalchemy import create_engine
+import threading
+import time
+from collections import deque
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy.engine.url import URL
+from sqlalchemy.pool import QueuePool
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -16,26 +35,145 @@ DATABASE_URL = (
     f"postgresql+psycopg2://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}"
 )
 
-engine = create_engine(
-    DATABASE_URL,
-    echo=False,
-    future=True,
-    pool_pre_ping=True,           # validate connection before using
-    pool_recycle=1800,            # recycle connections every 30m
-    pool_size=5,                  # tune pool sizes
-    max_overflow=10,              # allow extra connections when pool is full
-    connect_args={                # TCP keepalives for psycopg2
-        "keepalives": 1,
-        "keepalives_idle": 30,
-        "keepalives_interval": 10,
-        "keepalives_count": 5,
-    },
-)
+DB_PROCESS_ROLE = os.getenv("DB_PROCESS_ROLE", "").upper()
+
+POOL_DEFAULTS = {
+    "pool_size": 5,
+    "max_overflow": 10,
+    "pool_timeout": 30,
+    "pool_recycle": 1800,      # recycle connections every 30m
+}
+
+def pool_setting(name: str, role: str = DB_PROCESS_ROLE) -> int:
+    """Read DB_<NAME>_<ROLE>, then DB_<NAME>, then the built-in default"""
+    env_name = f"DB_{name.upper()}"
+    value = os.getenv(f"{env_name}_{role}") if role else None
+    if value is None:
+        value = os.getenv(env_name)
+    return int(value) if value is not None else POOL_DEFAULTS[name]
+
+class PoolMetrics:
+    """Thread-safe counters for one connection pool"""
+
+    def __init__(self, sample_size: int = 1000):
+        self._lock = threading.Lock()
+        self._waits = deque(maxlen=sample_size)
+        self.checkouts = 0
+        self.max_wait = 0.0
+        self.peak_overflow = 0
+        self.peak_checked_out = 0
+        self.connections_opened = 0
+        self.connections_closed = 0
+        self.connections_invalidated = 0
+        self.timeouts = 0
+        self.connect_errors = 0
+
+    def record_checkout(self, wait: float, checked_out: int, overflow: int):
+        with self._lock:
+            self.checkouts += 1
+            self._waits.append(wait)
+            self.max_wait = max(self.max_wait, wait)
+            self.peak_checked_out = max(self.peak_checked_out, checked_out)
+            self.peak_overflow = max(self.peak_overflow, overflow)
+
+    def increment(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            waits = sorted(self._waits)
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "connect_errors": self.connect_errors,
+                "wait_ms_avg": round(sum(waits) / len(waits) * 1000, 3) if waits else 0.0,
+                "wait_ms_p95": round(waits[min(len(waits) - 1, int(len(waits) * 0.95))] * 1000, 3) if waits else 0.0,
+                "wait_ms_max": round(self.max_wait * 1000, 3),
+                "peak_checked_out": self.peak_checked_out,
+                "peak_overflow": self.peak_overflow,
+                "connections_opened": self.connections_opened,
+                "connections_closed": self.connections_closed,
+                "connections_invalidated": self.connections_invalidated,
+            }
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that times every checkout, including waits for a free connection"""
+
+    metrics = None
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            # No connection became free within pool_timeout
+            self.metrics.increment("timeouts")
+            raise
+        except Exception:
+            # Opening a new connection failed (refused, auth, DNS, ...)
+            self.metrics.increment("connect_errors")
+            raise
+        # overflow() counts up from -pool_size; positive means extra connections are open
+        self.metrics.record_checkout(time.perf_counter() - start, self.checkedout(), max(self.overflow(), 0))
+        return connection
+
+def create_db_engine(role: str = DB_PROCESS_ROLE, **overrides):
+    """Create an engine with role-based pool sizing and pool metrics attached.
+
+    Processes should use the module-level engine; this is for tools that need
+    a differently sized pool.
+    """
+    metrics = PoolMetrics()
+    # Per-engine subclass so the metrics survive pool.recreate() after dispose()
+    pool_class = type("InstrumentedQueuePool", (InstrumentedQueuePool,), {"metrics": metrics})
+    options = {name: pool_setting(name, role) for name in POOL_DEFAULTS}
+    options.update(overrides)
+
+    db_engine = create_engine(
+        DATABASE_URL,
+        echo=False,
+        future=True,
+        poolclass=pool_class,
+        pool_pre_ping=True,           # validate connection before using
+        connect_args={                # TCP keepalives for psycopg2
+            "keepalives": 1,
+            "keepalives_idle": 30,
+            "keepalives_interval": 10,
+            "keepalives_count": 5,
+        },
+        **options,
+    )
+    db_engine.pool_metrics = metrics
+    db_engine.pool_options = options
+
+    # Connection churn: new DBAPI connections, closes and invalidations
+    event.listen(db_engine, "connect", lambda *args: metrics.increment("connections_opened"))
+    event.listen(db_engine, "close", lambda *args: metrics.increment("connections_closed"))
+    event.listen(db_engine, "close_detached", lambda *args: metrics.increment("connections_closed"))
+    event.listen(db_engine, "invalidate", lambda *args: metrics.increment("connections_invalidated"))
+    return db_engine
+
+engine = create_db_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+def get_pool_metrics(db_engine=None) -> dict:
+    """Current pool state and cumulative metrics for this process's engine"""
+    db_engine = db_engine or engine
+    pool = db_engine.pool
+    return {
+        "role": DB_PROCESS_ROLE or "default",
+        "pool_size": pool.size(),
+        "max_overflow": db_engine.pool_options["max_overflow"],
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        **db_engine.pool_metrics.snapshot(),
+    }
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
@@ -0,0 +1,253 @@
+"""
+Partition maintenance and retention policy for the tier history tables.
+
+user_data_history (legacy full snapshots) and user_tier_history (per-tier
+deltas) are range-partitioned by month on their timestamp. This module
+creates upcoming monthly partitions, downsamples old rows and drops partitions
+that fall outside the retention window. Before user_tier_history partitions are
+dropped, each (user, tier) series' last expiring delta is copied to the start
+of the retention window, because a delta stays a tier's current value until
+the tier improves again.
+
+Policy (environment variables):
+    HISTORY_FULL_RETENTION_DAYS   keep every row this many days (default 90)
+    HISTORY_DOWNSAMPLE_INTERVAL   after that keep one row per user (and tier,
+                                  for deltas) per day/week/month (default week)
+    HISTORY_MAX_RETENTION_MONTHS  drop whole partitions older than this many
+                                  months, 0 keeps them forever (default 0)
+    HISTORY_PARTITIONS_AHEAD      months of empty partitions to keep ready (default 3)
+
+Run directly (python3 -m dashboard_backend.history_retention) to apply the policy once.
+"""
+
+import os
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import text
+
+HISTORY_TABLE = "user_data_history"
+TIER_HISTORY_TABLE = "user_tier_history"
+
+# Partitioned history tables and the columns identifying one series when downsampling
+HISTORY_TABLES = {
+    "user_data_history": ("discordid",),
+    "user_tier_history": ("discordid", "tier"),
+}
+
+HISTORY_FULL_RETENTION_DAYS = int(os.getenv("HISTORY_FULL_RETENTION_DAYS", "90"))
+HISTORY_DOWNSAMPLE_INTERVAL = os.getenv("HISTORY_DOWNSAMPLE_INTERVAL", "week")
+HISTORY_MAX_RETENTION_MONTHS = int(os.getenv("HISTORY_MAX_RETENTION_MONTHS", "0"))
+HISTORY_PARTITIONS_AHEAD = int(os.getenv("HISTORY_PARTITIONS_AHEAD", "3"))
+
+DOWNSAMPLE_INTERVALS = ("day", "week", "month")
+
+def month_start(dt: datetime) -> datetime:
+    """Return midnight UTC on the first day of dt's month"""
+    return datetime(dt.year, dt.month, 1, tzinfo=timezone.utc)
+
+def add_months(dt: datetime, months: int) -> datetime:
+    """Shift a month start by a number of months"""
+    month_index = dt.year * 12 + dt.month - 1 + months
+    return datetime(month_index // 12, month_index % 12 + 1, 1, tzinfo=timezone.utc)
+
+def partition_name(month: datetime, table: str = HISTORY_TABLE) -> str:
+    return f"{table}_p{month:%Y%m}"
+
+def is_partitioned(conn, table: str = HISTORY_TABLE) -> bool:
+    """True if the table exists and is a partitioned parent table"""
+    result = conn.execute(
+        text("SELECT relkind FROM pg_class WHERE relname = :table AND relnamespace = 'public'::regnamespace;"),
+        {"table": table}
+    )
+    return result.scalar() == "p"
+
+def list_month_partitions(conn, table: str = HISTORY_TABLE) -> dict:
+    """Return {month_start: partition_name} for the monthly partitions of a table"""
+    result = conn.execute(text("""
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE parent.relname = :table;
+    """), {"table": table})
+
+    partitions = {}
+    prefix = f"{table}_p"
+    for (name,) in result:
+        suffix = name[len(prefix):]
+        if name.startswith(prefix) and len(suffix) == 6 and suffix.isdigit():
+            month = datetime(int(suffix[:4]), int(suffix[4:]), 1, tzinfo=timezone.utc)
+            partitions[month] = name
+    return partitions
+
+def ensure_default_partition(conn, table: str = HISTORY_TABLE):
+    """Create the catch-all partition so inserts never fail for a missing month"""
+    conn.execute(text(f'CREATE TABLE IF NOT EXISTS "{table}_default" PARTITION OF "{table}" DEFAULT;'))
+
+def create_month_partition(conn, month: datetime, table: str = HISTORY_TABLE):
+    """Create and attach the partition for one month.
+
+    Rows for that month that already landed in the default partition are
+    moved into the new partition before it is attached.
+    """
+    name = partition_name(month, table)
+    lower, upper = month, add_months(month, 1)
+
+    conn.execute(text(f'CREATE TABLE "{name}" (LIKE "{table}" INCLUDING DEFAULTS);'))
+    conn.execute(text(f"""
+        WITH moved AS (
+            DELETE FROM "{table}_default"
+            WHERE "timestamp" >= :lower AND "timestamp" < :upper
+            RETURNING *
+        )
+        INSERT INTO "{name}" SELECT * FROM moved;
+    """), {"lower": lower, "upper": upper})
+    conn.execute(text(
+        f'ALTER TABLE "{table}" ATTACH PARTITION "{name}" '
+        f"FOR VALUES FROM ('{lower.isoformat()}') TO ('{upper.isoformat()}');"
+    ))
+
+def ensure_history_partitions(conn, start: datetime = None, months_ahead: int = HISTORY_PARTITIONS_AHEAD,
+                              table: str = HISTORY_TABLE) -> list:
+    """Make sure monthly partitions exist from start (default: this month) through months_ahead.
+
+    Returns the names of the partitions that were created.
+    """
+    now = datetime.now(timezone.utc)
+    first = month_start(start or now)
+    last = add_months(month_start(now), months_ahead)
+
+    ensure_default_partition(conn, table)
+    existing = list_month_partitions(conn, table)
+
+    created = []
+    month = first
+    while month <= last:
+        if month not in existing:
+            create_month_partition(conn, month, table)
+            created.append(partition_name(month, table))
+        month = add_months(month, 1)
+    return created
+
+def downsample_history(conn, now: datetime = None, table: str = HISTORY_TABLE,
+                       full_retention_days: int = HISTORY_FULL_RETENTION_DAYS,
+                       interval: str = HISTORY_DOWNSAMPLE_INTERVAL) -> int:
+    """Keep only the latest row per series per interval for rows older than the full-retention window.
+
+    A series is a user for snapshots, or a user and tier for deltas; keeping
+    the last delta of each interval still replays to the same end state.
+    Returns the number of rows deleted.
+    """
+    if interval not in DOWNSAMPLE_INTERVALS:
+        raise ValueError(f"HISTORY_DOWNSAMPLE_INTERVAL must be one of {', '.join(DOWNSAMPLE_INTERVALS)}")
+
+    cutoff = (now or datetime.now(timezone.utc)) - timedelta(days=full_retention_days)
+    # The timestamp bound lets Postgres prune to the partitions older than the cutoff
+    result = conn.execute(text(f"""
+        DELETE FROM "{table}"
+        WHERE "timestamp" < :cutoff
+          AND (id, "timestamp") IN (
+            SELECT id, "timestamp" FROM (
+                SELECT id, "timestamp", row_number() OVER (
+                    PARTITION BY {", ".join(HISTORY_TABLES.get(table, ("discordid",)))},
+                                 date_trunc('{interval}', "timestamp")
+                    ORDER BY "timestamp" DESC, id DESC
+                ) AS position
+                FROM "{table}"
+                WHERE "timestamp" < :cutoff
+            ) ranked
+            WHERE position > 1
+          );
+    """), {"cutoff": cutoff})
+    return result.rowcount
+
+def checkpoint_tier_history(conn, at: datetime) -> int:
+    """Copy each (user, tier) series' latest delta before `at` to a row stamped `at`.
+
+    Replaying the kept rows then still starts every tier from its value at `at`.
+    Returns the number of checkpoint rows written.
+    """
+    result = conn.execute(text(f"""
+        INSERT INTO "{TIER_HISTORY_TABLE}" (discordid, tier, wave, coins_value, coins_display, "timestamp")
+        SELECT DISTINCT ON (discordid, tier) discordid, tier, wave, coins_value, coins_display, :at
+        FROM "{TIER_HISTORY_TABLE}" expiring
+        WHERE "timestamp" < :at
+          AND NOT EXISTS (
+            SELECT 1 FROM "{TIER_HISTORY_TABLE}" kept
+            WHERE kept.discordid = expiring.discordid AND kept.tier = expiring.tier AND kept."timestamp" = :at
+          )
+        ORDER BY discordid, tier, "timestamp" DESC, id DESC;
+    """), {"at": at})
+    return result.rowcount
+
+def drop_expired_partitions(conn, now: datetime = None, table: str = HISTORY_TABLE,
+                            max_retention_months: int = HISTORY_MAX_RETENTION_MONTHS) -> list:
+    """Detach and drop monthly partitions that end before the retention window.
+
+    Tier history is checkpointed first (see checkpoint_tier_history).
+    Returns the names of the dropped partitions. Does nothing when retention is 0 (keep forever).
+    """
+    if max_retention_months <= 0:
+        return []
+
+    oldest_kept = add_months(month_start(now or datetime.now(timezone.utc)), -max_retention_months)
+    expired = [(month, name) for month, name in sorted(list_month_partitions(conn, table).items()) if month < oldest_kept]
+    if expired and table == TIER_HISTORY_TABLE:
+        checkpoint_tier_history(conn, oldest_kept)
+
+    dropped = []
+    for month, name in expired:
+        conn.execute(text(f'ALTER TABLE "{table}" DETACH PARTITION "{name}";'))
+        conn.execute(text(f'DROP TABLE "{name}";'))
+        dropped.append(name)
+    return dropped
+
+def apply_history_retention(engine) -> dict:
+    """Run partition maintenance and the retention policy, one transaction per history table"""
+    summary = {"created": [], "downsampled": 0, "dropped": []}
+    for table in HISTORY_TABLES:
+        with engine.begin() as conn:
+            if not is_partitioned(conn, table):
+                continue
+            summary["created"] += ensure_history_partitions(conn, table=table)
+            summary["downsampled"] += downsample_history(conn, table=table)
+            summary["dropped"] += drop_expired_partitions(conn, table=table)
+    return summary
+
+def convert_history_to_partitioned(conn, table: str = HISTORY_TABLE):
+    """Rebuild a plain history table as a monthly range-partitioned table, keeping all rows.
+
+    Runs inside the caller's transaction; history writes wait until it commits.
+    """
+    if is_partitioned(conn, table):
+        return
+
+    legacy = f"{table}_legacy"
+    conn.execute(text(f'ALTER TABLE "{table}" RENAME TO "{legacy}";'))
+    conn.execute(text(f'ALTER INDEX IF EXISTS "{table}_pkey" RENAME TO "{legacy}_pkey";'))
+    conn.execute(text(
+        f'ALTER INDEX IF EXISTS "ix_{table}_discordid_timestamp" RENAME TO "ix_{legacy}_discordid_timestamp";'
+    ))
+
+    # Same columns and id sequence default; the primary key must include the partition key
+    conn.execute(text(f"""
+        CREATE TABLE "{table}" (LIKE "{legacy}" INCLUDING DEFAULTS)
+        PARTITION BY RANGE ("timestamp");
+    """))
+    conn.execute(text(f'UPDATE "{legacy}" SET "timestamp" = NOW() WHERE "timestamp" IS NULL;'))
+    conn.execute(text(f'ALTER TABLE "{table}" ADD PRIMARY KEY (id, "timestamp");'))
+    conn.execute(text(f'CREATE INDEX "ix_{table}_discordid_timestamp" ON "{table}" (discordid, "timestamp");'))
+    conn.execute(text(f'ALTER SEQUENCE IF EXISTS "{table}_id_seq" OWNED BY "{table}".id;'))
+
+    oldest = conn.execute(text(f'SELECT MIN("timestamp") FROM "{legacy}";')).scalar()
+    ensure_history_partitions(conn, start=oldest, table=table)
+
+    conn.execute(text(f'INSERT INTO "{table}" SELECT * FROM "{legacy}";'))
+    conn.execute(text(f'DROP TABLE "{legacy}";'))
+
+if __name__ == "__main__":
+    from dashboard_backend.database import engine
+
+    summary = apply_history_retention(engine)
+    print(f"✅ Partitions created: {', '.join(summary['created']) or 'none'}")
+    print(f"✅ Rows downsampled: {summary['downsampled']}")
+    print(f"✅ Partitions dropped: {', '.join(summary['dropped']) or 'none'}")
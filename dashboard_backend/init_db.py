@@ -2,91 +2,211 @@
 """
 Database initialization script for TowerScoreBoardBot
 This script creates all necessary tables and handles schema migrations.
+Run with --check to only report missing or invalid indexes.
 """
 
-import os
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker
-from dotenv import load_dotenv
-from models import Base, UserData, UserDataHistory, BotAdmin, UserStats
+import re
+import sys
+from sqlalchemy import inspect, text
+from sqlalchemy.schema import CreateIndex
+from database import engine
+from models import Base, UserData, UserDataHistory, BotAdmin, UserStats, NUMERIC_STATS_FIELDS
+from history_retention import HISTORY_TABLES, convert_history_to_partitioned, ensure_history_partitions
 
-# Load environment variables
-load_dotenv()
+def add_missing_columns(conn):
+    """Add model columns that are missing from existing tables"""
+    inspector = inspect(conn)
+    preparer = conn.dialect.identifier_preparer
+    
+    for table in Base.metadata.sorted_tables:
+        existing_columns = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing_columns:
+                continue
+            
+            print(f"📅 Adding {column.name} column to {table.name} table...")
+            column_type = column.type.compile(dialect=conn.dialect)
+            default = ""
+            if column.server_default is not None:
+                default = f" DEFAULT {column.server_default.arg.compile(dialect=conn.dialect)}"
+            conn.execute(text(
+                f"ALTER TABLE {preparer.format_table(table)} "
+                f"ADD COLUMN IF NOT EXISTS {preparer.format_column(column)} {column_type}{default};"
+            ))
+            conn.commit()
+            print(f"✅ {column.name} column added successfully")
+
+# Versioned schema migrations, applied once each in order and recorded in
+# schema_migrations. SQL steps run on an autocommit connection so index builds
+# can use CREATE INDEX CONCURRENTLY and live tables keep accepting reads and
+# writes; callable steps run in their own transaction.
+MIGRATIONS = [
+    (1, "Index user_stats and user_data_history by user and time", [
+        'CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_user_stats_discordid_timestamp '
+        'ON user_stats (discordid, "timestamp")',
+        'CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_user_data_history_discordid_timestamp '
+        'ON user_data_history (discordid, "timestamp")',
+    ]),
+    (2, "Partition user_data_history by month", [
+        convert_history_to_partitioned,
+    ]),
+    # The replacement *_key indexes are built by create_missing_indexes
+    (3, "Drop float coin/stat ranking indexes superseded by sortable keys", [
+        'DROP INDEX CONCURRENTLY IF EXISTS ix_user_data_highest_tier',
+        'DROP INDEX CONCURRENTLY IF EXISTS ix_user_data_max_coins',
+        'DROP INDEX CONCURRENTLY IF EXISTS ix_user_tier_best_rank',
+        *(f'DROP INDEX CONCURRENTLY IF EXISTS ix_user_stats_latest_{field}_value' for field in NUMERIC_STATS_FIELDS),
+    ]),
+    # The first numeric ranking design kept T{i}_wave/T{i}_coins on user_data; the
+    # user_tier_best table replaced them for tier leaderboards, leaving them write-only
+    (4, "Drop per-tier wave/coins shadow columns of user_data", [
+        *(f'DROP INDEX CONCURRENTLY IF EXISTS ix_user_data_t{i}_wave_coins' for i in range(1, 19)),
+        *(f'ALTER TABLE user_data DROP COLUMN IF EXISTS "T{i}_wave", DROP COLUMN IF EXISTS "T{i}_coins"'
+          for i in range(1, 19)),
+    ]),
+    # Stats boards rank user_stats_latest.*_key; these only slowed history inserts
+    (5, "Drop per-stat value indexes of the user_stats history table", [
+        *(f'DROP INDEX CONCURRENTLY IF EXISTS ix_user_stats_{field}_value' for field in NUMERIC_STATS_FIELDS),
+    ]),
+]
+
+def get_existing_indexes(conn):
+    """Return {index_name: is_valid} for every index in the public schema"""
+    result = conn.execute(text("""
+        SELECT c.relname, i.indisvalid
+        FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE n.nspname = 'public';
+    """))
+    return {name: is_valid for name, is_valid in result}
+
+def drop_invalid_indexes(conn):
+    """Drop indexes left INVALID by an interrupted concurrent build so they can be rebuilt"""
+    for name, is_valid in get_existing_indexes(conn).items():
+        if not is_valid:
+            print(f"🧹 Dropping invalid index {name}...")
+            conn.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS "{name}";'))
 
-# Database connection
-POSTGRES_USER = os.getenv("POSTGRES_USER", "toweruser")
-POSTGRES_PASSWORD = os.getenv("POSTGRES_PASSWORD", "yourpassword")
-POSTGRES_DB = os.getenv("POSTGRES_DB", "towerscoreboard")
-POSTGRES_HOST = os.getenv("POSTGRES_HOST", "localhost")
-POSTGRES_PORT = os.getenv("POSTGRES_PORT", "5432")
+def run_migrations(engine, conn, baseline=False):
+    """Apply pending versioned migrations; conn is an autocommit connection.
+
+    With baseline=True (a database just created from the models) pending
+    migrations are only recorded, since the schema already matches them.
+    """
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name VARCHAR NOT NULL,
+            applied_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+        );
+    """))
+    applied = {row[0] for row in conn.execute(text("SELECT version FROM schema_migrations;"))}
+    
+    pending = [migration for migration in MIGRATIONS if migration[0] not in applied]
+    if not pending:
+        print("✅ Schema migrations are up to date")
+        return
+    
+    for version, name, steps in pending:
+        if baseline:
+            conn.execute(
+                text("INSERT INTO schema_migrations (version, name) VALUES (:version, :name);"),
+                {"version": version, "name": name}
+            )
+            print(f"✅ Migration {version} recorded (new database)")
+            continue
+        
+        print(f"🔧 Applying migration {version}: {name}...")
+        for step in steps:
+            if callable(step):
+                with engine.begin() as tx_conn:
+                    step(tx_conn)
+            else:
+                conn.execute(text(step))
+        conn.execute(
+            text("INSERT INTO schema_migrations (version, name) VALUES (:version, :name);"),
+            {"version": version, "name": name}
+        )
+        print(f"✅ Migration {version} applied")
 
-DATABASE_URL = (
-    f"postgresql+psycopg2://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}"
-)
+def create_missing_indexes(conn):
+    """Concurrently create indexes declared on the models that do not exist yet"""
+    existing = get_existing_indexes(conn)
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            if index.name in existing:
+                continue
+            print(f"📇 Creating index {index.name}...")
+            # Partitioned parents do not support CONCURRENTLY
+            index.dialect_options["postgresql"]["concurrently"] = "postgresql_partition_by" not in table.kwargs
+            conn.execute(CreateIndex(index, if_not_exists=True))
+    print("✅ Indexes are in place")
+
+def expected_indexes():
+    """Index names the application relies on: model indexes, primary keys and migration indexes"""
+    names = set()
+    for table in Base.metadata.sorted_tables:
+        names.update(index.name for index in table.indexes)
+        names.add(f"{table.name}_pkey")
+    for _version, _name, steps in MIGRATIONS:
+        for step in steps:
+            if callable(step):
+                continue
+            match = re.search(r"IF NOT EXISTS (\w+)", step)
+            if match:
+                names.add(match.group(1))
+    return names
+
+def check_indexes(conn):
+    """Report expected indexes that are missing or invalid. Returns the list of problems."""
+    existing = get_existing_indexes(conn)
+    problems = []
+    for name in sorted(expected_indexes()):
+        if name not in existing:
+            problems.append(f"missing index {name}")
+        elif not existing[name]:
+            problems.append(f"invalid index {name}")
+    
+    if problems:
+        print(f"⚠️  Index check found {len(problems)} problem(s):")
+        for problem in problems:
+            print(f"  - {problem}")
+    else:
+        print("✅ Index check passed: all expected indexes exist")
+    return problems
 
 def init_database():
     """Initialize the database with all tables"""
     print("🔧 Initializing database...")
     
-    # Create engine
-    engine = create_engine(
-    DATABASE_URL,
-    echo=False,
-    future=True,
-    pool_pre_ping=True,           # validate connection before using
-    pool_recycle=1800,            # recycle connections every 30m
-    pool_size=5,                  # tune pool sizes
-    max_overflow=10,              # allow extra connections when pool is full
-    connect_args={                # TCP keepalives for psycopg2
-        "keepalives": 1,
-        "keepalives_idle": 30,
-        "keepalives_interval": 10,
-        "keepalives_count": 5,
-    },
-)
-    
     try:
-        # Check if user_data table exists and has date column
         with engine.connect() as conn:
-            # Check if user_data table exists
-            result = conn.execute(text("""
-                SELECT EXISTS (
-                    SELECT FROM information_schema.tables 
-                    WHERE table_schema = 'public' 
-                    AND table_name = 'user_data'
-                );
-            """))
-            table_exists = result.scalar()
+            # A database without user_data is new and gets the current schema directly
+            new_database = not inspect(conn).has_table("user_data")
             
-            if table_exists:
-                print("✅ user_data table exists")
-                
-                # Check if date column exists
-                result = conn.execute(text("""
-                    SELECT EXISTS (
-                        SELECT FROM information_schema.columns 
-                        WHERE table_schema = 'public' 
-                        AND table_name = 'user_data' 
-                        AND column_name = 'date'
-                    );
-                """))
-                date_column_exists = result.scalar()
-                
-                if not date_column_exists:
-                    print("📅 Adding date column to user_data table...")
-                    conn.execute(text("""
-                        ALTER TABLE user_data 
-                        ADD COLUMN date TIMESTAMP WITH TIME ZONE DEFAULT NOW();
-                    """))
-                    conn.commit()
-                    print("✅ date column added successfully")
-                else:
-                    print("✅ date column already exists")
-            else:
-                print("📋 Creating all tables...")
-                # Create all tables
-                Base.metadata.create_all(bind=engine)
-                print("✅ All tables created successfully")
+            # Create any tables that do not exist yet (existing tables are left alone)
+            print("📋 Creating missing tables...")
+            Base.metadata.create_all(bind=conn)
+            conn.commit()
+            print("✅ Tables are in place")
+            
+            # Bring existing tables up to date with columns added to the models
+            add_missing_columns(conn)
+        
+        # Index builds run outside a transaction so they can use CONCURRENTLY
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            drop_invalid_indexes(conn)
+            run_migrations(engine, conn, baseline=new_database)
+            create_missing_indexes(conn)
+            check_indexes(conn)
+        
+        # Keep monthly history partitions ready ahead of time
+        with engine.begin() as conn:
+            created = []
+            for table in HISTORY_TABLES:
+                created += ensure_history_partitions(conn, table=table)
+            print(f"✅ History partitions ready (created: {', '.join(created) or 'none'})")
         
         print("🎉 Database initialization completed!")
         
@@ -94,5 +214,12 @@ def init_database():
         print(f"❌ Error initializing database: {e}")
         raise
 
+def check_database():
+    """Only report missing indexes, without changing the schema"""
+    with engine.connect() as conn:
+        return check_indexes(conn)
+
 if __name__ == "__main__":
-    init_database() 
\ No newline at end of file
+    if "--check" in sys.argv:
+        sys.exit(1 if check_database() else 0)
+    init_database()
@@ -0,0 +1,192 @@
+"""
+Materialized leaderboards (leaderboard_snapshot).
+
+The bot keeps every leaderboard in memory (leaderboard_cache.py) and
+periodically writes the boards that changed here under a new generation.
+The dashboard reads the newest generation of a board instead of ranking
+users on every request.
+
+Boards: "leader", "coins", "waves", "tier:<n>" and "stats:<field>".
+
+Run directly (python3 -m dashboard_backend.leaderboard_snapshot) to rebuild
+every board from the database once, e.g. when the bot is not running.
+"""
+
+from sqlalchemy import func, insert, select, tuple_
+from sqlalchemy.orm import aliased
+from dashboard_backend.database import SessionLocal
+from dashboard_backend.models import LeaderboardSnapshot, LEADERBOARD_GENERATION_SEQ, NUMERIC_STATS_FIELDS
+
+TIER_BOARDS = ["leader", "coins", "waves"] + [f"tier:{tier_num}" for tier_num in range(1, 19)]
+STATS_BOARDS = [f"stats:{field}" for field in ["game_started"] + NUMERIC_STATS_FIELDS]
+# Boards a player's standing is reported on; game_started is a date, not an achievement
+STANDING_BOARDS = TIER_BOARDS + [f"stats:{field}" for field in NUMERIC_STATS_FIELDS]
+
+SNAPSHOT_COLUMNS = ["rank", "discordid", "discordname", "tier", "wave", "value", "display"]
+
+# Generations kept per board. A client paging through a board reads the
+# generation of its first page, which stays readable for this many rewrites.
+KEEP_GENERATIONS = 10
+
+class SnapshotExpired(Exception):
+    """The generation a client was paging through has been pruned"""
+
+def write_snapshots(db, boards: dict) -> int:
+    """Write {board: [row dict]} under a new generation and prune older generations.
+
+    The newest KEEP_GENERATIONS generations of each board are kept, so readers
+    paging through an earlier generation still find its rows. Returns the new
+    generation.
+    """
+    generation = db.execute(select(LEADERBOARD_GENERATION_SEQ.next_value())).scalar()
+    for board, rows in boards.items():
+        if rows:
+            db.execute(insert(LeaderboardSnapshot), [
+                {
+                    "board": board, "generation": generation, "total": len(rows),
+                    **{column: row.get(column) for column in SNAPSHOT_COLUMNS}
+                }
+                for row in rows
+            ])
+        else:
+            # An empty board still needs a generation so readers see it as empty
+            db.execute(insert(LeaderboardSnapshot), [{"board": board, "generation": generation, "rank": 0, "total": 0}])
+
+    for board in boards:
+        kept = db.query(LeaderboardSnapshot.generation).filter(
+            LeaderboardSnapshot.board == board,
+            LeaderboardSnapshot.generation <= generation
+        ).distinct().order_by(LeaderboardSnapshot.generation.desc()).offset(KEEP_GENERATIONS - 1).limit(1).scalar()
+        if kept is not None:
+            db.query(LeaderboardSnapshot).filter(
+                LeaderboardSnapshot.board == board,
+                LeaderboardSnapshot.generation < kept
+            ).delete(synchronize_session=False)
+    return generation
+
+def materialize(boards: dict) -> int:
+    """Write boards in one transaction; returns the new generation"""
+    db = SessionLocal()
+    try:
+        generation = write_snapshots(db, boards)
+        db.commit()
+        return generation
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+def latest_generation(db, board: str):
+    """Newest generation of a board, or None if it was never materialized"""
+    return db.query(func.max(LeaderboardSnapshot.generation)).filter(
+        LeaderboardSnapshot.board == board
+    ).scalar()
+
+def read_snapshot(db, board: str, after: int = 0, limit: int = None, criteria=(), generation: int = None):
+    """Rows of one generation of a board ranked after `after`, in rank order.
+
+    Reads the newest generation unless `generation` names the one a client
+    started paging through, so its later pages continue the same ranking.
+    Seeks on the (board, generation, rank) primary key, so a deep page costs the
+    same as the first. Returns None if the board was never materialized and
+    raises SnapshotExpired if the requested generation was pruned.
+    """
+    if generation is None:
+        generation = latest_generation(db, board)
+        if generation is None:
+            return None
+    query = db.query(LeaderboardSnapshot).filter(
+        LeaderboardSnapshot.board == board,
+        LeaderboardSnapshot.generation == generation,
+        LeaderboardSnapshot.rank > max(after, 0),
+        *criteria
+    ).order_by(LeaderboardSnapshot.rank)
+    if limit:
+        query = query.limit(limit)
+    rows = query.all()
+    if not rows and not db.query(db.query(LeaderboardSnapshot).filter(
+        LeaderboardSnapshot.board == board,
+        LeaderboardSnapshot.generation == generation
+    ).exists()).scalar():
+        raise SnapshotExpired(f"{board} generation {generation} is no longer available")
+    return rows
+
+def latest_generations(db, boards: list) -> dict:
+    """{board: newest generation} for boards that were materialized, in one round trip"""
+    newest = db.execute(select(*(
+        select(func.max(LeaderboardSnapshot.generation)).where(
+            LeaderboardSnapshot.board == board
+        ).scalar_subquery()
+        for board in boards
+    ))).one()
+    return {board: generation for board, generation in zip(boards, newest) if generation is not None}
+
+def read_snapshot_tops(db, boards: list, limit: int, criteria=()):
+    """{board: top rows of its newest generation} for several boards in one query.
+
+    Returns None if any of the boards was never materialized.
+    """
+    generations = latest_generations(db, boards)
+    if len(generations) < len(boards):
+        return None
+    rows = db.query(LeaderboardSnapshot).filter(
+        tuple_(LeaderboardSnapshot.board, LeaderboardSnapshot.generation).in_(list(generations.items())),
+        LeaderboardSnapshot.rank > 0,
+        LeaderboardSnapshot.rank <= limit,
+        *criteria
+    ).order_by(LeaderboardSnapshot.board, LeaderboardSnapshot.rank).all()
+    tops = {board: [] for board in boards}
+    for row in rows:
+        tops[row.board].append(row)
+    return tops
+
+def board_label(board: str) -> str:
+    """Readable name of a board, e.g. "tier:3" is "T3 Wave" and "stats:orb_kills" is "Orb Kills"."""
+    if board.startswith("tier:"):
+        return f"T{board[len('tier:'):]} Wave"
+    if board.startswith("stats:"):
+        return board[len("stats:"):].replace("_", " ").title()
+    return {"leader": "Overall (Highest Tier)", "coins": "Highest Coins", "waves": "Highest Wave"}[board]
+
+def percentile(rank: int, total: int) -> float:
+    """Share of a board's ranked users at or below a rank, in percent (rank 1 is 100)"""
+    return round((total - rank + 1) / total * 100, 1)
+
+def top_percent(rank: int, total: int) -> float:
+    """Share of a board's ranked users at or above a rank, in percent ("top 5%")"""
+    return round(rank / total * 100, 1)
+
+def user_ranks(db, discord_id: str) -> dict:
+    """{board: (rank, total)} for every materialized board a user is ranked on.
+
+    Finds the user's rows through (discordid, board, generation) and keeps those
+    in their board's newest generation, whose max() is a primary-key probe.
+    """
+    newest = aliased(LeaderboardSnapshot)
+    latest_generation_of_board = select(func.max(newest.generation)).where(
+        newest.board == LeaderboardSnapshot.board
+    ).scalar_subquery()
+    rows = db.query(
+        LeaderboardSnapshot.board,
+        LeaderboardSnapshot.rank,
+        LeaderboardSnapshot.total
+    ).filter(
+        LeaderboardSnapshot.discordid == discord_id,
+        LeaderboardSnapshot.generation == latest_generation_of_board
+    ).all()
+    return {board: (rank, total) for board, rank, total in rows}
+
+if __name__ == "__main__":
+    from leaderboard_cache import LeaderboardCache
+
+    cache = LeaderboardCache()
+    session = SessionLocal()
+    try:
+        cache.load(session)
+    finally:
+        session.close()
+
+    boards = {board: cache.snapshot_rows(board) for board in cache.take_dirty()}
+    generation = materialize(boards)
+    print(f"✅ Materialized {len(boards)} leaderboards as generation {generation}")
@@ -5,15 +5,18 @@ from fastapi.middleware.cors import CORSMiddleware
 import csv
 import io
 import json
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from dotenv import load_dotenv
 import requests
 from urllib.parse import urlencode
 from itsdangerous import URLSafeSerializer
+from sqlalchemy import and_, func, literal, or_, select, union_all
 from sqlalchemy.orm import Session
-from dashboard_backend.database import get_db
-from dashboard_backend.models import UserData, UserDataHistory, BotAdmin, UserStats
-import re
+from dashboard_backend.database import get_db, get_pool_metrics
+from dashboard_backend.models import UserData, UserTierHistory, BotAdmin, UserStatsLatest, UserTierBest, LeaderboardSnapshot, NUMERIC_STATS_FIELDS
+from dashboard_backend.tier_history import load_snapshots
+from dashboard_backend.number_codec import format_number
+from dashboard_backend.leaderboard_snapshot import read_snapshot, read_snapshot_tops, user_ranks, board_label, percentile, top_percent, STANDING_BOARDS, SnapshotExpired
 
 load_dotenv()
 
@@ -147,188 +150,193 @@ def get_user_data(discord_id: str, request: Request, db: Session = Depends(get_d
         "tiers": {f"T{i+1}": getattr(user, f"T{i+1}") for i in range(18)}
     }
 
+# Leaderboard pages: ?limit=N&after=R&generation=G returns up to N rows ranked
+# below R, where R and G are the "rank" and "generation" of the last row of the
+# previous page (omitted for page 1). Pinning the generation keeps every page on
+# the ranking of the first one; once it is pruned the endpoint returns 410 and
+# the client starts again from page 1. Rows from a live query have no generation.
+LEADERBOARD_PAGE_SIZE = 50
+LEADERBOARD_MAX_PAGE_SIZE = 500
+
+def page_rows(query, after: int, limit: int) -> list:
+    """Rank one page of a live ordered query, for boards without a snapshot"""
+    return [(rank, None, *row) for rank, row in enumerate(query.offset(after).limit(limit).all(), after + 1)]
+
+def snapshot_page(db, board: str, after: int, limit: int, generation, criteria=()):
+    """read_snapshot for a leaderboard endpoint; an expired generation is 410 Gone"""
+    try:
+        return read_snapshot(db, board, after, limit, criteria, generation)
+    except SnapshotExpired:
+        raise HTTPException(status_code=410, detail="Leaderboard was refreshed, reload from the first page")
+
 @app.get("/api/leaderboard/wave")
-def get_wave_leaderboard(request: Request, db: Session = Depends(get_db)):
+def get_wave_leaderboard(
+    request: Request,
+    limit: int = Query(LEADERBOARD_PAGE_SIZE, ge=1, le=LEADERBOARD_MAX_PAGE_SIZE),
+    after: int = Query(0, ge=0),
+    generation: int | None = Query(None),
+    db: Session = Depends(get_db)
+):
     user_id = get_current_user(request)
-    users = db.query(UserData).all()
-    leaderboard = []
-    for user in users:
-        max_wave = 0
-        max_wave_tier = None
-        for i in range(18):
-            tier_str = getattr(user, f"T{i+1}")
-            if tier_str:
-                wave_match = re.search(r"Wave:\s*(\d+)", tier_str)
-                if wave_match:
-                    wave = int(wave_match.group(1))
-                    if wave > max_wave:
-                        max_wave = wave
-                        max_wave_tier = f"T{i+1}"
-        if max_wave > 0:
-            leaderboard.append({
-                "username": user.discordname,
-                "max_wave": max_wave,
-                "tier": max_wave_tier
-            })
-    leaderboard.sort(key=lambda x: x["max_wave"], reverse=True)
-    return leaderboard
+    snapshot = snapshot_page(db, "waves", after, limit, generation, [LeaderboardSnapshot.wave > 0])
+    if snapshot is not None:
+        rows = [(row.rank, row.generation, row.discordname, row.wave, row.tier) for row in snapshot]
+    else:
+        rows = page_rows(db.query(
+            UserData.discordname,
+            UserData.max_wave,
+            UserData.max_wave_tier
+        ).filter(UserData.max_wave > 0).order_by(UserData.max_wave.desc(), UserData.discordid), after, limit)
+    return [
+        {
+            "rank": rank,
+            "generation": generation,
+            "username": name,
+            "max_wave": max_wave,
+            "tier": f"T{tier}"
+        }
+        for rank, generation, name, max_wave, tier in rows
+    ]
 
 @app.get("/api/leaderboard/coins")
-def get_coins_leaderboard(request: Request, db: Session = Depends(get_db)):
+def get_coins_leaderboard(
+    request: Request,
+    limit: int = Query(LEADERBOARD_PAGE_SIZE, ge=1, le=LEADERBOARD_MAX_PAGE_SIZE),
+    after: int = Query(0, ge=0),
+    generation: int | None = Query(None),
+    db: Session = Depends(get_db)
+):
     user_id = get_current_user(request)
-    users = db.query(UserData).all()
-    leaderboard = []
-    for user in users:
-        max_coins = 0
-        max_coins_tier = None
-        for i in range(18):
-            tier_str = getattr(user, f"T{i+1}")
-            if tier_str:
-                coins_match = re.search(r"Coins:\s*([\d.,]+[KMBTQ]?)", tier_str)
-                if coins_match:
-                    coins_str = coins_match.group(1)
-                    multiplier = 1
-                    if coins_str.endswith("K"):
-                        multiplier = 1_000
-                        coins_str = coins_str[:-1]
-                    elif coins_str.endswith("M"):
-                        multiplier = 1_000_000
-                        coins_str = coins_str[:-1]
-                    elif coins_str.endswith("B"):
-                        multiplier = 1_000_000_000
-                        coins_str = coins_str[:-1]
-                    elif coins_str.endswith("T"):
-                        multiplier = 1_000_000_000_000
-                        coins_str = coins_str[:-1]
-                    elif coins_str.endswith("Q"):
-                        multiplier = 1_000_000_000_000_000
-                        coins_str = coins_str[:-1]
-                    try:
-                        coins = float(coins_str.replace(",", "")) * multiplier
-                        if coins > max_coins:
-                            max_coins = coins
-                            max_coins_tier = f"T{i+1}"
-                    except:
-                        pass
-        if max_coins > 0:
-            leaderboard.append({
-                "username": user.discordname,
-                "max_coins": max_coins,
-                "tier": max_coins_tier
-            })
-    leaderboard.sort(key=lambda x: x["max_coins"], reverse=True)
-    return leaderboard
+    snapshot = snapshot_page(db, "coins", after, limit, generation, [LeaderboardSnapshot.value > 0])
+    if snapshot is not None:
+        rows = [(row.rank, row.generation, row.discordname, row.value, row.tier) for row in snapshot]
+    else:
+        rows = page_rows(db.query(
+            UserData.discordname,
+            UserData.max_coins,
+            UserData.max_coins_tier
+        ).filter(UserData.max_coins_key > 0).order_by(UserData.max_coins_key.desc(), UserData.discordid), after, limit)
+    return [
+        {
+            "rank": rank,
+            "generation": generation,
+            "username": name,
+            "max_coins": max_coins,
+            "tier": f"T{tier}"
+        }
+        for rank, generation, name, max_coins, tier in rows
+    ]
 
 @app.get("/api/leaderboard/tier/{tier_num}")
-def get_tier_leaderboard(tier_num: int, request: Request, db: Session = Depends(get_db)):
+def get_tier_leaderboard(
+    tier_num: int,
+    request: Request,
+    limit: int = Query(LEADERBOARD_PAGE_SIZE, ge=1, le=LEADERBOARD_MAX_PAGE_SIZE),
+    after: int = Query(0, ge=0),
+    generation: int | None = Query(None),
+    db: Session = Depends(get_db)
+):
     user_id = get_current_user(request)
     if not (1 <= tier_num <= 18):
         raise HTTPException(status_code=400, detail="Tier must be between 1 and 18")
     
-    users = db.query(UserData).all()
-    leaderboard = []
-    
-    for user in users:
-        tier_str = getattr(user, f"T{tier_num}")
-        if tier_str and tier_str != "Wave: 0 Coins: 0":
-            # Extract wave and coins from tier string
-            wave_match = re.search(r"Wave:\s*(\d+)", tier_str)
-            coins_match = re.search(r"Coins:\s*([\d.,]+[KMBTQ]?)", tier_str)
-            
-            wave = int(wave_match.group(1)) if wave_match else 0
-            coins = 0
-            if coins_match:
-                coins_str = coins_match.group(1)
-                multiplier = 1
-                if coins_str.endswith("K"):
-                    multiplier = 1_000
-                    coins_str = coins_str[:-1]
-                elif coins_str.endswith("M"):
-                    multiplier = 1_000_000
-                    coins_str = coins_str[:-1]
-                elif coins_str.endswith("B"):
-                    multiplier = 1_000_000_000
-                    coins_str = coins_str[:-1]
-                elif coins_str.endswith("T"):
-                    multiplier = 1_000_000_000_000
-                    coins_str = coins_str[:-1]
-                elif coins_str.endswith("Q"):
-                    multiplier = 1_000_000_000_000_000
-                    coins_str = coins_str[:-1]
-                try:
-                    coins = float(coins_str.replace(",", "")) * multiplier
-                except:
-                    coins = 0
-            
-            if wave > 0 or coins > 0:
-                leaderboard.append({
-                    "username": user.discordname,
-                    "wave": wave,
-                    "coins": coins,
-                    "coins_formatted": formatNumber(coins) if coins > 0 else "0"
-                })
+    snapshot = snapshot_page(db, f"tier:{tier_num}", after, limit, generation)
+    if snapshot is not None:
+        rows = [(row.rank, row.generation, row.discordname, row.wave, row.value) for row in snapshot]
+    else:
+        # Sort by wave first, then by coins as tiebreaker (served by the rank index)
+        rows = page_rows(db.query(
+            UserData.discordname,
+            UserTierBest.wave,
+            UserTierBest.coins_value
+        ).join(
+            UserData, UserData.discordid == UserTierBest.discordid
+        ).filter(
+            UserTierBest.tier == tier_num
+        ).order_by(UserTierBest.wave.desc(), UserTierBest.coins_key.desc(), UserTierBest.discordid), after, limit)
     
-    # Sort by wave first, then by coins as tiebreaker
-    leaderboard.sort(key=lambda x: (x["wave"], x["coins"]), reverse=True)
-    return leaderboard
-
-def formatNumber(num):
-    if num >= 1e60:  # ad
-        return f"{num / 1e60:.2f}ad"
-    elif num >= 1e57:  # ac
-        return f"{num / 1e57:.2f}ac"
-    elif num >= 1e54:  # ab
-        return f"{num / 1e54:.2f}ab"
-    elif num >= 1e51:  # aa
-        return f"{num / 1e51:.2f}aa"
-    elif num >= 1e48:  # D
-        return f"{num / 1e48:.2f}D"
-    elif num >= 1e45:  # N
-        return f"{num / 1e45:.2f}N"
-    elif num >= 1e42:  # O
-        return f"{num / 1e42:.2f}O"
-    elif num >= 1e39:  # S
-        return f"{num / 1e39:.2f}S"
-    elif num >= 1e36:  # s
-        return f"{num / 1e36:.2f}s"
-    elif num >= 1e33:  # Q
-        return f"{num / 1e33:.2f}Q"
-    elif num >= 1e30:  # q
-        return f"{num / 1e30:.2f}q"
-    elif num >= 1e27:  # T
-        return f"{num / 1e27:.2f}T"
-    elif num >= 1e24:  # B
-        return f"{num / 1e24:.2f}B"
-    elif num >= 1e21:  # M
-        return f"{num / 1e21:.2f}M"
-    elif num >= 1e18:  # K
-        return f"{num / 1e18:.2f}K"
-    elif num >= 1e15:
-        return f"{num / 1e15:.2f}Q"
-    elif num >= 1e12:
-        return f"{num / 1e12:.2f}T"
-    elif num >= 1e9:
-        return f"{num / 1e9:.2f}B"
-    elif num >= 1e6:
-        return f"{num / 1e6:.2f}M"
-    elif num >= 1e3:
-        return f"{num / 1e3:.2f}K"
+    return [tier_leaderboard_row(rank, name, wave, coins, generation) for rank, generation, name, wave, coins in rows]
+
+@app.get("/api/leaderboard/tiers")
+def get_all_tier_leaderboards(
+    request: Request,
+    limit: int = Query(10, ge=1, le=100, description="Rows per tier"),
+    db: Session = Depends(get_db)
+):
+    """Top rows of all 18 tier leaderboards, keyed by tier number"""
+    user_id = get_current_user(request)
+    tops = read_snapshot_tops(db, [f"tier:{tier_num}" for tier_num in range(1, 19)], limit)
+    if tops is not None:
+        rows = [
+            (int(board[len("tier:"):]), row.rank, row.generation, row.discordname, row.wave, row.value)
+            for board, board_rows in tops.items() for row in board_rows
+        ]
     else:
-        return str(int(num))
+        # One pass over user_tier_best, ranked within each tier
+        ranked = select(
+            UserTierBest.tier,
+            func.row_number().over(
+                partition_by=UserTierBest.tier,
+                order_by=(UserTierBest.wave.desc(), UserTierBest.coins_key.desc(), UserTierBest.discordid)
+            ).label("rank"),
+            literal(None).label("generation"),
+            UserData.discordname,
+            UserTierBest.wave,
+            UserTierBest.coins_value
+        ).join(UserData, UserData.discordid == UserTierBest.discordid).subquery()
+        rows = db.execute(
+            select(ranked).where(ranked.c.rank <= limit).order_by(ranked.c.tier, ranked.c.rank)
+        ).all()
+
+    leaderboards = {tier_num: [] for tier_num in range(1, 19)}
+    for tier_num, rank, generation, name, wave, coins in rows:
+        leaderboards[tier_num].append(tier_leaderboard_row(rank, name, wave, coins, generation))
+    return leaderboards
+
+def tier_leaderboard_row(rank, name, wave, coins, generation=None) -> dict:
+    return {
+        "rank": rank,
+        "generation": generation,
+        "username": name,
+        "wave": wave,
+        "coins": coins,
+        "coins_formatted": format_number(coins) if coins > 0 else "0"
+    }
 
 @app.get("/api/stats/overview")
 def get_stats_overview(request: Request, db: Session = Depends(get_db)):
     user_id = get_current_user(request)
-    users = db.query(UserData).all()
-    total_users = len(users)
-    users_with_data = sum(1 for user in users if any(getattr(user, f"T{i+1}") for i in range(18)))
+    # Counted by Postgres in one pass instead of loading every user row
+    tier_columns = [getattr(UserData, f"T{i}") for i in range(1, 19)]
+    has_tier_data = or_(*[and_(column.isnot(None), column != "") for column in tier_columns])
+    total_users, users_with_data = db.query(
+        func.count(),
+        func.count().filter(has_tier_data)
+    ).select_from(UserData).one()
+
+    tiers = db.query(
+        UserTierBest.tier,
+        func.count(),
+        func.max(UserTierBest.wave)
+    ).group_by(UserTierBest.tier).order_by(UserTierBest.tier).all()
     return {
         "total_users": total_users,
         "users_with_data": users_with_data,
+        "tiers": [
+            {"tier": f"T{tier}", "players": players, "max_wave": max_wave}
+            for tier, players, max_wave in tiers
+        ],
         "bot_status": "online",
         "database_status": "connected"
     }
 
+@app.get("/api/admin/pool-stats")
+def get_pool_stats(request: Request, db: Session = Depends(get_db)):
+    user_id = get_current_user(request)
+    if not is_bot_admin(user_id, db):
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return get_pool_metrics()
+
 @app.get("/api/admin/bot-admins")
 def get_bot_admins(request: Request, db: Session = Depends(get_db)):
     user_id = get_current_user(request)
@@ -362,14 +370,20 @@ def remove_bot_admin(request: Request, db: Session = Depends(get_db), payload: d
     return {"message": f"User {discord_id} removed from bot admins"}
 
 @app.get("/api/export/data")
-def export_all_data(request: Request, db: Session = Depends(get_db)):
+def export_all_data(
+    request: Request,
+    db: Session = Depends(get_db),
+    since: datetime | None = Query(None, description="Only export history recorded at or after this time")
+):
     user_id = get_current_user(request)
     if not is_bot_admin(user_id, db):
         raise HTTPException(status_code=403, detail="Admin access required")
     
     # Get all user data
     users = db.query(UserData).all()
-    history = db.query(UserDataHistory).all()
+    # History is stored as per-tier deltas; rebuild the full snapshots for export
+    history = sorted(load_snapshots(db, since=since), key=lambda snapshot: snapshot[1])
+    names = {user.discordid: user.discordname for user in users}
     
     # Prepare data for export
     export_data = {
@@ -391,16 +405,13 @@ def export_all_data(request: Request, db: Session = Depends(get_db)):
         export_data["users"].append(user_data)
     
     # Format history data
-    for entry in history:
+    for discordid, timestamp, tiers in history:
         history_data = {
-            "discord_id": entry.discordid,
-            "discord_name": entry.discordname,
-            "timestamp": entry.timestamp.isoformat(),
-            "tiers": {}
+            "discord_id": discordid,
+            "discord_name": names.get(discordid),
+            "timestamp": timestamp.isoformat(),
+            "tiers": tiers
         }
-        for i in range(18):
-            tier_value = getattr(entry, f"T{i+1}")
-            history_data["tiers"][f"T{i+1}"] = tier_value
         export_data["history"].append(history_data)
     
     # Create JSON file in memory
@@ -456,11 +467,30 @@ def export_csv_data(request: Request, db: Session = Depends(get_db)):
         headers={"Content-Disposition": f"attachment; filename={filename}"}
     )
 
+@app.get("/api/me/ranks")
+def get_my_ranks(request: Request, db: Session = Depends(get_db)):
+    """The caller's rank and percentile on every leaderboard they appear on"""
+    user_id = get_current_user(request)
+    ranks = user_ranks(db, str(user_id))
+    return [
+        {
+            "board": board,
+            "label": board_label(board),
+            "rank": ranks[board][0],
+            "total": ranks[board][1],
+            "percentile": percentile(*ranks[board]),
+            "top_percent": top_percent(*ranks[board])
+        }
+        for board in STANDING_BOARDS
+        if board in ranks
+    ]
+
 @app.get("/api/user/progress")
 def get_user_progress(
     request: Request,
     db: Session = Depends(get_db),
-    tier: str = Query(..., description="Tier (e.g. t1, t2, etc.)")
+    tier: str = Query(..., description="Tier (e.g. t1, t2, etc.)"),
+    days: int | None = Query(None, ge=1, description="Only include the last N days of history")
 ):
     user_id = get_current_user(request)
     if not tier.lower().startswith("t") or not tier[1:].isdigit():
@@ -469,103 +499,88 @@ def get_user_progress(
     if not (1 <= tier_num <= 18):
         raise HTTPException(status_code=400, detail="Tier must be between t1 and t18")
 
-    history = db.query(UserDataHistory).filter(UserDataHistory.discordid == user_id).order_by(UserDataHistory.timestamp).all()
-    progress = []
-    for row in history:
-        tier_str = getattr(row, f"T{tier_num}")
-        if tier_str:
-            wave_match = re.search(r"Wave:\s*(\d+)", tier_str)
-            wave = int(wave_match.group(1)) if wave_match else 0
-            if wave > 0:  # Only include entries with actual wave data
-                progress.append({
-                    "timestamp": row.timestamp.isoformat(),
-                    "wave": wave
-                })
-    return progress
-
-NUMERIC_STATS_FIELDS = [
-    "coins_earned", "cash_earned", "stones_earned", "damage_dealt", "enemies_destroyed", "waves_completed",
-    "upgrades_bought", "workshop_upgrades", "workshop_coins_spent", "research_completed", "lab_coins_spent",
-    "free_upgrades", "interest_earned", "orb_kills", "death_ray_kills", "thorn_damage", "waves_skipped"
-]
-
-def parse_num(val):
-    if val is None:
-        return 0
-    val = str(val).replace(",", "").replace("$", "").strip()
-    
-    # Define suffixes in order with their multipliers
-    suffixes = {
-        'K': 1_000,
-        'M': 1_000_000,
-        'B': 1_000_000_000,
-        'T': 1_000_000_000_000,
-        'q': 1_000_000_000_000_000,
-        'Q': 1_000_000_000_000_000_000,
-        's': 1_000_000_000_000_000_000_000,
-        'S': 1_000_000_000_000_000_000_000_000,
-        'O': 1_000_000_000_000_000_000_000_000_000,
-        'N': 1_000_000_000_000_000_000_000_000_000_000,
-        'D': 1_000_000_000_000_000_000_000_000_000_000_000,
-        'aa': 1_000_000_000_000_000_000_000_000_000_000_000_000,
-        'ab': 1_000_000_000_000_000_000_000_000_000_000_000_000_000,
-        'ac': 1_000_000_000_000_000_000_000_000_000_000_000_000_000_000,
-        'ad': 1_000_000_000_000_000_000_000_000_000_000_000_000_000_000_000
-    }
-    
-    # Use regex to match number with optional suffix
-    # Pattern: ^(\d+(?:\.\d{1,2})?)([KMBTqQsSOND]|aa|ab|ac|ad)?$
-    import re
-    pattern = r'^(\d+(?:\.\d{1,2})?)([KMBTqQsSOND]|aa|ab|ac|ad)?$'
-    match = re.match(pattern, val)
-    
-    if match:
-        number_part, suffix = match.groups()
-        try:
-            number = float(number_part)
-            multiplier = suffixes.get(suffix, 1) if suffix else 1
-            return number * multiplier
-        except ValueError:
-            return 0
-    
-    # If regex doesn't match, try to handle edge cases
-    # Check if it ends with any of our suffixes
-    for suffix in sorted(suffixes.keys(), key=len, reverse=True):
-        if val.endswith(suffix):
-            try:
-                number_part = val[:-len(suffix)]
-                number = float(number_part)
-                return number * suffixes[suffix]
-            except ValueError:
-                continue
-    
-    # If no suffix found, try to parse as regular number
-    try:
-        return float(val)
-    except ValueError:
-        return 0
+    # Each delta row is a point where this tier changed
+    query = db.query(UserTierHistory.timestamp, UserTierHistory.wave).filter(
+        UserTierHistory.discordid == user_id,
+        UserTierHistory.tier == tier_num,
+        UserTierHistory.wave > 0  # Only include entries with actual wave data
+    )
+    if days:
+        # A timestamp bound lets Postgres skip history partitions outside the window
+        query = query.filter(UserTierHistory.timestamp >= datetime.now(timezone.utc) - timedelta(days=days))
+    history = query.order_by(UserTierHistory.timestamp).all()
+    return [{"timestamp": timestamp.isoformat(), "wave": wave} for timestamp, wave in history]
 
 @app.get("/api/stats-leaderboard")
-def stats_leaderboard(field: str = Query(..., description="Stat field to rank by"), db: Session = Depends(get_db)):
+def stats_leaderboard(
+    field: str = Query(..., description="Stat field to rank by"),
+    limit: int = Query(LEADERBOARD_PAGE_SIZE, ge=1, le=LEADERBOARD_MAX_PAGE_SIZE),
+    after: int = Query(0, ge=0),
+    generation: int | None = Query(None),
+    db: Session = Depends(get_db)
+):
     if field not in NUMERIC_STATS_FIELDS:
         raise HTTPException(status_code=400, detail="Invalid field")
-    # For each user, get their highest value for the field
-    users = db.query(UserStats.discordid, UserStats.discordname).distinct().all()
-    leaderboard = []
-    for user in users:
-        # Get all entries for this user, get max value for the field
-        entries = db.query(UserStats).filter(UserStats.discordid == user.discordid).all()
-        max_val = 0
-        for entry in entries:
-            val = parse_num(getattr(entry, field))
-            if val > max_val:
-                max_val = val
-        leaderboard.append({
-            "discordid": user.discordid,
-            "username": user.discordname,
-            "value": max_val
+    snapshot = snapshot_page(db, f"stats:{field}", after, limit, generation, [LeaderboardSnapshot.value > 0])
+    if snapshot is not None:
+        rows = [(row.rank, row.generation, row.discordid, row.discordname, row.value) for row in snapshot]
+    else:
+        # Lifetime stats only grow, so each user's latest upload carries their best value
+        value_column = getattr(UserStatsLatest, f"{field}_value")
+        key_column = getattr(UserStatsLatest, f"{field}_key")
+        rows = page_rows(db.query(
+            UserStatsLatest.discordid,
+            UserStatsLatest.discordname,
+            value_column
+        ).filter(
+            key_column > 0
+        ).order_by(key_column.desc(), UserStatsLatest.discordid), after, limit)
+    return [
+        {
+            "rank": rank,
+            "generation": generation,
+            "discordid": discordid,
+            "username": username,
+            "value": value
+        }
+        for rank, generation, discordid, username, value in rows
+    ]
+
+@app.get("/api/stats-leaderboard/all")
+def stats_leaderboard_all(
+    limit: int = Query(10, ge=1, le=100, description="Rows per field"),
+    db: Session = Depends(get_db)
+):
+    """Top rows for every numeric stats field, keyed by field"""
+    tops = read_snapshot_tops(db, [f"stats:{field}" for field in NUMERIC_STATS_FIELDS], limit, [LeaderboardSnapshot.value > 0])
+    if tops is not None:
+        rows = [
+            (board[len("stats:"):], row.rank, row.discordid, row.discordname, row.value)
+            for board, board_rows in tops.items() for row in board_rows
+        ]
+    else:
+        # One UNION ALL of per-field top-N scans, each walking that field's key index
+        parts = []
+        for field in NUMERIC_STATS_FIELDS:
+            key_column = getattr(UserStatsLatest, f"{field}_key")
+            parts.append(
+                select(
+                    literal(field).label("field"),
+                    func.row_number().over(order_by=(key_column.desc(), UserStatsLatest.discordid)).label("rank"),
+                    UserStatsLatest.discordid,
+                    UserStatsLatest.discordname,
+                    getattr(UserStatsLatest, f"{field}_value").label("value")
+                ).where(key_column > 0).order_by(key_column.desc(), UserStatsLatest.discordid).limit(limit)
+            )
+        rows = db.execute(union_all(*parts)).all()
+
+    leaderboards = {field: [] for field in NUMERIC_STATS_FIELDS}
+    for field, rank, discordid, username, value in rows:
+        leaderboards[field].append({
+            "rank": rank,
+            "discordid": discordid,
+            "username": username,
+            "value": value
         })
-    leaderboard = [x for x in leaderboard if x["value"] > 0]
-    leaderboard.sort(key=lambda x: x["value"], reverse=True)
-    return leaderboard
+    return leaderboards
 
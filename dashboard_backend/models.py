@@ -1,4 +1,5 @@
-from sqlalchemy import Column, String, Integer, DateTime
+from sqlalchemy import Column, String, Integer, BigInteger, Float, DateTime, Index, LargeBinary, Sequence
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.sql import func
 
@@ -27,13 +28,36 @@ class UserData(Base):
     T16 = Column(String)
     T17 = Column(String)
     T18 = Column(String)
+    # Best-of summaries across all tiers. Per-tier wave/coins columns used to sit
+    # here too; per-tier rankings now read user_tier_best (dropped by migration 4)
+    highest_tier = Column(Integer)
+    highest_tier_wave = Column(Integer)
+    highest_tier_coins = Column(Float)
+    max_wave = Column(Integer)
+    max_wave_tier = Column(Integer)
+    max_coins = Column(Float)
+    max_coins_tier = Column(Integer)
+    # Order-preserving BIGINT keys of the coin summaries (see numeric_sort_key)
+    highest_tier_coins_key = Column(BigInteger)
+    max_coins_key = Column(BigInteger)
+
+    __table_args__ = (
+        Index('ix_user_data_highest_tier_key', 'highest_tier', 'highest_tier_wave', 'highest_tier_coins_key'),
+        Index('ix_user_data_max_wave', 'max_wave'),
+        Index('ix_user_data_max_coins_key', 'max_coins_key'),
+    )
 
 class UserDataHistory(Base):
     __tablename__ = 'user_data_history'
+    # Range-partitioned by month (see history_retention.py); the partition key must be part of the primary key
+    __table_args__ = (
+        Index('ix_user_data_history_discordid_timestamp', 'discordid', 'timestamp'),
+        {'postgresql_partition_by': 'RANGE ("timestamp")'},
+    )
     id = Column(Integer, primary_key=True, autoincrement=True)
     discordid = Column(String)
     discordname = Column(String)
-    timestamp = Column(DateTime(timezone=True), server_default=func.now())
+    timestamp = Column(DateTime(timezone=True), primary_key=True, server_default=func.now())
     T1 = Column(String)
     T2 = Column(String)
     T3 = Column(String)
@@ -53,12 +77,53 @@ class UserDataHistory(Base):
     T17 = Column(String)
     T18 = Column(String)
 
+# Delta-encoded tier history: one row per tier that improved in an upload.
+# Full T1..T18 snapshots are rebuilt on demand (see tier_history.py).
+class UserTierHistory(Base):
+    __tablename__ = 'user_tier_history'
+    __table_args__ = (
+        Index('ix_user_tier_history_discordid_tier_timestamp', 'discordid', 'tier', 'timestamp'),
+        {'postgresql_partition_by': 'RANGE ("timestamp")'},
+    )
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    discordid = Column(String)
+    tier = Column(Integer)
+    wave = Column(Integer)
+    coins_value = Column(Float)
+    coins_display = Column(String)
+    timestamp = Column(DateTime(timezone=True), primary_key=True, server_default=func.now())
+
+# Normalized copy of the T1..T18 columns: one row per user and achieved tier.
+# The single source for per-tier rankings; it replaced user_data's T{i}_wave/T{i}_coins.
+class UserTierBest(Base):
+    __tablename__ = 'user_tier_best'
+    discordid = Column(String, primary_key=True)
+    tier = Column(Integer, primary_key=True)
+    wave = Column(Integer)
+    coins_value = Column(Float)
+    coins_key = Column(BigInteger)
+    coins_display = Column(String)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+Index('ix_user_tier_best_rank_key', UserTierBest.tier, UserTierBest.wave.desc(), UserTierBest.coins_key.desc())
+
 class BotAdmin(Base):
     __tablename__ = 'bot_admins'
     discordid = Column(String, primary_key=True)
 
+# Stats that are numbers (everything except game_started); each has <field>_value
+# (float, for display maths) and <field>_key (exact sortable BIGINT) columns
+NUMERIC_STATS_FIELDS = [
+    "coins_earned", "cash_earned", "stones_earned", "damage_dealt", "enemies_destroyed", "waves_completed",
+    "upgrades_bought", "workshop_upgrades", "workshop_coins_spent", "research_completed", "lab_coins_spent",
+    "free_upgrades", "interest_earned", "orb_kills", "death_ray_kills", "thorn_damage", "waves_skipped"
+]
+
 class UserStats(Base):
     __tablename__ = 'user_stats'
+    __table_args__ = (
+        Index('ix_user_stats_discordid_timestamp', 'discordid', 'timestamp'),
+    )
     id = Column(Integer, primary_key=True, autoincrement=True)
     discordid = Column(String)
     discordname = Column(String)
@@ -80,4 +145,141 @@ class UserStats(Base):
     death_ray_kills = Column(String)
     thorn_damage = Column(String)
     waves_skipped = Column(String)
-    timestamp = Column(DateTime(timezone=True), server_default=func.now()) 
\ No newline at end of file
+    timestamp = Column(DateTime(timezone=True), server_default=func.now())
+    # Numeric values of the stats above, parsed at ingest; ranking reads user_stats_latest
+    coins_earned_value = Column(Float)
+    cash_earned_value = Column(Float)
+    stones_earned_value = Column(Float)
+    damage_dealt_value = Column(Float)
+    enemies_destroyed_value = Column(Float)
+    waves_completed_value = Column(Float)
+    upgrades_bought_value = Column(Float)
+    workshop_upgrades_value = Column(Float)
+    workshop_coins_spent_value = Column(Float)
+    research_completed_value = Column(Float)
+    lab_coins_spent_value = Column(Float)
+    free_upgrades_value = Column(Float)
+    interest_earned_value = Column(Float)
+    orb_kills_value = Column(Float)
+    death_ray_kills_value = Column(Float)
+    thorn_damage_value = Column(Float)
+    waves_skipped_value = Column(Float)
+    coins_earned_key = Column(BigInteger)
+    cash_earned_key = Column(BigInteger)
+    stones_earned_key = Column(BigInteger)
+    damage_dealt_key = Column(BigInteger)
+    enemies_destroyed_key = Column(BigInteger)
+    waves_completed_key = Column(BigInteger)
+    upgrades_bought_key = Column(BigInteger)
+    workshop_upgrades_key = Column(BigInteger)
+    workshop_coins_spent_key = Column(BigInteger)
+    research_completed_key = Column(BigInteger)
+    lab_coins_spent_key = Column(BigInteger)
+    free_upgrades_key = Column(BigInteger)
+    interest_earned_key = Column(BigInteger)
+    orb_kills_key = Column(BigInteger)
+    death_ray_kills_key = Column(BigInteger)
+    thorn_damage_key = Column(BigInteger)
+    waves_skipped_key = Column(BigInteger)
+ 
+
+# Latest stats upload per user, upserted in the same transaction as the user_stats insert
+class UserStatsLatest(Base):
+    __tablename__ = 'user_stats_latest'
+    discordid = Column(String, primary_key=True)
+    stats_id = Column(Integer)
+    discordname = Column(String)
+    game_started = Column(String)
+    coins_earned = Column(String)
+    cash_earned = Column(String)
+    stones_earned = Column(String)
+    damage_dealt = Column(String)
+    enemies_destroyed = Column(String)
+    waves_completed = Column(String)
+    upgrades_bought = Column(String)
+    workshop_upgrades = Column(String)
+    workshop_coins_spent = Column(String)
+    research_completed = Column(String)
+    lab_coins_spent = Column(String)
+    free_upgrades = Column(String)
+    interest_earned = Column(String)
+    orb_kills = Column(String)
+    death_ray_kills = Column(String)
+    thorn_damage = Column(String)
+    waves_skipped = Column(String)
+    timestamp = Column(DateTime(timezone=True), server_default=func.now())
+    coins_earned_value = Column(Float)
+    cash_earned_value = Column(Float)
+    stones_earned_value = Column(Float)
+    damage_dealt_value = Column(Float)
+    enemies_destroyed_value = Column(Float)
+    waves_completed_value = Column(Float)
+    upgrades_bought_value = Column(Float)
+    workshop_upgrades_value = Column(Float)
+    workshop_coins_spent_value = Column(Float)
+    research_completed_value = Column(Float)
+    lab_coins_spent_value = Column(Float)
+    free_upgrades_value = Column(Float)
+    interest_earned_value = Column(Float)
+    orb_kills_value = Column(Float)
+    death_ray_kills_value = Column(Float)
+    thorn_damage_value = Column(Float)
+    waves_skipped_value = Column(Float)
+    coins_earned_key = Column(BigInteger, index=True)
+    cash_earned_key = Column(BigInteger, index=True)
+    stones_earned_key = Column(BigInteger, index=True)
+    damage_dealt_key = Column(BigInteger, index=True)
+    enemies_destroyed_key = Column(BigInteger, index=True)
+    waves_completed_key = Column(BigInteger, index=True)
+    upgrades_bought_key = Column(BigInteger, index=True)
+    workshop_upgrades_key = Column(BigInteger, index=True)
+    workshop_coins_spent_key = Column(BigInteger, index=True)
+    research_completed_key = Column(BigInteger, index=True)
+    lab_coins_spent_key = Column(BigInteger, index=True)
+    free_upgrades_key = Column(BigInteger, index=True)
+    interest_earned_key = Column(BigInteger, index=True)
+    orb_kills_key = Column(BigInteger, index=True)
+    death_ray_kills_key = Column(BigInteger, index=True)
+    thorn_damage_key = Column(BigInteger, index=True)
+    waves_skipped_key = Column(BigInteger, index=True)
+
+# Materialized leaderboards. Each materialization of a board writes all of its
+# rows under a new generation; readers use the board's highest generation.
+LEADERBOARD_GENERATION_SEQ = Sequence('leaderboard_generation_seq', metadata=Base.metadata)
+
+class LeaderboardSnapshot(Base):
+    __tablename__ = 'leaderboard_snapshot'
+    board = Column(String, primary_key=True)
+    generation = Column(BigInteger, primary_key=True)
+    rank = Column(Integer, primary_key=True)
+    discordid = Column(String)
+    discordname = Column(String)
+    tier = Column(Integer)
+    wave = Column(Integer)
+    value = Column(Float)
+    display = Column(String)
+    total = Column(Integer)         # ranked users on the board in this generation
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    __table_args__ = (
+        # One user's rank on every board in a single lookup
+        Index('ix_leaderboard_snapshot_discordid', 'discordid', 'board', 'generation'),
+    )
+
+# Screenshot extraction results by image content (extraction_cache.py): a
+# re-upload of the same bytes with the same prompts skips the Gemini calls.
+class ExtractionCache(Base):
+    __tablename__ = 'extraction_cache'
+    cache_key = Column(String, primary_key=True)    # "<sha256 of bytes>:<forced type or auto>:<extraction version>"
+    result = Column(JSONB)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_used_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+
+# Perceptual fingerprints of each user's extracted screenshots, to recognise a
+# re-screenshot of an unchanged screen (extraction_cache.NearDuplicateIndex)
+class ImageFingerprint(Base):
+    __tablename__ = 'image_fingerprint'
+    discordid = Column(String, primary_key=True)
+    cache_key = Column(String, primary_key=True)    # extraction_cache row holding the result
+    image_hash = Column(BigInteger)                 # 64-bit dHash, stored as signed
+    thumbnail = Column(LargeBinary)                 # small greyscale PNG, to confirm a match
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,166 @@
+"""
+Parsing and formatting of the game's suffixed numbers and tier strings.
+
+Every module that reads "1.5 T", "$42.62 M", "Wave: 120 Coins: 3.2q" or formats
+a number back into that notation goes through here, so there is one suffix
+table and one set of rules. Suffixes are case-sensitive, as in the game:
+q = 10^15 (quadrillion) and Q = 10^18 (quintillion), s = 10^21 and S = 10^24.
+
+Patterns are compiled once, and the parse/format functions are memoized:
+uploads and leaderboards parse the same few thousand strings over and over.
+"""
+
+import re
+from decimal import Decimal, InvalidOperation, ROUND_FLOOR
+from functools import lru_cache
+
+SUFFIXES = {
+    'K': 1_000,
+    'M': 1_000_000,
+    'B': 1_000_000_000,
+    'T': 1_000_000_000_000,
+    'q': 1_000_000_000_000_000,
+    'Q': 1_000_000_000_000_000_000,
+    's': 1_000_000_000_000_000_000_000,
+    'S': 1_000_000_000_000_000_000_000_000,
+    'O': 1_000_000_000_000_000_000_000_000_000,
+    'N': 1_000_000_000_000_000_000_000_000_000_000,
+    'D': 1_000_000_000_000_000_000_000_000_000_000_000,
+    'aa': 1_000_000_000_000_000_000_000_000_000_000_000_000,
+    'ab': 1_000_000_000_000_000_000_000_000_000_000_000_000_000,
+    'ac': 1_000_000_000_000_000_000_000_000_000_000_000_000_000_000,
+    'ad': 1_000_000_000_000_000_000_000_000_000_000_000_000_000_000_000
+}
+
+# Longest first so "aa" wins over a one-letter suffix
+SUFFIXES_LONGEST_FIRST = tuple(sorted(SUFFIXES, key=len, reverse=True))
+# Largest first for formatting, as floats: an int multiplier such as 10**45 is
+# larger than float(1e45) and would push exact powers down to the next suffix
+SUFFIXES_LARGEST_FIRST = tuple(
+    (suffix, float(multiplier)) for suffix, multiplier in sorted(SUFFIXES.items(), key=lambda item: item[1], reverse=True)
+)
+
+NUMBER_PATTERN = re.compile(rf"^(-?\d+(?:\.\d+)?)\s*({'|'.join(SUFFIXES_LONGEST_FIRST)})?$")
+TIER_WAVE_PATTERN = re.compile(r"Wave:\s*(\d+)")
+TIER_COINS_PATTERN = re.compile(r"Coins:\s*(.+?)\s*$")
+
+# Distinct strings kept per memoized function
+CODEC_CACHE_SIZE = 65536
+
+def _clean(raw_value):
+    """Strip $ and thousands separators; None for empty or "null" values"""
+    if raw_value is None:
+        return None
+    value = str(raw_value).replace("$", "").replace(",", "").strip()
+    if not value or value.lower() == "null":
+        return None
+    return value
+
+@lru_cache(maxsize=CODEC_CACHE_SIZE)
+def _parse_decimal(value: str) -> Decimal:
+    match = NUMBER_PATTERN.match(value)
+    if match:
+        number, suffix = match.groups()
+        return Decimal(number) * SUFFIXES[suffix] if suffix else Decimal(number)
+    # No suffix pattern: accept anything Decimal reads (e.g. "1e5"), finite only
+    try:
+        number = Decimal(value)
+    except InvalidOperation:
+        return Decimal(0)
+    return number if number.is_finite() else Decimal(0)
+
+@lru_cache(maxsize=CODEC_CACHE_SIZE)
+def _parse_float(value: str) -> float:
+    match = NUMBER_PATTERN.match(value)
+    if match:
+        number, suffix = match.groups()
+        return float(number) * SUFFIXES[suffix] if suffix else float(number)
+    number = _parse_decimal(value)
+    return float(number)
+
+def parse_number(raw_value) -> float:
+    """Parse a number with an optional suffix, $ prefix, commas and a space before the suffix.
+
+    Returns 0.0 for empty, "null" or unparseable values.
+    """
+    value = _clean(raw_value)
+    return _parse_float(value) if value is not None else 0.0
+
+def parse_decimal(raw_value) -> Decimal:
+    """Exact counterpart of parse_number: same input rules, Decimal result"""
+    value = _clean(raw_value)
+    return _parse_decimal(value) if value is not None else Decimal(0)
+
+# Sortable big-number key: (decimal exponent + bias) * 10^15 + 15-digit mantissa.
+# Keys compare like the numbers they encode, fit in a BIGINT and are exact for
+# every value with up to 15 significant digits (all on-screen game values).
+SORT_KEY_MANTISSA_DIGITS = 15
+SORT_KEY_EXPONENT_BIAS = 100
+SORT_KEY_MAX = 2**63 - 1
+
+def _decimal_sort_key(value: Decimal) -> int:
+    if not value.is_finite() or value == 0:
+        return 0
+    if value < 0:
+        return -_decimal_sort_key(-value)
+
+    exponent = value.adjusted()
+    if exponent + SORT_KEY_EXPONENT_BIAS <= 0:
+        return 0
+    mantissa = int(value.scaleb(SORT_KEY_MANTISSA_DIGITS - 1 - exponent).to_integral_value(rounding=ROUND_FLOOR))
+    key = (exponent + SORT_KEY_EXPONENT_BIAS) * 10**SORT_KEY_MANTISSA_DIGITS + mantissa
+    return min(key, SORT_KEY_MAX)
+
+@lru_cache(maxsize=CODEC_CACHE_SIZE)
+def _string_sort_key(value: str) -> int:
+    return _decimal_sort_key(parse_decimal(value))
+
+def numeric_sort_key(value) -> int:
+    """Encode a number (Decimal, int, float or suffixed string) as an order-preserving BIGINT key"""
+    if isinstance(value, str):
+        return _string_sort_key(value)
+    if isinstance(value, float):
+        # repr gives the shortest decimal that round-trips, not the binary expansion
+        return _decimal_sort_key(Decimal(repr(value)))
+    return _decimal_sort_key(Decimal(value))
+
+@lru_cache(maxsize=CODEC_CACHE_SIZE)
+def _parse_tier(tier_str: str) -> tuple:
+    wave_match = TIER_WAVE_PATTERN.search(tier_str)
+    coins_match = TIER_COINS_PATTERN.search(tier_str)
+
+    wave = int(wave_match.group(1)) if wave_match else 0
+    coins_display = coins_match.group(1) if coins_match else "0"
+    return wave, parse_number(coins_display), coins_display
+
+def parse_tier_string(tier_str) -> tuple:
+    """Parse a "Wave: X Coins: Y" tier string.
+
+    Returns (wave, coins_value, coins_display); missing parts come back as 0 and "0".
+    Use numeric_sort_key(coins_display) when coins need to be compared exactly.
+    """
+    if not tier_str:
+        return 0, 0.0, "0"
+    return _parse_tier(tier_str)
+
+@lru_cache(maxsize=CODEC_CACHE_SIZE)
+def format_number(num: float, decimals: int = 2) -> str:
+    """Format a number with the largest suffix that keeps it at or above 1, e.g. 1.5e18 -> "1.50Q".
+
+    A value that would round to 1000 of one suffix gets the next one, so 999,999
+    is "1.00M" rather than "1000.00K". Values below 1,000 are shown as whole numbers.
+    """
+    magnitude = abs(num)
+    for index, (suffix, multiplier) in enumerate(SUFFIXES_LARGEST_FIRST):
+        if magnitude >= multiplier:
+            if index and round(magnitude / multiplier, decimals) >= 1000:
+                suffix, multiplier = SUFFIXES_LARGEST_FIRST[index - 1]
+            return f"{num / multiplier:.{decimals}f}{suffix}"
+    return str(int(num))
+
+def codec_cache_info() -> dict:
+    """Hit/miss counters of the memoized functions"""
+    return {
+        function.__name__.lstrip("_"): function.cache_info()._asdict()
+        for function in (_parse_float, _parse_decimal, _string_sort_key, _parse_tier, format_number)
+    }
@@ -0,0 +1,65 @@
+"""
+Helpers for the delta-encoded tier history (user_tier_history).
+
+Each upload only records the tiers that improved. Full T1..T18 snapshots
+are rebuilt on demand by replaying a user's deltas in timestamp order.
+"""
+
+from itertools import groupby
+from dashboard_backend.models import UserTierHistory
+
+EMPTY_TIER = "Wave: 0 Coins: 0"
+
+def tier_string(wave, coins_display) -> str:
+    """Format a tier the way the T1..T18 columns store it"""
+    return f"Wave: {wave} Coins: {coins_display}"
+
+def latest_tiers_before(db, before, discord_id: str = None) -> dict:
+    """Return {discordid: {"T{n}": tier string}} as it stood just before a timestamp"""
+    query = db.query(UserTierHistory).filter(UserTierHistory.timestamp < before)
+    if discord_id:
+        query = query.filter(UserTierHistory.discordid == discord_id)
+    rows = query.distinct(UserTierHistory.discordid, UserTierHistory.tier).order_by(
+        UserTierHistory.discordid,
+        UserTierHistory.tier,
+        UserTierHistory.timestamp.desc(),
+        UserTierHistory.id.desc()
+    ).all()
+
+    state = {}
+    for row in rows:
+        state.setdefault(row.discordid, {})[f"T{row.tier}"] = tier_string(row.wave, row.coins_display)
+    return state
+
+def rebuild_snapshots(deltas, seed: dict = None):
+    """Replay deltas ordered by (discordid, timestamp) into full tier snapshots.
+
+    seed optionally holds each user's tiers before the first delta (see latest_tiers_before).
+    Yields (discordid, timestamp, {"T1": ..., "T18": ...}), one per upload.
+    """
+    seed = seed or {}
+    for discordid, user_deltas in groupby(deltas, key=lambda delta: delta.discordid):
+        state = {f"T{i}": EMPTY_TIER for i in range(1, 19)}
+        state.update(seed.get(discordid, {}))
+        # All deltas from one upload share the transaction timestamp
+        for timestamp, upload in groupby(user_deltas, key=lambda delta: delta.timestamp):
+            for delta in upload:
+                state[f"T{delta.tier}"] = tier_string(delta.wave, delta.coins_display)
+            yield discordid, timestamp, dict(state)
+
+def load_snapshots(db, since=None, discord_id: str = None):
+    """Rebuild full snapshots from user_tier_history, optionally from a start time and for one user"""
+    query = db.query(UserTierHistory)
+    if discord_id:
+        query = query.filter(UserTierHistory.discordid == discord_id)
+    seed = None
+    if since:
+        # Restricting the timestamp prunes history partitions before the cutoff
+        query = query.filter(UserTierHistory.timestamp >= since)
+        seed = latest_tiers_before(db, since, discord_id)
+    deltas = query.order_by(
+        UserTierHistory.discordid,
+        UserTierHistory.timestamp,
+        UserTierHistory.id
+    ).all()
+    return rebuild_snapshots(deltas, seed)
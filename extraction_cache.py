@@ -0,0 +1,309 @@
+"""
+Content-addressed cache of screenshot extraction results.
+
+A result is keyed by the SHA-256 of the uploaded bytes, the forced image type
+(or "auto") and the extraction version (model and prompt revision), so a
+re-upload of the same screenshot costs a hash and a lookup instead of Gemini
+calls, and changing a prompt never serves results made with the old one.
+
+Entries live in the extraction_cache table, so they survive restarts, and the
+most recently used ones are also held in memory. Both are LRU-bounded: the
+table to EXTRACTION_CACHE_SIZE rows, memory to EXTRACTION_CACHE_MEMORY_SIZE.
+Memory hits are written back to the table's last_used_at in batches (at most
+every EXTRACTION_CACHE_TOUCH_SECONDS, and before every eviction), so the
+table never evicts the entries that are hot in memory. Concurrent requests
+for the same key share a single computation (singleflight): the first caller computes, the others wait
+for its result.
+
+NearDuplicateIndex finds a user's earlier screenshots whose perceptual hash
+is close to a new upload's, through one BK-tree per user, so a re-screenshot
+of an unchanged screen can reuse the earlier result.
+
+Thread-safe: process_image runs in worker threads.
+"""
+
+import copy
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from dashboard_backend.database import SessionLocal
+from dashboard_backend.models import ExtractionCache, ImageFingerprint
+from bk_tree import BKTree
+
+EXTRACTION_CACHE_SIZE = int(os.getenv("EXTRACTION_CACHE_SIZE", "5000"))
+EXTRACTION_CACHE_MEMORY_SIZE = 256
+EXTRACTION_CACHE_TOUCH_SECONDS = 60
+# Screenshots per user kept for near-duplicate matching
+NEAR_DUPLICATE_HISTORY = int(os.getenv("NEAR_DUPLICATE_HISTORY", "20"))
+
+def cache_key(image_bytes: bytes, variant: str, version: str) -> str:
+    return f"{hashlib.sha256(image_bytes).hexdigest()}:{variant}:{version}"
+
+class ExtractionResultCache:
+    """Persistent LRU of extraction results with singleflight computation"""
+
+    def __init__(self, max_entries: int = EXTRACTION_CACHE_SIZE, memory_entries: int = EXTRACTION_CACHE_MEMORY_SIZE):
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self._memory = OrderedDict()    # cache_key -> result, least recently used first
+        self._inflight = {}             # cache_key -> Future of the computation in progress
+        self._touched = set()           # keys hit in memory since last_used_at was last written
+        self._touch_due = time.monotonic() + EXTRACTION_CACHE_TOUCH_SECONDS
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0
+
+    def get_or_compute(self, key: str, compute, cacheable) -> dict:
+        """Return the cached result for key, or compute() it once however many callers ask.
+
+        Only results for which cacheable(result) is true are stored. Callers
+        get their own copy, marked "cached" if it is a stored result or one they
+        shared with a concurrent caller; a shared failure is never "cached".
+        """
+        self._flush_touched()
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self._touched.add(key)
+                self.hits += 1
+                return self._copy(self._memory[key], cached=True)
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+            else:
+                self.shared += 1
+
+        if not leader:
+            result = future.result()
+            return self._copy(result, cached=cacheable(result))
+
+        cached = False
+        try:
+            result = self._load(key)
+            cached = result is not None and cacheable(result)
+            if not cached:
+                result = compute()
+                if cacheable(result):
+                    self._store(key, result)
+            if cacheable(result):
+                self._remember(key, result)
+            future.set_result(result)
+            return self._copy(result, cached=cached)
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+                if cached:
+                    self.hits += 1
+                else:
+                    self.misses += 1
+
+    def lookup(self, key: str):
+        """Copy of the stored result for key, or None; never computes"""
+        self._flush_touched()
+        with self._lock:
+            result = self._memory.get(key)
+            if result is not None:
+                self._memory.move_to_end(key)
+                self._touched.add(key)
+        if result is None:
+            result = self._load(key)
+            if result is None:
+                return None
+            self._remember(key, result)
+        return self._copy(result, cached=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "shared": self.shared, "in_memory": len(self._memory)}
+
+    @staticmethod
+    def _copy(result: dict, cached: bool) -> dict:
+        result = copy.deepcopy(result)
+        result["cached"] = cached
+        return result
+
+    def _remember(self, key: str, result: dict):
+        with self._lock:
+            self._memory[key] = result
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def _take_touched(self, force: bool = False) -> list:
+        """Keys hit in memory whose last_used_at is due to be written (all of them if force)"""
+        with self._lock:
+            if not self._touched or not (force or time.monotonic() >= self._touch_due):
+                return []
+            keys = list(self._touched)
+            self._touched.clear()
+            self._touch_due = time.monotonic() + EXTRACTION_CACHE_TOUCH_SECONDS
+            return keys
+
+    @staticmethod
+    def _touch_rows(db, keys: list):
+        if keys:
+            db.execute(
+                ExtractionCache.__table__.update()
+                .where(ExtractionCache.cache_key.in_(keys))
+                .values(last_used_at=func.now())
+            )
+
+    def _flush_touched(self, force: bool = False):
+        """Write last_used_at for memory hits in one UPDATE; errors are only logged"""
+        keys = self._take_touched(force)
+        if not keys:
+            return
+        db = SessionLocal()
+        try:
+            self._touch_rows(db, keys)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"⚠️ Extraction cache touch failed: {e}")
+        finally:
+            db.close()
+
+    def _load(self, key: str):
+        """Stored result for key (marking it used), or None; database errors count as a miss"""
+        db = SessionLocal()
+        try:
+            result = db.execute(
+                ExtractionCache.__table__.update()
+                .where(ExtractionCache.cache_key == key)
+                .values(last_used_at=func.now())
+                .returning(ExtractionCache.result)
+            ).scalar()
+            db.commit()
+            return result
+        except Exception as e:
+            db.rollback()
+            print(f"⚠️ Extraction cache lookup failed: {e}")
+            return None
+        finally:
+            db.close()
+
+    def _store(self, key: str, result: dict):
+        """Upsert a result and evict the least recently used rows beyond max_entries.
+
+        Pending memory hits are written first, so they count as recent.
+        """
+        touched = self._take_touched(force=True)
+        db = SessionLocal()
+        try:
+            self._touch_rows(db, touched)
+            db.execute(
+                pg_insert(ExtractionCache)
+                .values(cache_key=key, result=result)
+                .on_conflict_do_update(
+                    index_elements=[ExtractionCache.cache_key],
+                    set_={"result": result, "last_used_at": func.now()}
+                )
+            )
+            evicted = select(ExtractionCache.cache_key).order_by(
+                ExtractionCache.last_used_at.desc()
+            ).offset(self.max_entries)
+            db.query(ExtractionCache).filter(
+                ExtractionCache.cache_key.in_(evicted)
+            ).delete(synchronize_session=False)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"⚠️ Extraction cache store failed: {e}")
+        finally:
+            db.close()
+
+def _signed(image_hash: int) -> int:
+    """64-bit unsigned hash to the BIGINT range, and back with _unsigned"""
+    return image_hash - (1 << 64) if image_hash >= (1 << 63) else image_hash
+
+def _unsigned(image_hash: int) -> int:
+    return image_hash + (1 << 64) if image_hash < 0 else image_hash
+
+class NearDuplicateIndex:
+    """Per-user BK-trees of screenshot hashes, backed by image_fingerprint.
+
+    A user's tree is loaded on their first lookup and dropped whenever older
+    fingerprints are evicted, so it is rebuilt from the kept ones.
+    """
+
+    def __init__(self, history: int = NEAR_DUPLICATE_HISTORY):
+        self.history = history
+        self._trees = {}    # discordid -> BKTree of (cache_key, thumbnail)
+        self._lock = threading.Lock()
+
+    def find(self, discord_id: str, image_hash: int, max_distance: int, key_suffix: str) -> list:
+        """[(distance, cache_key, thumbnail)] of the user's screenshots within max_distance,
+        nearest first, limited to cache keys ending in key_suffix (same forced type and version)"""
+        tree = self._tree(discord_id)
+        if tree is None:
+            return []
+        with self._lock:
+            matches = tree.search(image_hash, max_distance)
+        return [
+            (distance, cache_key, thumbnail)
+            for distance, (cache_key, thumbnail) in matches
+            if cache_key.endswith(key_suffix)
+        ]
+
+    def add(self, discord_id: str, image_hash: int, thumbnail: bytes, cache_key: str):
+        """Record a screenshot and evict the user's oldest beyond history; errors are only logged"""
+        db = SessionLocal()
+        try:
+            db.execute(
+                pg_insert(ImageFingerprint)
+                .values(discordid=discord_id, cache_key=cache_key, image_hash=_signed(image_hash), thumbnail=thumbnail)
+                .on_conflict_do_nothing()
+            )
+            kept = select(ImageFingerprint.cache_key).where(
+                ImageFingerprint.discordid == discord_id
+            ).order_by(ImageFingerprint.created_at.desc()).limit(self.history)
+            evicted = db.query(ImageFingerprint).filter(
+                ImageFingerprint.discordid == discord_id,
+                ImageFingerprint.cache_key.not_in(kept)
+            ).delete(synchronize_session=False)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"⚠️ Image fingerprint store failed: {e}")
+            return
+        finally:
+            db.close()
+
+        with self._lock:
+            if evicted:
+                self._trees.pop(discord_id, None)
+            elif discord_id in self._trees:
+                self._trees[discord_id].add(image_hash, (cache_key, thumbnail))
+
+    def _tree(self, discord_id: str):
+        with self._lock:
+            tree = self._trees.get(discord_id)
+        if tree is not None:
+            return tree
+
+        db = SessionLocal()
+        try:
+            rows = db.query(
+                ImageFingerprint.image_hash, ImageFingerprint.cache_key, ImageFingerprint.thumbnail
+            ).filter(ImageFingerprint.discordid == discord_id).all()
+        except Exception as e:
+            print(f"⚠️ Image fingerprint lookup failed: {e}")
+            return None
+        finally:
+            db.close()
+
+        tree = BKTree()
+        for image_hash, cache_key, thumbnail in rows:
+            tree.add(_unsigned(image_hash), (cache_key, bytes(thumbnail)))
+        with self._lock:
+            return self._trees.setdefault(discord_id, tree)
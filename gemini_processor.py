@@ -1,24 +1,109 @@
 import google.generativeai as genai
 import os
-import re
 import json
+import math
 import requests
+import numpy as np
 from PIL import Image
 from io import BytesIO
+from typing import Union
 from dotenv import load_dotenv
+from extraction_cache import ExtractionResultCache, NearDuplicateIndex, cache_key
+from image_fetch import MAX_IMAGE_BYTES
 
 # Load environment variables
 load_dotenv()
 
 # Configure Gemini
 genai.configure(api_key=os.getenv('GOOGLE_API_KEY'))
-model = genai.GenerativeModel('gemini-1.5-pro-002')
+MODEL_NAME = 'gemini-1.5-pro-002'
+model = genai.GenerativeModel(MODEL_NAME)
 
-def download_image(image_url: str) -> Image.Image:
-    """Download image from URL and return PIL Image object"""
-    response = requests.get(image_url, timeout=20)
-    response.raise_for_status()
-    return Image.open(BytesIO(response.content))
+# Bump when a prompt, the response checks or the value normalization change,
+# so cached extractions made the old way are not reused
+PROMPT_VERSION = 3
+EXTRACTION_VERSION = f"{MODEL_NAME}/p{PROMPT_VERSION}"
+extraction_cache = ExtractionResultCache()
+near_duplicates = NearDuplicateIndex()
+
+# "combined" classifies and extracts in one request and falls back to the
+# multi-step path (detect -> validate -> extract) if its response fails validation;
+# "multistep" always uses the multi-step path.
+EXTRACTION_MODE = os.getenv('GEMINI_EXTRACTION_MODE', 'combined').lower()
+
+STATS_KEYS = [
+    "game_started", "coins_earned", "cash_earned", "stones_earned", "damage_dealt",
+    "enemies_destroyed", "waves_completed", "upgrades_bought", "workshop_upgrades",
+    "workshop_coins_spent", "research_completed", "lab_coins_spent", "free_upgrades",
+    "interest_earned", "orb_kills", "death_ray_kills", "thorn_damage", "waves_skipped"
+]
+TIER_NUMBERS = range(1, 19)
+
+# Local layout classifier: a "stats" or "tier" verdict at or above this
+# confidence skips the Gemini classification; above 1 (the default, until it is
+# tuned on real screenshots) always asks Gemini
+LOCAL_CLASSIFIER_THRESHOLD = float(os.getenv('LOCAL_CLASSIFIER_THRESHOLD', '1.1'))
+LOCAL_CLASSIFIER_WIDTH = 360      # images are analysed at about this width
+INK_CONTRAST = 60                 # grey-level distance from the background that counts as text
+COLUMN_GAP = 0.04                 # gaps narrower than this share of the width join one column
+
+# Near duplicates: a user's earlier screenshot within NEAR_DUPLICATE_DISTANCE
+# dHash bits is a candidate; it is reused only if the thumbnails match too,
+# since a dHash cannot see one changed digit but the thumbnail can
+NEAR_DUPLICATE_DISTANCE = int(os.getenv('NEAR_DUPLICATE_DISTANCE', '6'))
+STATUS_BAR_SHARE = 0.06           # top of the screenshot ignored (clock, battery)
+THUMBNAIL_WIDTH = 160
+THUMBNAIL_TOLERANCE = 24          # grey levels; re-encoding stays below this, a changed digit does not
+
+# Preprocessing: the model gets the screenshot encoded once as WebP (quality
+# 100 = lossless) or PNG instead of on every request, optionally cropped to its
+# content (no status bar or borders) and at most PREPROCESS_MAX_EDGE pixels long
+# (0 = full size). Off by default; the defaults when on are lossless and full
+# size. Enable the crop, downscaling or lossy settings only after
+# benchmarks/bench_preprocessing.py --extract shows no accuracy loss with them.
+PREPROCESS_IMAGES = os.getenv('PREPROCESS_IMAGES', 'false').lower() == 'true'
+PREPROCESS_CROP = os.getenv('PREPROCESS_CROP', 'false').lower() == 'true'
+PREPROCESS_MAX_EDGE = int(os.getenv('PREPROCESS_MAX_EDGE', '0'))
+PREPROCESS_GRAYSCALE = os.getenv('PREPROCESS_GRAYSCALE', 'false').lower() == 'true'
+PREPROCESS_FORMAT = os.getenv('PREPROCESS_FORMAT', 'webp').lower()
+PREPROCESS_QUALITY = int(os.getenv('PREPROCESS_QUALITY', '100'))
+
+# What the model calls accept: a PIL image, or an encoded {"mime_type", "data"} blob
+ModelImage = Union[Image.Image, dict]
+
+# Images with more pixels than this are refused before decoding
+MAX_IMAGE_PIXELS = 40_000_000
+
+def download_image_bytes(image_url: str) -> bytes:
+    """Download an image and return its raw bytes, refusing more than MAX_IMAGE_BYTES"""
+    with requests.get(image_url, timeout=20, stream=True) as response:
+        response.raise_for_status()
+        if int(response.headers.get("Content-Length") or 0) > MAX_IMAGE_BYTES:
+            raise ValueError(f"Image is larger than {MAX_IMAGE_BYTES // (1024 * 1024)} MB")
+        chunks, size = [], 0
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            size += len(chunk)
+            if size > MAX_IMAGE_BYTES:
+                raise ValueError(f"Image is larger than {MAX_IMAGE_BYTES // (1024 * 1024)} MB")
+            chunks.append(chunk)
+    return b"".join(chunks)
+
+def open_image(image_bytes: bytes) -> Image.Image:
+    """Open an image without decoding more pixels than preprocessing keeps.
+
+    JPEGs are decoded in draft mode, scaled down by a power of two as long as
+    the long edge stays at or above PREPROCESS_MAX_EDGE (if set). Images over
+    MAX_IMAGE_PIXELS are refused before decoding.
+    """
+    image = Image.open(BytesIO(image_bytes))
+    width, height = image.size
+    if width * height > MAX_IMAGE_PIXELS:
+        raise ValueError(f"Image is too large ({width}x{height})")
+    long_edge = max(width, height)
+    if PREPROCESS_IMAGES and PREPROCESS_MAX_EDGE and long_edge > PREPROCESS_MAX_EDGE:
+        scale = PREPROCESS_MAX_EDGE / long_edge
+        image.draft("RGB", (math.ceil(width * scale), math.ceil(height * scale)))
+    return image
 
 def clean_gemini_response(response_text: str) -> str:
     """Clean Gemini response by removing markdown code blocks"""
@@ -61,7 +146,181 @@ def normalize_stat_value(value: str) -> str:
     
     return value
 
-def detect_image_type(image: Image.Image) -> dict:
+def _runs(mask: np.ndarray, min_gap: int = 1) -> list:
+    """(start, end) of the True runs in a 1-D mask; runs split by fewer than min_gap False values are joined"""
+    padded = np.concatenate(([False], mask, [False]))
+    edges = np.flatnonzero(padded[1:] != padded[:-1])
+    runs = []
+    for start, end in zip(edges[::2], edges[1::2]):
+        if runs and start - runs[-1][1] < min_gap:
+            runs[-1] = (runs[-1][0], end)
+        else:
+            runs.append((start, end))
+    return runs
+
+def _reduced(image: Image.Image) -> Image.Image:
+    """RGB copy about LOCAL_CLASSIFIER_WIDTH wide, by integer box reduction
+    (several times cheaper than resampling to an exact width)"""
+    if image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+    return image.reduce(max(1, round(image.width / LOCAL_CLASSIFIER_WIDTH))).convert("RGB")
+
+def _ink(small: Image.Image) -> np.ndarray:
+    """Mask of pixels that stand out from the background (the most common grey level)"""
+    gray = np.asarray(small.convert("L"), dtype=np.int16)
+    return np.abs(gray - int(np.median(gray))) > INK_CONTRAST
+
+def layout_features(image: Image.Image) -> dict:
+    """Geometry, colour and row-structure features of a screenshot.
+
+    Both screens are tables of light text on a flat background: a stats screen
+    has two columns per row (label, value), a tier screen three (tier, wave, coins).
+    """
+    width, height = image.size
+    small = _reduced(image)
+    small_width = small.width
+    rgb = np.asarray(small)
+
+    # Share of pixels in the most common colour bin (16 levels per channel);
+    # UI screenshots have one dominant background, photos do not
+    bins = (rgb >> 4).astype(np.int32)
+    histogram = np.bincount((bins[..., 0] * 256 + bins[..., 1] * 16 + bins[..., 2]).ravel(), minlength=4096)
+    background_share = histogram.max() / histogram.sum()
+
+    ink = _ink(small)
+    text_rows = ink.mean(axis=1) > 0.01
+
+    columns_per_line = []
+    for top, bottom in _runs(text_rows):
+        if bottom - top < 3:
+            continue
+        columns = _runs(ink[top:bottom].any(axis=0), min_gap=round(small_width * COLUMN_GAP))
+        columns_per_line.append(len(columns))
+
+    return {
+        "aspect_ratio": round(height / width, 2),
+        "background_share": round(float(background_share), 3),
+        "text_lines": len(columns_per_line),
+        "two_column_lines": columns_per_line.count(2),
+        "three_column_lines": columns_per_line.count(3)
+    }
+
+def classify_locally(image: Image.Image) -> dict:
+    """Classify a screenshot as stats, tier or unknown from its layout alone (no API call).
+
+    Confidence is the share of table rows with the winning column count,
+    scaled down when there are fewer rows than a full screen (18). A few rows
+    of the other kind (status bar, headings, the tier screen's summary) are expected.
+    """
+    features = layout_features(image)
+    two, three = features["two_column_lines"], features["three_column_lines"]
+    if features["background_share"] < 0.3 or two + three < 8:
+        return {
+            "image_type": "unknown",
+            "confidence": 0.0,
+            "reason": f"Not a table screenshot: {features}",
+            "features": features
+        }
+
+    (image_type, rows), other_rows = (("tier", three), two) if three > two else (("stats", two), three)
+    confidence = rows / (rows + max(other_rows - 3, 0)) * min(rows / 18, 1.0)
+    return {
+        "image_type": image_type,
+        "confidence": round(confidence, 2),
+        "reason": f"Local layout: {two} two-column and {three} three-column rows",
+        "features": features
+    }
+
+def screenshot_fingerprint(image: Image.Image) -> tuple:
+    """(64-bit dHash, greyscale thumbnail) of the screenshot below the status bar"""
+    width, height = image.size
+    body = image.crop((0, round(height * STATUS_BAR_SHARE), width, height)).convert("L")
+    gradient = np.asarray(body.resize((9, 8), Image.BOX), dtype=np.int16)
+    bits = (gradient[:, 1:] > gradient[:, :-1]).ravel()
+    image_hash = int.from_bytes(np.packbits(bits).tobytes(), "big")
+    thumbnail = body.resize((THUMBNAIL_WIDTH, max(1, round(body.height * THUMBNAIL_WIDTH / width))), Image.BOX)
+    return image_hash, thumbnail
+
+def thumbnail_bytes(thumbnail: Image.Image) -> bytes:
+    buffer = BytesIO()
+    thumbnail.save(buffer, "PNG", optimize=True)
+    return buffer.getvalue()
+
+def same_screen(thumbnail: Image.Image, stored: bytes) -> bool:
+    """True if two thumbnails match pixel for pixel within THUMBNAIL_TOLERANCE"""
+    other = Image.open(BytesIO(stored))
+    if other.size != thumbnail.size:
+        return False
+    difference = np.abs(np.asarray(thumbnail, dtype=np.int16) - np.asarray(other, dtype=np.int16))
+    return int(difference.max()) <= THUMBNAIL_TOLERANCE
+
+def find_near_duplicate(discord_id: str, image_hash: int, thumbnail: Image.Image, key_suffix: str):
+    """The stored result of the user's earlier screenshot of the same screen, or None"""
+    for distance, earlier_key, stored in near_duplicates.find(discord_id, image_hash, NEAR_DUPLICATE_DISTANCE, key_suffix):
+        if not same_screen(thumbnail, stored):
+            continue
+        result = extraction_cache.lookup(earlier_key)
+        if result is not None:
+            print(f"[DEBUG] Near duplicate of {earlier_key[:12]}… (dHash distance {distance})")
+            result.pop("cached", None)
+            result["near_duplicate"] = True
+            return result
+    return None
+
+def crop_to_content(image: Image.Image) -> Image.Image:
+    """Cut the phone status bar and the plain borders around the screen's content"""
+    small = _reduced(image)
+    ink = _ink(small)
+    bands = _runs(ink.mean(axis=1) > 0.01)
+    if not bands:
+        return image
+    margin = max(2, round(small.width * 0.02))
+
+    top = bands[0][0] - margin
+    # A first text row that ends inside the status bar area is the clock and battery
+    if len(bands) > 1 and bands[0][1] <= small.height * STATUS_BAR_SHARE:
+        top = (bands[0][1] + bands[1][0]) // 2
+    top = max(top, 0)
+    columns = np.flatnonzero(ink[top:].any(axis=0))
+    left, right = max(columns[0] - margin, 0), min(columns[-1] + 1 + margin, small.width)
+    bottom = min(bands[-1][1] + margin, small.height)
+
+    scale_x, scale_y = image.width / small.width, image.height / small.height
+    return image.crop((round(left * scale_x), round(top * scale_y), round(right * scale_x), round(bottom * scale_y)))
+
+def preprocess_image(image: Image.Image) -> Image.Image:
+    """Optionally crop, downscale to PREPROCESS_MAX_EDGE and convert to greyscale"""
+    if PREPROCESS_CROP:
+        image = crop_to_content(image)
+    if PREPROCESS_MAX_EDGE and max(image.size) > PREPROCESS_MAX_EDGE:
+        image = image.copy()
+        image.thumbnail((PREPROCESS_MAX_EDGE, PREPROCESS_MAX_EDGE), Image.LANCZOS)
+    if PREPROCESS_GRAYSCALE:
+        return image.convert("L")
+    return image if image.mode in ("RGB", "L") else image.convert("RGB")
+
+def encode_image(image: Image.Image) -> dict:
+    """Blob for generate_content in PREPROCESS_FORMAT"""
+    buffer = BytesIO()
+    if PREPROCESS_FORMAT == "png":
+        image.save(buffer, "PNG")
+        return {"mime_type": "image/png", "data": buffer.getvalue()}
+    image.save(buffer, "WEBP", quality=PREPROCESS_QUALITY, lossless=PREPROCESS_QUALITY >= 100)
+    return {"mime_type": "image/webp", "data": buffer.getvalue()}
+
+def prepare_model_image(image: Image.Image) -> ModelImage:
+    """The image to send to Gemini: preprocessed and encoded once for all requests.
+
+    With PREPROCESS_IMAGES=false the PIL image is passed through and the
+    SDK encodes it at full size (lossless WebP) on every request.
+    """
+    if not PREPROCESS_IMAGES:
+        return image
+    blob = encode_image(preprocess_image(image))
+    print(f"[DEBUG] Preprocessed image for Gemini: {image.size} → {len(blob['data']):,} bytes {blob['mime_type']}")
+    return blob
+
+def detect_image_type(image: ModelImage) -> dict:
     """Detect if image is stats, tier, or invalid"""
     prompt = """
     Analyze this game screenshot and determine its type.
@@ -118,8 +377,40 @@ def detect_image_type(image: Image.Image) -> dict:
             "reason": f"Error processing image: {str(e)}"
         }
 
-def validate_tier_detection(image: Image.Image, initial_classification: dict) -> dict:
-    """Strict validation: Stats if 'Game Started'+'Coins Earned'+'Cash Earned'; else require ALL tiers 1-18, otherwise invalid."""
+def classify_from_evidence(evidence: dict) -> dict:
+    """Strict rules: Stats if 'Game Started'+'Coins Earned'+'Cash Earned'; else require ALL tiers 1-18, otherwise invalid.
+
+    evidence: {"game_started": bool, "coins_earned": bool, "cash_earned": bool, "tier_labels": [tier numbers seen]}
+    """
+    # 1) Stats check: must include all three labels
+    if evidence["game_started"] and evidence["coins_earned"] and evidence["cash_earned"]:
+        print("[DEBUG] Detected required stats labels → classifying as stats")
+        return {
+            "image_type": "stats",
+            "confidence": 0.99,
+            "reason": "Detected 'Game Started', 'Coins Earned', and 'Cash Earned'"
+        }
+
+    # 2) Tier check: require all tiers 1..18 present
+    missing_tiers = [i for i in TIER_NUMBERS if i not in evidence["tier_labels"]]
+    if not missing_tiers:
+        print("[DEBUG] Detected all tier labels 1..18 → classifying as tier")
+        return {
+            "image_type": "tier",
+            "confidence": 0.99,
+            "reason": "Detected all tiers 1-18"
+        }
+
+    # 3) Otherwise invalid
+    print(f"[DEBUG] Missing tier labels: {missing_tiers} → invalid")
+    return {
+        "image_type": "invalid",
+        "confidence": 0.95,
+        "reason": f"Missing tier labels: {', '.join(map(str, missing_tiers))}"
+    }
+
+def validate_tier_detection(image: ModelImage, initial_classification: dict) -> dict:
+    """Read all text in the image and classify it with classify_from_evidence"""
     text_prompt = (
         "Extract ALL readable text from this image. Return ONLY the raw text, no formatting, no JSON, no extra words."
     )
@@ -128,38 +419,13 @@ def validate_tier_detection(image: Image.Image, initial_classification: dict) ->
         extracted_text = text_response.text.strip().lower()
         print(f"[DEBUG] Extracted text for validation: {extracted_text}")
 
-        # 1) Stats check: must include all three labels
-        has_game_started = "game started" in extracted_text
-        has_coins_earned = "coins earned" in extracted_text
-        has_cash_earned = "cash earned" in extracted_text
-        if has_game_started and has_coins_earned and has_cash_earned:
-            print("[DEBUG] Detected required stats labels → classifying as stats")
-            return {
-                "image_type": "stats",
-                "confidence": 0.99,
-                "reason": "Detected 'Game Started', 'Coins Earned', and 'Cash Earned'"
-            }
-
-        # 2) Tier check: require all tiers 1..18 present
-        missing_tiers = []
-        for i in range(1, 19):
-            if f"tier {i}" not in extracted_text:
-                missing_tiers.append(i)
-        if not missing_tiers:
-            print("[DEBUG] Detected all tier labels 1..18 → classifying as tier")
-            return {
-                "image_type": "tier",
-                "confidence": 0.99,
-                "reason": "Detected all tiers 1-18"
-            }
-
-        # 3) Otherwise invalid
-        print(f"[DEBUG] Missing tier labels: {missing_tiers} → invalid")
-        return {
-            "image_type": "invalid",
-            "confidence": 0.95,
-            "reason": f"Missing tier labels: {', '.join(map(str, missing_tiers))}"
+        evidence = {
+            "game_started": "game started" in extracted_text,
+            "coins_earned": "coins earned" in extracted_text,
+            "cash_earned": "cash earned" in extracted_text,
+            "tier_labels": [i for i in TIER_NUMBERS if f"tier {i}" in extracted_text]
         }
+        return classify_from_evidence(evidence)
 
     except Exception as e:
         print(f"[DEBUG] Error in validation: {e}")
@@ -167,7 +433,15 @@ def validate_tier_detection(image: Image.Image, initial_classification: dict) ->
 
 
 
-def extract_stats_data(image: Image.Image) -> dict:
+def normalize_stats(result: dict) -> dict:
+    """Normalize extracted stat values to fix OCR misreads (dates are left alone)"""
+    if result and isinstance(result, dict):
+        for key, value in result.items():
+            if key != "game_started" and value:
+                result[key] = normalize_stat_value(str(value))
+    return result
+
+def extract_stats_data(image: ModelImage) -> dict:
     """Extract stats data from a stats screenshot"""
     prompt = """
     Extract game statistics from this screenshot.
@@ -211,14 +485,7 @@ def extract_stats_data(image: Image.Image) -> dict:
         response_text = clean_gemini_response(response.text)
         print(f"[DEBUG] Cleaned stats response text: {response_text}")
             
-        result = json.loads(response_text)
-        
-        # Normalize stat values to fix OCR misreads
-        if result and isinstance(result, dict):
-            for key, value in result.items():
-                if key != "game_started" and value:  # Don't normalize dates
-                    result[key] = normalize_stat_value(str(value))
-        
+        result = normalize_stats(json.loads(response_text))
         print(f"[DEBUG] Stats extraction result: {result}")
         return result
     except Exception as e:
@@ -226,7 +493,7 @@ def extract_stats_data(image: Image.Image) -> dict:
         print(f"[DEBUG] Response text was: {getattr(response, 'text', 'No response')}")
         return {"error": f"Failed to extract stats: {str(e)}"}
 
-def extract_tier_data(image: Image.Image) -> dict:
+def extract_tier_data(image: ModelImage) -> dict:
     """Extract tier data from a tier screenshot"""
     prompt = """
     Extract tier progress data from this screenshot.
@@ -288,56 +555,296 @@ def extract_tier_data(image: Image.Image) -> dict:
         print(f"[DEBUG] Error in tier extraction: {e}")
         return {"error": f"Failed to extract tier data: {str(e)}"}
 
-def process_image(image_url: str, force_type: str = None) -> dict:
-    """Main function to process any game screenshot"""
-    print(f"[DEBUG] Processing image: {image_url}")
-    
+def extract_combined(image: ModelImage) -> dict:
+    """Classify and extract a screenshot in one request.
+
+    Returns the model's JSON: classification, the labels the validation rules
+    need ("evidence"), and the stats or tier payload.
+    """
+    stats_format = ",\n            ".join(
+        f'"{key}": "{"DDMMYYYY format" if key == "game_started" else "value with suffix"}"' for key in STATS_KEYS
+    )
+    tiers_format = ",\n                ".join(f'"{i}": {{"wave": number, "coins": "value with suffix"}}' for i in TIER_NUMBERS)
+    prompt = f"""
+    Analyze this game screenshot: classify it and extract its data.
+
+    You must respond with ONLY a valid JSON object in this exact format:
+    {{
+        "image_type": "stats" | "tier" | "invalid",
+        "confidence": 0.0-1.0,
+        "reason": "brief explanation of why this classification was made",
+        "evidence": {{
+            "game_started": true if the label "Game Started" is visible, else false,
+            "coins_earned": true if the label "Coins Earned" is visible, else false,
+            "cash_earned": true if the label "Cash Earned" is visible, else false,
+            "tier_labels": [every number N for which the label "Tier N" is visible]
+        }},
+        "stats": null, or for a stats image {{
+            {stats_format}
+        }},
+        "tiers": null, or for a tier image {{
+            "summary": {{"thorn_damage": "value with suffix", "waves_skipped": "number"}},
+            "tiers": {{
+                {tiers_format}
+            }}
+        }}
+    }}
+
+    Classification rules:
+    - TIER IMAGE: shows "Tier 1", "Tier 2", ... with a wave number and coin amount for each tier
+    - STATS IMAGE: a list of game statistics such as "Game Started", "Coins Earned", "Cash Earned", "Damage Dealt"
+    - INVALID: anything else
+
+    Extraction rules:
+    - Fill only the payload matching image_type; the other one is null
+    - Stats: use null for missing values, keep original suffixes (K, M, B, T, O, etc.), game_started in DDMMYYYY format
+    - Tiers: use 0 for wave and "0" for coins if a tier has no data, keep original suffixes
+    - Report evidence exactly as seen, even if it contradicts image_type
+    - Be very precise with the values
+
+    Do not include any other text, only the JSON object.
+    """
+
+    response = model.generate_content(
+        [prompt, image],
+        generation_config={"response_mime_type": "application/json"}
+    )
+    print(f"[DEBUG] Raw Gemini combined response: {response.text}")
+    return json.loads(clean_gemini_response(response.text))
+
+def validate_combined_response(result: dict, image_type: str) -> str:
+    """Check a combined response has the evidence and the payload for image_type.
+
+    Returns None if it is usable, otherwise what is wrong with it.
+    """
+    if not isinstance(result, dict):
+        return "response is not a JSON object"
+    evidence = result.get("evidence")
+    if not isinstance(evidence, dict):
+        return "missing evidence"
+    for label in ("game_started", "coins_earned", "cash_earned"):
+        if not isinstance(evidence.get(label), bool):
+            return f"evidence.{label} is not a boolean"
+    tier_labels = evidence.get("tier_labels")
+    if not isinstance(tier_labels, list) or not all(isinstance(i, int) and not isinstance(i, bool) for i in tier_labels):
+        return "evidence.tier_labels is not a list of numbers"
+
+    if image_type == "stats":
+        return validate_payload(image_type, result.get("stats"))
+    if image_type == "tier":
+        return validate_payload(image_type, result.get("tiers"))
+    return None
+
+def validate_payload(image_type: str, payload) -> str:
+    """Check a stats or tier payload has every field; None if it does, otherwise what is missing"""
+    if image_type == "stats":
+        stats = payload
+        if not isinstance(stats, dict):
+            return "missing stats payload"
+        missing = [key for key in STATS_KEYS if key not in stats]
+        if missing:
+            return f"stats payload is missing {', '.join(missing)}"
+        if any(not isinstance(value, (str, int, float, type(None))) for value in stats.values()):
+            return "stats payload has non-scalar values"
+    elif image_type == "tier":
+        tiers = payload
+        if not isinstance(tiers, dict) or not isinstance(tiers.get("tiers"), dict):
+            return "missing tiers payload"
+        for i in TIER_NUMBERS:
+            tier = tiers["tiers"].get(str(i))
+            if not isinstance(tier, dict) or "wave" not in tier or "coins" not in tier:
+                return f"tiers payload is missing tier {i}"
+    return None
+
+def process_image_combined(image: ModelImage, force_type: str = None) -> dict:
+    """Single-request pipeline; returns None if the response fails validation"""
     try:
-        # Download and process image
-        image = download_image(image_url)
-        print(f"[DEBUG] Image downloaded successfully: {image.size}")
-        
-        # Detect image type
-        type_result = detect_image_type(image)
-        print(f"[DEBUG] Initial image type: {type_result['image_type']} (confidence: {type_result['confidence']})")
-        
-        # Secondary validation for tier detection
-        validated_result = validate_tier_detection(image, type_result)
-        print(f"[DEBUG] Validated image type: {validated_result['image_type']} (confidence: {validated_result['confidence']})")
-        
-        result = {
-            "success": True,
-            "image_type": validated_result["image_type"],
-            "confidence": validated_result["confidence"],
-            "reason": validated_result["reason"],
-            "data": None
-        }
-        
-        # Allow callers to force a specific type
-        if force_type in ("stats", "tier"):
-            print(f"[DEBUG] Force type override requested: {force_type}")
-            result["image_type"] = force_type
-            result["reason"] = f"Forced as {force_type} by caller"
-
-        # Extract data based on (possibly forced) type
-        if result["image_type"] == "stats":
-            result["data"] = extract_stats_data(image)
-        elif result["image_type"] == "tier":
-            result["data"] = extract_tier_data(image)
-        else:
-            result["data"] = {"error": "Invalid image type"}
-            
+        combined = extract_combined(image)
+    except Exception as e:
+        print(f"[DEBUG] Error in combined extraction: {e}")
+        return None
+
+    # Same rules as validate_tier_detection, applied to the labels the model reported
+    problem = validate_combined_response(combined, "invalid")
+    if problem:
+        print(f"⚠️ Combined response rejected ({problem}), falling back to multi-step extraction")
+        return None
+    validated_result = classify_from_evidence(combined["evidence"])
+    print(f"[DEBUG] Combined image type: {validated_result['image_type']} (model said {combined.get('image_type')})")
+
+    result = {
+        "success": True,
+        "pipeline": "combined",
+        "image_type": validated_result["image_type"],
+        "confidence": validated_result["confidence"],
+        "reason": validated_result["reason"],
+        "data": None
+    }
+
+    if force_type in ("stats", "tier"):
+        print(f"[DEBUG] Force type override requested: {force_type}")
+        result["image_type"] = force_type
+        result["reason"] = f"Forced as {force_type} by caller"
+
+    problem = validate_combined_response(combined, result["image_type"])
+    if problem:
+        print(f"⚠️ Combined response rejected ({problem}), falling back to multi-step extraction")
+        return None
+
+    if result["image_type"] == "stats":
+        result["data"] = normalize_stats(combined["stats"])
+    elif result["image_type"] == "tier":
+        result["data"] = combined["tiers"]
+    else:
+        result["data"] = {"error": "Invalid image type"}
+    return result
+
+def process_image_multistep(image: ModelImage, force_type: str = None) -> dict:
+    """Detect, validate, then extract: three requests"""
+    # Detect image type
+    type_result = detect_image_type(image)
+    print(f"[DEBUG] Initial image type: {type_result['image_type']} (confidence: {type_result['confidence']})")
+
+    # Secondary validation for tier detection
+    validated_result = validate_tier_detection(image, type_result)
+    print(f"[DEBUG] Validated image type: {validated_result['image_type']} (confidence: {validated_result['confidence']})")
+
+    result = {
+        "success": True,
+        "pipeline": "multistep",
+        "image_type": validated_result["image_type"],
+        "confidence": validated_result["confidence"],
+        "reason": validated_result["reason"],
+        "data": None
+    }
+
+    # Allow callers to force a specific type
+    if force_type in ("stats", "tier"):
+        print(f"[DEBUG] Force type override requested: {force_type}")
+        result["image_type"] = force_type
+        result["reason"] = f"Forced as {force_type} by caller"
+
+    # Extract data based on (possibly forced) type
+    if result["image_type"] == "stats":
+        result["data"] = extract_stats_data(image)
+    elif result["image_type"] == "tier":
+        result["data"] = extract_tier_data(image)
+    else:
+        result["data"] = {"error": "Invalid image type"}
+
+    return result
+
+def payload_evidence(image_type: str, payload: dict) -> dict:
+    """Evidence for classify_from_evidence from an extracted payload: the stats labels with values, or the tiers present"""
+    stats = payload if image_type == "stats" else {}
+    tiers = payload.get("tiers", {}) if image_type == "tier" else {}
+    return {
+        "game_started": bool(stats.get("game_started")),
+        "coins_earned": bool(stats.get("coins_earned")),
+        "cash_earned": bool(stats.get("cash_earned")),
+        "tier_labels": [i for i in TIER_NUMBERS if isinstance(tiers.get(str(i)), dict)]
+    }
+
+def process_image_local(image: ModelImage, local_result: dict) -> dict:
+    """Extract with the type the local classifier is confident about: one request.
+
+    The payload must pass the same field and label checks as the Gemini
+    classification; returns None if it does not.
+    """
+    result = {
+        "success": True,
+        "pipeline": "local",
+        "image_type": local_result["image_type"],
+        "confidence": local_result["confidence"],
+        "reason": local_result["reason"],
+        "data": None
+    }
+    if result["image_type"] == "stats":
+        result["data"] = extract_stats_data(image)
+    else:
+        result["data"] = extract_tier_data(image)
+
+    problem = validate_payload(result["image_type"], result["data"])
+    if problem is None:
+        verdict = classify_from_evidence(payload_evidence(result["image_type"], result["data"]))
+        if verdict["image_type"] != result["image_type"]:
+            problem = f"labels say {verdict['image_type']}: {verdict['reason']}"
+    if problem:
+        print(f"⚠️ Local {result['image_type']} extraction rejected ({problem}), falling back to Gemini classification")
+        return None
+    return result
+
+def extract_image(image: Image.Image, force_type: str = None) -> dict:
+    """Classify and extract a screenshot with the cheapest pipeline that works"""
+    result = None
+    local_result = classify_locally(image)
+    print(f"[DEBUG] Local image type: {local_result['image_type']} (confidence: {local_result['confidence']})")
+    model_image = prepare_model_image(image)
+    if (force_type is None and local_result["image_type"] != "unknown"
+            and local_result["confidence"] >= LOCAL_CLASSIFIER_THRESHOLD):
+        result = process_image_local(model_image, local_result)
+    if result is None and EXTRACTION_MODE == "combined":
+        result = process_image_combined(model_image, force_type)
+    if result is None:
+        result = process_image_multistep(model_image, force_type)
+    return result
+
+def is_cacheable(result: dict) -> bool:
+    """Only complete stats/tier extractions are cached; errors may be transient"""
+    data = result.get("data")
+    return bool(result.get("success") and result.get("image_type") in ("stats", "tier")
+                and isinstance(data, dict) and "error" not in data)
+
+def error_result(error: Exception) -> dict:
+    return {
+        "success": False,
+        "error": str(error),
+        "image_type": "unknown",
+        "confidence": 0.0,
+        "reason": f"Processing error: {str(error)}",
+        "data": None
+    }
+
+def process_image_bytes(image_bytes: bytes, force_type: str = None, discord_id: str = None) -> dict:
+    """Process a downloaded game screenshot.
+
+    Results are cached by image content: re-uploading the same screenshot
+    costs a hash and a lookup. With a discord_id, a re-screenshot of a screen
+    the user already uploaded reuses that extraction too.
+    """
+    try:
+        key_suffix = f":{force_type or 'auto'}:{EXTRACTION_VERSION}"
+        key = cache_key(image_bytes, force_type or "auto", EXTRACTION_VERSION)
+
+        def extract():
+            image = open_image(image_bytes)
+            print(f"[DEBUG] Image opened: {image.size}")
+            if not discord_id:
+                return extract_image(image, force_type)
+
+            image_hash, thumbnail = screenshot_fingerprint(image)
+            result = find_near_duplicate(discord_id, image_hash, thumbnail, key_suffix)
+            if result is None:
+                result = extract_image(image, force_type)
+                if is_cacheable(result):
+                    near_duplicates.add(discord_id, image_hash, thumbnail_bytes(thumbnail), key)
+            return result
+
+        result = extraction_cache.get_or_compute(key, extract, is_cacheable)
+        if result["cached"]:
+            print(f"[DEBUG] Extraction cache hit: {key[:12]}…")
         return result
-        
+
     except Exception as e:
         print(f"[DEBUG] Error processing image: {e}")
-        return {
-            "success": False,
-            "error": str(e),
-            "image_type": "unknown",
-            "confidence": 0.0,
-            "reason": f"Processing error: {str(e)}",
-            "data": None
-        }
+        return error_result(e)
 
- 
\ No newline at end of file
+def process_image(image_url: str, force_type: str = None, discord_id: str = None) -> dict:
+    """Main function to process any game screenshot: download it, then process_image_bytes"""
+    print(f"[DEBUG] Processing image: {image_url}")
+    try:
+        image_bytes = download_image_bytes(image_url)
+    except Exception as e:
+        print(f"[DEBUG] Error downloading image: {e}")
+        return error_result(e)
+    return process_image_bytes(image_bytes, force_type, discord_id)
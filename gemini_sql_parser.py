@@ -1,108 +1,101 @@
-import json
 from datetime import datetime
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from dashboard_backend.models import UserStats, UserData, UserDataHistory
-from dotenv import load_dotenv
-import os
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from dashboard_backend.database import SessionLocal
+from dashboard_backend.models import UserStats, UserStatsLatest, UserData, UserTierHistory, UserTierBest, NUMERIC_STATS_FIELDS
+from dashboard_backend.number_codec import SUFFIXES_LONGEST_FIRST, parse_number, numeric_sort_key, parse_tier_string
 import re # Added for regex in parse_gemini_tier_to_sql
 
-# Load environment variables
-load_dotenv()
+def tier_numeric_columns(tier_values: dict) -> dict:
+    """Derive the numeric summary columns of UserData from its T1..T18 strings.
 
-# Database connection (using same config as dashboard_backend)
-POSTGRES_USER = os.getenv("POSTGRES_USER", "toweruser")
-POSTGRES_PASSWORD = os.getenv("POSTGRES_PASSWORD", "yourpassword")
-POSTGRES_DB = os.getenv("POSTGRES_DB", "towerscoreboard")
-POSTGRES_HOST = os.getenv("POSTGRES_HOST", "localhost")
-POSTGRES_PORT = os.getenv("POSTGRES_PORT", "5432")
-
-DATABASE_URL = (
-    f"postgresql+psycopg2://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}"
-)
+    Returns the best-of summaries (highest tier achieved, highest wave, highest
+    coins) used by leaderboards; per-tier rankings read user_tier_best instead.
+    Coin summaries also get a sortable *_key column for exact ordering.
+    """
+    columns = {}
+    highest = (0, 0, 0.0, 0)
+    max_wave, max_wave_tier = 0, 0
+    max_coins, max_coins_key, max_coins_tier = 0.0, 0, 0
 
-# Avoid logging full DB URL in production
+    for tier_num in range(1, 19):
+        tier_str = tier_values.get(f"T{tier_num}")
+        wave, coins, coins_display = parse_tier_string(tier_str)
+        coins_key = numeric_sort_key(coins_display)
 
-engine = create_engine(
-    DATABASE_URL,
-    echo=False,
-    future=True,
-    pool_pre_ping=True,           # validate connection before using
-    pool_recycle=1800,            # recycle connections every 30m
-    pool_size=5,                  # tune pool sizes
-    max_overflow=10,              # allow extra connections when pool is full
-    connect_args={                # TCP keepalives for psycopg2
-        "keepalives": 1,
-        "keepalives_idle": 30,
-        "keepalives_interval": 10,
-        "keepalives_count": 5,
-    },
-)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        if not tier_str:
+            continue
+        # A tier counts as achieved if it has any non-zero data
+        if wave > 0 or coins_key > 0:
+            highest = (tier_num, wave, coins, coins_key)
+        if wave > max_wave or not max_wave_tier:
+            max_wave, max_wave_tier = wave, tier_num
+        if coins_key > max_coins_key or not max_coins_tier:
+            max_coins, max_coins_key, max_coins_tier = coins, coins_key, tier_num
 
-# Define suffixes for number formatting
-SUFFIXES = {
-    'K': 1_000,
-    'M': 1_000_000,
-    'B': 1_000_000_000,
-    'T': 1_000_000_000_000,
-    'q': 1_000_000_000_000_000,
-    'Q': 1_000_000_000_000_000_000,
-    's': 1_000_000_000_000_000_000_000,
-    'S': 1_000_000_000_000_000_000_000_000,
-    'O': 1_000_000_000_000_000_000_000_000_000,
-    'N': 1_000_000_000_000_000_000_000_000_000_000,
-    'D': 1_000_000_000_000_000_000_000_000_000_000_000,
-    'aa': 1_000_000_000_000_000_000_000_000_000_000_000_000,
-    'ab': 1_000_000_000_000_000_000_000_000_000_000_000_000_000,
-    'ac': 1_000_000_000_000_000_000_000_000_000_000_000_000_000_000,
-    'ad': 1_000_000_000_000_000_000_000_000_000_000_000_000_000_000_000
-}
+    (columns["highest_tier"], columns["highest_tier_wave"],
+     columns["highest_tier_coins"], columns["highest_tier_coins_key"]) = highest
+    columns["max_wave"] = max_wave
+    columns["max_wave_tier"] = max_wave_tier
+    columns["max_coins"] = max_coins
+    columns["max_coins_key"] = max_coins_key
+    columns["max_coins_tier"] = max_coins_tier
+    return columns
 
-# General numeric parser for values with optional suffixes (supports optional space and $)
-def parse_numeric_value(raw_value) -> float:
-    """Parse a numeric string that may contain a suffix like K/M/B/T/Q/O/N/D or aa/ab/ac/ad.
+def upsert_tier_best(db, discord_id: str, tier_values: dict):
+    """Insert or update user_tier_best rows for the given {"T{n}": tier string} values.
 
-    Handles optional dollar prefix, commas, and an optional space before the suffix.
-    Returns 0.0 on failure.
+    Tiers without any wave or coins data are not stored.
     """
-    try:
-        value = str(raw_value)
-    except Exception:
-        return 0.0
-
-    if not value or value.lower() == "null":
-        return 0.0
+    rows = []
+    for tier_key, tier_str in tier_values.items():
+        wave, coins_value, coins_display = parse_tier_string(tier_str)
+        coins_key = numeric_sort_key(coins_display)
+        if wave <= 0 and coins_key <= 0:
+            continue
+        rows.append({
+            "discordid": discord_id,
+            "tier": int(tier_key[1:]),
+            "wave": wave,
+            "coins_value": coins_value,
+            "coins_key": coins_key,
+            "coins_display": coins_display,
+        })
 
-    value = value.replace("$", "").replace(",", "").strip()
+    if not rows:
+        return
 
-    # Build a regex that prefers longer suffixes first (e.g., aa over a)
-    suffix_alternation = "|".join(sorted(SUFFIXES.keys(), key=len, reverse=True))
-    pattern = rf"^(-?\d+(?:\.\d+)?)(?:\s*(?:{suffix_alternation}))?$"
+    stmt = pg_insert(UserTierBest).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[UserTierBest.discordid, UserTierBest.tier],
+        set_={
+            "wave": stmt.excluded.wave,
+            "coins_value": stmt.excluded.coins_value,
+            "coins_key": stmt.excluded.coins_key,
+            "coins_display": stmt.excluded.coins_display,
+            "updated_at": func.now(),
+        },
+    )
+    db.execute(stmt)
 
-    match = re.match(pattern, value)
-    if match:
-        # When the optional group exists but suffix is absent, match.group(2) may be None
-        number_str = match.group(1)
-        # Re-extract suffix manually to avoid regex group counting issues
-        suffix = None
-        for suf in sorted(SUFFIXES.keys(), key=len, reverse=True):
-            if value.endswith(suf):
-                suffix = suf
-                break
-        try:
-            number = float(number_str)
-        except ValueError:
-            return 0.0
-        if suffix:
-            return number * SUFFIXES.get(suffix, 1)
-        return number
+def add_tier_history(db, discord_id: str, tier_values: dict, timestamp=None):
+    """Add one user_tier_history delta row per tier in tier_values.
 
-    # Fallback: attempt plain float
-    try:
-        return float(value)
-    except ValueError:
-        return 0.0
+    timestamp defaults to the transaction time, so every delta from one upload
+    shares it and replays as a single snapshot.
+    """
+    for tier_key, tier_str in tier_values.items():
+        wave, coins_value, coins_display = parse_tier_string(tier_str)
+        row = UserTierHistory(
+            discordid=discord_id,
+            tier=int(tier_key[1:]),
+            wave=wave,
+            coins_value=coins_value,
+            coins_display=coins_display
+        )
+        if timestamp is not None:
+            row.timestamp = timestamp
+        db.add(row)
 
 def clean_date_format(date_str):
     """Clean and standardize date format to dd-mm-yyyy"""
@@ -162,7 +155,7 @@ def clean_monetary_value(value):
     # Check if it's a monetary field
     if re.match(r'^[\d.,]+(\s*[KMBTqQsSOND]|aa|ab|ac|ad)?$', cleaned):
         # Add space before suffix if missing
-        for suffix in sorted(SUFFIXES.keys(), key=len, reverse=True):
+        for suffix in SUFFIXES_LONGEST_FIRST:
             if cleaned.endswith(suffix) and not cleaned.endswith(f' {suffix}'):
                 cleaned = cleaned[:-len(suffix)] + f' {suffix}'
                 break
@@ -181,7 +174,7 @@ def clean_number_formatting(value):
     cleaned = value.replace('$', '').strip()
     
     # Add space before suffix if missing
-    for suffix in sorted(SUFFIXES.keys(), key=len, reverse=True):
+    for suffix in SUFFIXES_LONGEST_FIRST:
         if cleaned.endswith(suffix) and not cleaned.endswith(f' {suffix}'):
             cleaned = cleaned[:-len(suffix)] + f' {suffix}'
             break
@@ -213,9 +206,49 @@ def clean_stats_data(stats_data):
     
     return cleaned_data
 
+def stats_numeric_columns(stats_data: dict) -> dict:
+    """Derive the numeric <field>_value and sortable <field>_key columns of UserStats from the stat strings.
+
+    Missing stats stay None so they never rank ahead of real values.
+    """
+    columns = {}
+    for field in NUMERIC_STATS_FIELDS:
+        value = stats_data.get(field)
+        if value is None or value == "":
+            columns[f"{field}_value"] = None
+            columns[f"{field}_key"] = None
+        else:
+            columns[f"{field}_value"] = parse_number(value)
+            columns[f"{field}_key"] = numeric_sort_key(str(value))
+    return columns
+
+STATS_COLUMNS = (
+    ["game_started"]
+    + NUMERIC_STATS_FIELDS
+    + [f"{field}_value" for field in NUMERIC_STATS_FIELDS]
+    + [f"{field}_key" for field in NUMERIC_STATS_FIELDS]
+)
+
+def upsert_stats_latest(db, stats: UserStats, timestamp=None):
+    """Insert or replace the user_stats_latest row for the owner of a flushed UserStats row.
+
+    The timestamp defaults to now(), which matches the history row inserted in the same transaction.
+    """
+    values = {column: getattr(stats, column) for column in STATS_COLUMNS}
+    values["stats_id"] = stats.id
+    values["discordname"] = stats.discordname
+    values["timestamp"] = timestamp if timestamp is not None else func.now()
+
+    stmt = pg_insert(UserStatsLatest).values(discordid=stats.discordid, **values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[UserStatsLatest.discordid],
+        set_={column: getattr(stmt.excluded, column) for column in values},
+    )
+    db.execute(stmt)
+
 def parse_gemini_tier_to_sql(gemini_result: dict, discord_id: str, discord_name: str) -> dict:
     """
-    Parse Gemini tier result and insert into UserData and UserDataHistory tables
+    Parse Gemini tier result and insert into UserData and the UserTierHistory delta table
     Returns: {"success": bool, "message": str, "tier_data": dict}
     """
     try:
@@ -253,34 +286,14 @@ def parse_gemini_tier_to_sql(gemini_result: dict, discord_id: str, discord_name:
             for tier_num in range(1, 19):
                 tier_key = f"T{tier_num}"
                 new_value = tier_values[tier_key]
-                existing_value = getattr(existing_user, tier_key, "Wave: 0 Coins: 0")
-                
-                # Parse existing values
-                existing_wave_match = re.search(r"Wave:\s*(\d+)", existing_value)
-                suffix_alt = "|".join(sorted(SUFFIXES.keys(), key=len, reverse=True))
-                coins_regex = rf"Coins:\\s*([\\d.,]+(?:\\s*(?:{suffix_alt}))?)"
-                existing_coins_match = re.search(coins_regex, existing_value)
+                existing_value = getattr(existing_user, tier_key) or "Wave: 0 Coins: 0"
                 
-                existing_wave = int(existing_wave_match.group(1)) if existing_wave_match else 0
-                existing_coins_str = existing_coins_match.group(1) if existing_coins_match else "0"
+                existing_wave, _, existing_coins = parse_tier_string(existing_value)
+                new_wave, _, new_coins = parse_tier_string(new_value)
                 
-                # Parse new values
-                new_wave_match = re.search(r"Wave:\s*(\d+)", new_value)
-                new_coins_match = re.search(coins_regex, new_value)
-                
-                new_wave = int(new_wave_match.group(1)) if new_wave_match else 0
-                new_coins_str = new_coins_match.group(1) if new_coins_match else "0"
-                
-                # Convert coins to numeric values for comparison
-                def parse_coins(coins_str):
-                    return parse_numeric_value(coins_str)
-                
-                existing_coins = parse_coins(existing_coins_str)
-                new_coins = parse_coins(new_coins_str)
-                
-                # Check if new values are improvements
+                # Check if new values are improvements (exact comparison via sort keys)
                 wave_improved = new_wave > existing_wave
-                coins_improved = new_coins > existing_coins
+                coins_improved = numeric_sort_key(new_coins) > numeric_sort_key(existing_coins)
                 
                 if wave_improved or coins_improved:
                     improvements.append(f"T{tier_num}")
@@ -290,6 +303,10 @@ def parse_gemini_tier_to_sql(gemini_result: dict, discord_id: str, discord_name:
                     # Keep existing value
                     tier_values[tier_key] = existing_value
             
+            # Refresh the numeric summaries from the merged tier strings
+            for column, value in tier_numeric_columns(tier_values).items():
+                setattr(existing_user, column, value)
+            
             existing_user.discordname = discord_name
             existing_user.date = datetime.now()
         else:
@@ -298,18 +315,17 @@ def parse_gemini_tier_to_sql(gemini_result: dict, discord_id: str, discord_name:
                 discordid=discord_id,
                 discordname=discord_name,
                 date=datetime.now(),
-                **tier_values
+                **tier_values,
+                **tier_numeric_columns(tier_values)
             )
             db.add(new_user)
             improvements = [f"T{i}" for i in range(1, 19) if tier_values[f"T{i}"] != "Wave: 0 Coins: 0"]
         
-        # Always add to history (for tracking purposes)
-        new_history = UserDataHistory(
-            discordid=discord_id,
-            discordname=discord_name,
-            **tier_values
-        )
-        db.add(new_history)
+        # Keep the per-tier best table in sync with the tiers that changed
+        upsert_tier_best(db, discord_id, {tier_key: tier_values[tier_key] for tier_key in improvements})
+        
+        # Record only the tiers that changed; snapshots are rebuilt from these deltas
+        add_tier_history(db, discord_id, {tier_key: tier_values[tier_key] for tier_key in improvements})
         
         # Commit changes
         db.commit()
@@ -331,7 +347,9 @@ def parse_gemini_tier_to_sql(gemini_result: dict, discord_id: str, discord_name:
                 "summary": tier_data.get("summary", {}),
                 "tiers_updated": len(improvements),
                 "improvements": improvements,
-                "skipped": skipped
+                "skipped": skipped,
+                # Final tier strings of the improved tiers, for in-process caches
+                "updated_tiers": {tier_key: tier_values[tier_key] for tier_key in improvements}
             }
         }
         
@@ -360,15 +378,13 @@ def parse_gemini_stats_to_sql(gemini_result: dict, discord_id: str, discord_name
         
         # Check if this represents an improvement over existing stats
         # For stats, we'll save all uploads to history but only show if it's a significant improvement
-        existing_stats = db.query(UserStats).filter(
-            UserStats.discordid == discord_id
-        ).order_by(UserStats.timestamp.desc()).first()
+        existing_stats = db.get(UserStatsLatest, discord_id)
         
         improvements = []
         if existing_stats:
-            # Compare key stats to see if this is an improvement using robust parser
+            # Compare key stats exactly via their sortable keys
             def parse_stat_value(value):
-                return parse_numeric_value(value)
+                return numeric_sort_key(str(value))
 
             # Compare key improvement metrics
             key_stats = [
@@ -380,7 +396,9 @@ def parse_gemini_stats_to_sql(gemini_result: dict, discord_id: str, discord_name
             
             for stat_field, stat_name in key_stats:
                 new_val = parse_stat_value(stats_data.get(stat_field, 0))
-                existing_val = parse_stat_value(getattr(existing_stats, stat_field, 0))
+                existing_val = getattr(existing_stats, f"{stat_field}_key")
+                if existing_val is None:
+                    existing_val = parse_stat_value(getattr(existing_stats, stat_field, 0))
                 
                 if new_val > existing_val:
                     improvements.append(stat_name)
@@ -409,11 +427,14 @@ def parse_gemini_stats_to_sql(gemini_result: dict, discord_id: str, discord_name
             orb_kills=cleaned_stats.get("orb_kills"),
             death_ray_kills=cleaned_stats.get("death_ray_kills"),
             thorn_damage=cleaned_stats.get("thorn_damage"),
-            waves_skipped=cleaned_stats.get("waves_skipped")
+            waves_skipped=cleaned_stats.get("waves_skipped"),
+            **stats_numeric_columns(cleaned_stats)
         )
         
-        # Insert into database
+        # Insert into database and refresh the latest-stats row in the same transaction
         db.add(new_stats)
+        db.flush()
+        upsert_stats_latest(db, new_stats)
         db.commit()
         db.refresh(new_stats)
         
@@ -429,7 +450,9 @@ def parse_gemini_stats_to_sql(gemini_result: dict, discord_id: str, discord_name
             "success": True, 
             "message": message,
             "stats_id": new_stats.id,
-            "improvements": improvements
+            "improvements": improvements,
+            # Saved values, for in-process caches
+            "stats": {column: getattr(new_stats, column) for column in STATS_COLUMNS}
         }
         
     except Exception as e:
@@ -0,0 +1,89 @@
+"""
+Async download of uploaded screenshots for the bot.
+
+An attachment is checked before anything is downloaded (declared size, and
+content type or else file extension), then streamed over one pooled aiohttp
+session with a hard byte cap, and its first bytes must be a PNG, JPEG or WebP
+signature. Oversized or non-image uploads never reach a worker thread, and
+downloads wait on the event loop instead of holding thread-pool slots.
+
+Call from the bot's event loop thread, and close_session() when the bot shuts down.
+"""
+
+import os
+import aiohttp
+
+# Upload admission: larger or non-image uploads are refused before decoding
+MAX_IMAGE_BYTES = int(os.getenv("MAX_IMAGE_BYTES", str(10 * 1024 * 1024)))
+ALLOWED_IMAGE_TYPES = ("image/png", "image/jpeg", "image/webp")
+IMAGE_EXTENSIONS = {".png": "image/png", ".jpg": "image/jpeg", ".jpeg": "image/jpeg", ".webp": "image/webp"}
+NOT_AN_IMAGE = "Please upload a PNG, JPEG or WebP screenshot."
+
+DOWNLOAD_CONNECTIONS = int(os.getenv("DOWNLOAD_CONNECTIONS", "8"))
+DOWNLOAD_TIMEOUT = 20
+CHUNK_SIZE = 64 * 1024
+
+_session = None
+
+def declared_image_type(attachment):
+    """The attachment's content type, or the one its file extension implies, or None"""
+    content_type = (attachment.content_type or "").split(";")[0].strip().lower()
+    if content_type:
+        return content_type
+    return IMAGE_EXTENSIONS.get(os.path.splitext(attachment.filename or "")[1].lower())
+
+def sniff_image_type(data: bytes):
+    """Content type from the PNG, JPEG or WebP signature at the start of data, or None"""
+    if data.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if data.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+def admission_error(attachment):
+    """Why an attachment is refused before download, or None if it is accepted.
+
+    An attachment with neither a content type nor a known extension is
+    accepted here; fetch_attachment checks its bytes instead.
+    """
+    image_type = declared_image_type(attachment)
+    if image_type is not None and image_type not in ALLOWED_IMAGE_TYPES:
+        return NOT_AN_IMAGE
+    if attachment.size > MAX_IMAGE_BYTES:
+        return f"Screenshot is too large ({attachment.size / (1024 * 1024):.1f} MB, limit {MAX_IMAGE_BYTES // (1024 * 1024)} MB)."
+    return None
+
+def get_session() -> aiohttp.ClientSession:
+    """The shared session; its connector keeps up to DOWNLOAD_CONNECTIONS connections open for reuse"""
+    global _session
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=DOWNLOAD_CONNECTIONS),
+            timeout=aiohttp.ClientTimeout(total=DOWNLOAD_TIMEOUT)
+        )
+    return _session
+
+async def fetch_attachment(attachment) -> bytes:
+    """Stream an attachment's bytes, aborting as soon as they exceed MAX_IMAGE_BYTES
+    or if they do not start with an image signature"""
+    async with get_session().get(attachment.url) as response:
+        response.raise_for_status()
+        if (response.content_length or 0) > MAX_IMAGE_BYTES:
+            raise ValueError(f"Image is larger than {MAX_IMAGE_BYTES // (1024 * 1024)} MB")
+        body = bytearray()
+        async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+            body.extend(chunk)
+            if len(body) > MAX_IMAGE_BYTES:
+                raise ValueError(f"Image is larger than {MAX_IMAGE_BYTES // (1024 * 1024)} MB")
+    if sniff_image_type(body) is None:
+        raise ValueError(NOT_AN_IMAGE)
+    return bytes(body)
+
+async def close_session():
+    """Close the shared session and its pooled connections"""
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
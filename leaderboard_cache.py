@@ -0,0 +1,215 @@
+"""
+In-memory leaderboard cache for the bot process.
+
+The cache is loaded from the database once, then kept current by the upload
+path (write-through): after a tier or stats upload commits, the bot passes the
+saved values to update_tiers / update_stats. Leaderboard commands read the
+cache and never touch the database. Each leaderboard is a RankIndex, so top-N,
+rank-of-user and around-rank reads stay logarithmic as users grow.
+
+Boards changed since the last take_dirty() are tracked so a background task
+can materialize them for the dashboard (dashboard_backend/leaderboard_snapshot.py).
+
+All methods are meant to be called from the bot's event loop thread.
+"""
+
+from dashboard_backend.models import UserData, UserStatsLatest, NUMERIC_STATS_FIELDS
+from dashboard_backend.leaderboard_snapshot import TIER_BOARDS, STATS_BOARDS, STANDING_BOARDS
+from dashboard_backend.number_codec import parse_number, numeric_sort_key, parse_tier_string
+from gemini_sql_parser import tier_numeric_columns
+from rank_index import RankIndex
+
+class LeaderboardCache:
+    """Per-user tier and stats data plus a RankIndex for every leaderboard.
+
+    Boards: "leader", "coins", "waves", "tier:<n>" and "stats:<field>". An
+    upload re-keys only the uploading user, in O(log n) per affected board.
+    Read methods take a 1-based start rank, so any page costs O(log n + limit).
+    """
+
+    def __init__(self):
+        self.loaded = False
+        self._tiers = {}        # discordid -> {"name", "T1".."T18", numeric summary columns}
+        self._stats = {}        # discordid -> {"name", stat strings, <field>_key}
+        self._boards = {board: RankIndex() for board in TIER_BOARDS + STATS_BOARDS}
+        self._dirty = set()     # boards changed since the last take_dirty()
+
+    def load(self, session):
+        """Build the cache from user_data and user_stats_latest"""
+        tiers, stats = {}, {}
+        board_items = {board: [] for board in TIER_BOARDS + STATS_BOARDS}
+
+        tier_columns = [getattr(UserData, f"T{i}") for i in range(1, 19)]
+        for discordid, name, *tier_strings in session.query(UserData.discordid, UserData.discordname, *tier_columns):
+            tier_values = {f"T{i}": tier_str for i, tier_str in enumerate(tier_strings, 1)}
+            tiers[discordid], board_keys = self._tier_entry(name, tier_values, range(1, 19))
+            for board, key in board_keys.items():
+                board_items[board].append((discordid, key))
+
+        for row in session.query(UserStatsLatest):
+            saved = {column: getattr(row, column) for column in ["game_started"] + NUMERIC_STATS_FIELDS}
+            saved.update({f"{field}_key": getattr(row, f"{field}_key") for field in NUMERIC_STATS_FIELDS})
+            stats[row.discordid], board_keys = self._stats_entry(row.discordname, saved)
+            for board, key in board_keys.items():
+                board_items[board].append((row.discordid, key))
+
+        # Bulk-build every board once instead of inserting users one at a time
+        self._boards = {board: RankIndex.build(items) for board, items in board_items.items()}
+        self._tiers, self._stats = tiers, stats
+        self._dirty = set(self._boards)
+        self.loaded = True
+
+    @staticmethod
+    def _tier_entry(name, tier_values: dict, changed_tiers) -> tuple:
+        """Return the cached tier entry and {board: key} for the boards it affects"""
+        entry = {"name": name, **tier_values}
+        entry.update(tier_numeric_columns(tier_values))
+
+        # Users without coins or waves are left off those boards, as in the SQL boards
+        board_keys = {
+            "leader": None,
+            "coins": entry["max_coins_key"] if entry["max_coins_key"] > 0 else None,
+            "waves": entry["max_wave"] if entry["max_wave"] > 0 else None,
+        }
+        if entry["highest_tier"]:
+            board_keys["leader"] = (entry["highest_tier"], entry["highest_tier_wave"], entry["highest_tier_coins_key"])
+        for tier_num in changed_tiers:
+            wave, _, coins_display = parse_tier_string(tier_values.get(f"T{tier_num}"))
+            coins_key = numeric_sort_key(coins_display)
+            # Same rule as upsert_tier_best: a tier with waves or coins is ranked
+            board_keys[f"tier:{tier_num}"] = (wave, coins_key) if wave > 0 or coins_key > 0 else None
+        return entry, board_keys
+
+    @staticmethod
+    def _stats_entry(name, saved: dict) -> tuple:
+        """Return the cached stats entry and {board: key} for every stats board"""
+        entry = {"name": name, "game_started": saved.get("game_started")}
+        # Not a numeric stat; ranked by its digits the way the command always did
+        board_keys = {"stats:game_started": parse_number(entry["game_started"]) if entry["game_started"] else None}
+
+        for field in NUMERIC_STATS_FIELDS:
+            value = saved.get(field)
+            key = saved.get(f"{field}_key")
+            if key is None and value not in (None, ""):
+                key = numeric_sort_key(str(value))
+            entry[field] = value
+            entry[f"{field}_key"] = key
+            board_keys[f"stats:{field}"] = key if key and key > 0 else None
+        return entry, board_keys
+
+    def update_tiers(self, discord_id: str, name: str, updated_tiers: dict):
+        """Apply a committed tier upload: {"T{n}": tier string} for the improved tiers"""
+        current = self._tiers.get(discord_id)
+        tier_values = {f"T{i}": current.get(f"T{i}") if current else "Wave: 0 Coins: 0" for i in range(1, 19)}
+        tier_values.update(updated_tiers)
+        changed_tiers = [int(tier_key[1:]) for tier_key in updated_tiers]
+
+        self._tiers[discord_id], board_keys = self._tier_entry(name, tier_values, changed_tiers)
+        for board, key in board_keys.items():
+            self._boards[board].update(discord_id, key)
+        self._dirty.update(board_keys)
+
+    def update_stats(self, discord_id: str, name: str, stats: dict):
+        """Apply a committed stats upload: the saved stat strings (and keys if known)"""
+        self._stats[discord_id], board_keys = self._stats_entry(name, stats)
+        for board, key in board_keys.items():
+            self._boards[board].update(discord_id, key)
+        self._dirty.update(board_keys)
+
+    def take_dirty(self) -> set:
+        """Return the boards changed since the last call and reset the set"""
+        dirty, self._dirty = self._dirty, set()
+        return dirty
+
+    def mark_dirty(self, boards):
+        """Flag boards for the next take_dirty(), e.g. after a failed materialization"""
+        self._dirty.update(boards)
+
+    def snapshot_rows(self, board: str) -> list:
+        """Every ranked user of a board as leaderboard_snapshot rows, in rank order"""
+        rows = []
+        for rank, discordid, key in self._boards[board].range(1, len(self._boards[board])):
+            row = {"rank": rank, "discordid": discordid, "tier": None, "wave": None, "value": None, "display": None}
+            if board.startswith("stats:"):
+                entry = self._stats[discordid]
+                display = entry.get(board[len("stats:"):])
+                row.update(value=parse_number(display), display=display)
+            else:
+                entry = self._tiers[discordid]
+                if board == "leader":
+                    tier_num, wave = key[0], key[1]
+                elif board == "coins":
+                    tier_num, wave = entry["max_coins_tier"], None
+                elif board == "waves":
+                    tier_num, wave = entry["max_wave_tier"], key
+                else:
+                    tier_num, wave = int(board[len("tier:"):]), key[0]
+                tier_wave, coins_value, coins_display = parse_tier_string(entry.get(f"T{tier_num}"))
+                row.update(tier=tier_num, wave=wave if wave is not None else tier_wave,
+                           value=coins_value, display=coins_display)
+            row["discordname"] = entry["name"]
+            rows.append(row)
+        return rows
+
+    def rank(self, board: str, discord_id: str) -> tuple:
+        """(rank, number of ranked users) of a user on a board; rank is None if not ranked"""
+        index = self._boards[board]
+        return index.rank(discord_id), len(index)
+
+    def ranks(self, discord_id: str) -> dict:
+        """{board: (rank, total)} for every standing board the user is ranked on"""
+        ranks = {}
+        for board in STANDING_BOARDS:
+            rank, total = self.rank(board, discord_id)
+            if rank is not None:
+                ranks[board] = (rank, total)
+        return ranks
+
+    def size(self, board: str) -> int:
+        """Number of ranked users on a board"""
+        return len(self._boards[board])
+
+    def leader(self, limit: int = 25, start: int = 1) -> list:
+        """(name, tier, wave, coins_display) by highest tier, then that tier's wave and coins"""
+        rows = []
+        for _, discordid, (tier_num, wave, _) in self._boards["leader"].range(start, limit):
+            entry = self._tiers[discordid]
+            rows.append((entry["name"], tier_num, wave, parse_tier_string(entry[f"T{tier_num}"])[2]))
+        return rows
+
+    def coins(self, limit: int = 10, start: int = 1) -> list:
+        """(name, tier, coins_display) by each user's highest coins across all tiers"""
+        rows = []
+        for _, discordid, _ in self._boards["coins"].range(start, limit):
+            entry = self._tiers[discordid]
+            tier_num = entry["max_coins_tier"]
+            rows.append((entry["name"], tier_num, parse_tier_string(entry.get(f"T{tier_num}"))[2]))
+        return rows
+
+    def waves(self, limit: int = 10, start: int = 1) -> list:
+        """(name, tier, wave) by each user's highest wave across all tiers"""
+        rows = []
+        for _, discordid, wave in self._boards["waves"].range(start, limit):
+            entry = self._tiers[discordid]
+            rows.append((entry["name"], entry["max_wave_tier"], wave))
+        return rows
+
+    def tier(self, tier_num: int, limit: int = 10, start: int = 1) -> list:
+        """(name, wave, coins_display) for one tier, by wave then coins"""
+        rows = []
+        for _, discordid, (wave, _) in self._boards[f"tier:{tier_num}"].range(start, limit):
+            entry = self._tiers[discordid]
+            rows.append((entry["name"], wave, parse_tier_string(entry[f"T{tier_num}"])[2]))
+        return rows
+
+    def tiers(self, limit: int = 5) -> dict:
+        """{tier number: tier() rows} with the top rows of all 18 tiers"""
+        return {tier_num: self.tier(tier_num, limit) for tier_num in range(1, 19)}
+
+    def stats(self, field: str, limit: int = 10, start: int = 1) -> list:
+        """(name, value) for one stats category, highest first"""
+        rows = []
+        for _, discordid, _ in self._boards[f"stats:{field}"].range(start, limit):
+            entry = self._stats[discordid]
+            rows.append((entry["name"], entry.get(field)))
+        return rows
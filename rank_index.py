@@ -0,0 +1,192 @@
+"""
+Incremental rank index for leaderboards.
+
+RankIndex keeps members ordered by a sort key (highest first) in an indexable
+skip list: every link stores how many positions it skips, so inserting,
+removing, finding a member's rank and jumping to a rank all take O(log n)
+expected time. Reading the top N or the members around a rank then walks
+the bottom level, costing O(log n + N).
+"""
+
+import random
+
+MAX_LEVEL = 32
+
+class _Node:
+    __slots__ = ("order", "member", "key", "next", "width")
+
+    def __init__(self, order, member, key, level):
+        self.order = order
+        self.member = member
+        self.key = key
+        self.next = [None] * level
+        self.width = [1] * level
+
+class RankIndex:
+    """Members ranked by key, highest key first; ties are broken by member id.
+
+    Keys can be any mutually comparable values whose negation is defined
+    (numbers, or tuples of numbers).
+    """
+
+    def __init__(self, seed=None):
+        self._random = random.Random(seed)
+        self._head = _Node(None, None, None, MAX_LEVEL)
+        self._level = 1
+        self._keys = {}
+
+    @classmethod
+    def build(cls, items, seed=None):
+        """Bulk-load an index from (member, key) pairs in O(n log n); None keys are skipped"""
+        index = cls(seed)
+        nodes = sorted((cls._order(member, key), member, key) for member, key in items if key is not None)
+
+        last = [index._head] * MAX_LEVEL
+        last_position = [0] * MAX_LEVEL
+        for position, (order, member, key) in enumerate(nodes, 1):
+            level = index._random_level()
+            node = _Node(order, member, key, level)
+            for link in range(level):
+                last[link].next[link] = node
+                last[link].width[link] = position - last_position[link]
+                last[link], last_position[link] = node, position
+            index._level = max(index._level, level)
+            index._keys[member] = key
+        return index
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, member):
+        return member in self._keys
+
+    @staticmethod
+    def _order(member, key):
+        # Stored ascending, so negate the key to list the highest first
+        if isinstance(key, tuple):
+            return tuple(-part for part in key), member
+        return -key, member
+
+    def _random_level(self) -> int:
+        level = 1
+        while level < MAX_LEVEL and self._random.random() < 0.5:
+            level += 1
+        return level
+
+    def key(self, member):
+        """Current key of a member, or None if not ranked"""
+        return self._keys.get(member)
+
+    def update(self, member, key):
+        """Insert a member or move it to a new key; a key of None removes it"""
+        current = self._keys.get(member)
+        if current is not None:
+            if key == current:
+                return
+            self.remove(member)
+        if key is None:
+            return
+
+        order = self._order(member, key)
+        update = [self._head] * MAX_LEVEL
+        steps = [0] * MAX_LEVEL
+        node, position = self._head, 0
+        for level in range(self._level - 1, -1, -1):
+            while node.next[level] is not None and node.next[level].order < order:
+                position += node.width[level]
+                node = node.next[level]
+            update[level], steps[level] = node, position
+
+        new_level = self._random_level()
+        if new_level > self._level:
+            for level in range(self._level, new_level):
+                update[level], steps[level] = self._head, 0
+                self._head.width[level] = len(self._keys) + 1
+            self._level = new_level
+
+        new_node = _Node(order, member, key, new_level)
+        for level in range(new_level):
+            previous = update[level]
+            skipped = position - steps[level]
+            new_node.next[level] = previous.next[level]
+            new_node.width[level] = previous.width[level] - skipped
+            previous.next[level] = new_node
+            previous.width[level] = skipped + 1
+        # Links above the new node's height now skip one more position
+        for level in range(new_level, self._level):
+            update[level].width[level] += 1
+
+        self._keys[member] = key
+
+    def remove(self, member):
+        """Remove a member if it is ranked"""
+        key = self._keys.pop(member, None)
+        if key is None:
+            return
+        order = self._order(member, key)
+
+        node = self._head
+        for level in range(self._level - 1, -1, -1):
+            while node.next[level] is not None and node.next[level].order < order:
+                node = node.next[level]
+            target = node.next[level]
+            if target is not None and target.order == order:
+                node.width[level] += target.width[level] - 1
+                node.next[level] = target.next[level]
+            else:
+                node.width[level] -= 1
+
+        while self._level > 1 and self._head.next[self._level - 1] is None:
+            self._level -= 1
+
+    def rank(self, member):
+        """1-based rank of a member, or None if not ranked"""
+        key = self._keys.get(member)
+        if key is None:
+            return None
+        order = self._order(member, key)
+
+        node, position = self._head, 0
+        for level in range(self._level - 1, -1, -1):
+            while node.next[level] is not None and node.next[level].order <= order:
+                position += node.width[level]
+                node = node.next[level]
+        return position
+
+    def _node_at(self, rank: int):
+        node, position = self._head, 0
+        for level in range(self._level - 1, -1, -1):
+            while node.next[level] is not None and position + node.width[level] <= rank:
+                position += node.width[level]
+                node = node.next[level]
+        return node
+
+    def at(self, rank: int):
+        """(member, key) at a 1-based rank, or None if out of range"""
+        if not 1 <= rank <= len(self._keys):
+            return None
+        node = self._node_at(rank)
+        return node.member, node.key
+
+    def range(self, start: int, count: int) -> list:
+        """[(rank, member, key)] for up to count members from a 1-based start rank"""
+        start = max(start, 1)
+        if count <= 0 or start > len(self._keys):
+            return []
+        node = self._node_at(start)
+        rows = []
+        rank = start
+        while node is not None and len(rows) < count:
+            rows.append((rank, node.member, node.key))
+            node = node.next[0]
+            rank += 1
+        return rows
+
+    def top(self, count: int) -> list:
+        """[(rank, member, key)] for the first count members"""
+        return self.range(1, count)
+
+    def around(self, rank: int, radius: int) -> list:
+        """[(rank, member, key)] for the members within radius positions of a rank"""
+        start = max(rank - radius, 1)
+        return self.range(start, rank + radius - start + 1)
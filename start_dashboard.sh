@@ -6,7 +6,7 @@ echo "🚀 Starting Tower Scoreboard System..."
 echo "🔧 Initializing database schema..."
 cd /home/ubuntu/discord/bot/TowerScoreBoardBot
 source venv/bin/activate
-python3 dashboard_backend/init_db.py
+DB_PROCESS_ROLE=INIT_DB python3 dashboard_backend/init_db.py
 
 # Kill old screen sessions if they exist
 screen -S backend -X quit 2>/dev/null
@@ -17,7 +17,7 @@ screen -S bot -X quit 2>/dev/null
 echo "📊 Starting backend server..."
 cd /home/ubuntu/discord/bot/TowerScoreBoardBot
 source venv/bin/activate
-screen -dmS backend uvicorn dashboard_backend.main:app --host 0.0.0.0 --port 8000
+screen -dmS backend env DB_PROCESS_ROLE=DASHBOARD uvicorn dashboard_backend.main:app --host 0.0.0.0 --port 8000
 
 # Build frontend (Production build)
 echo "🎨 Building frontend..."
@@ -28,7 +28,7 @@ npm run build
 # Start bot with Gemini AI integration
 echo "🤖 Starting Discord bot with Gemini AI..."
 cd /home/ubuntu/discord/bot/TowerScoreBoardBot/
-screen -dmS bot python3 bot.py
+screen -dmS bot env DB_PROCESS_ROLE=BOT python3 bot.py
 
 echo "✅ All services started successfully!"
 echo "📊 Backend: screen session 'backend' (port 8000)"
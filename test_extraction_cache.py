@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Tests for ExtractionResultCache eviction against the configured Postgres database.
+
+Everything runs in a transaction that is rolled back, so the database is left
+unchanged. Skipped when no database is reachable.
+"""
+
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+import extraction_cache
+from dashboard_backend.database import engine
+
+LONG_AGO = datetime(2001, 1, 1, tzinfo=timezone.utc)
+
+@pytest.fixture
+def connection(monkeypatch):
+    try:
+        connection = engine.connect()
+    except OperationalError:
+        pytest.skip("Postgres is not reachable")
+    transaction = connection.begin()
+    connection.execute(text("DELETE FROM extraction_cache"))
+    monkeypatch.setattr(extraction_cache, "SessionLocal",
+                        sessionmaker(bind=connection, join_transaction_mode="create_savepoint"))
+    try:
+        yield connection
+    finally:
+        transaction.rollback()
+        connection.close()
+
+def store(cache, key):
+    return cache.get_or_compute(key, lambda: {"success": True, "key": key}, lambda result: result["success"])
+
+def age(connection, key, day):
+    connection.execute(text("UPDATE extraction_cache SET last_used_at = :at WHERE cache_key = :key"),
+                       {"at": LONG_AGO.replace(day=day), "key": key})
+
+def stored_keys(connection) -> set:
+    return set(connection.execute(text("SELECT cache_key FROM extraction_cache")).scalars())
+
+def test_memory_hits_keep_entries_from_being_evicted(connection):
+    cache = extraction_cache.ExtractionResultCache(max_entries=2)
+    store(cache, "a")
+    store(cache, "b")
+    age(connection, "a", 1)
+    age(connection, "b", 2)
+
+    assert store(cache, "a")["cached"]
+    assert cache.stats()["hits"] == 1
+    store(cache, "c")
+
+    assert stored_keys(connection) == {"a", "c"}
+
+def test_memory_hits_are_written_in_batches(connection):
+    cache = extraction_cache.ExtractionResultCache()
+    store(cache, "a")
+    age(connection, "a", 1)
+
+    cache.lookup("a")
+    last_used = connection.execute(text("SELECT last_used_at FROM extraction_cache WHERE cache_key = 'a'")).scalar()
+    assert last_used == LONG_AGO
+
+    cache._touch_due = 0
+    cache.lookup("a")
+    last_used = connection.execute(text("SELECT last_used_at FROM extraction_cache WHERE cache_key = 'a'")).scalar()
+    assert last_used > LONG_AGO
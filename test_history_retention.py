@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Tests for dropping expired tier history partitions against the configured Postgres database.
+
+Everything runs in a transaction that is rolled back, so the database is left
+unchanged. Skipped when no database is reachable.
+"""
+
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from dashboard_backend.database import engine
+from dashboard_backend.history_retention import TIER_HISTORY_TABLE, create_month_partition, drop_expired_partitions, is_partitioned
+from dashboard_backend.tier_history import EMPTY_TIER, load_snapshots
+
+JANUARY, FEBRUARY, MARCH = (datetime(2001, month, 1, tzinfo=timezone.utc) for month in (1, 2, 3))
+
+@pytest.fixture
+def connection():
+    try:
+        connection = engine.connect()
+    except OperationalError:
+        pytest.skip("Postgres is not reachable")
+    transaction = connection.begin()
+    if not is_partitioned(connection, TIER_HISTORY_TABLE):
+        pytest.skip("user_tier_history is not partitioned")
+    for month in (JANUARY, FEBRUARY, MARCH):
+        create_month_partition(connection, month, TIER_HISTORY_TABLE)
+    try:
+        yield connection
+    finally:
+        transaction.rollback()
+        connection.close()
+
+def add_delta(connection, discordid, tier, wave, coins, day):
+    connection.execute(text(
+        'INSERT INTO user_tier_history (discordid, tier, wave, coins_value, coins_display, "timestamp") '
+        "VALUES (:discordid, :tier, :wave, 0, :coins, :day)"
+    ), {"discordid": discordid, "tier": tier, "wave": wave, "coins": coins, "day": day})
+
+def final_tiers(connection, discordid) -> dict:
+    snapshots = list(load_snapshots(Session(bind=connection), discord_id=discordid))
+    return snapshots[-1][2]
+
+def test_dropping_a_partition_keeps_tiers_last_set_in_it(connection):
+    add_delta(connection, "retention-test", 1, 100, "1K", JANUARY.replace(day=10))
+    add_delta(connection, "retention-test", 1, 150, "2K", JANUARY.replace(day=20))
+    add_delta(connection, "retention-test", 2, 50, "5K", JANUARY.replace(day=10))
+    add_delta(connection, "retention-test", 2, 70, "9K", MARCH.replace(day=5))
+    before = final_tiers(connection, "retention-test")
+
+    dropped = drop_expired_partitions(connection, now=MARCH.replace(day=15), table=TIER_HISTORY_TABLE,
+                                      max_retention_months=1)
+
+    assert dropped == [f"{TIER_HISTORY_TABLE}_p200101"]
+    tiers = final_tiers(connection, "retention-test")
+    assert tiers == before
+    assert tiers["T1"] == "Wave: 150 Coins: 2K"
+    assert tiers["T2"] == "Wave: 70 Coins: 9K"
+    assert tiers["T3"] == EMPTY_TIER
+
+def test_checkpoints_are_not_duplicated_by_a_second_run(connection):
+    add_delta(connection, "retention-test", 1, 100, "1K", JANUARY.replace(day=10))
+    now = MARCH.replace(day=15)
+    drop_expired_partitions(connection, now=now, table=TIER_HISTORY_TABLE, max_retention_months=1)
+    create_month_partition(connection, JANUARY, TIER_HISTORY_TABLE)
+    drop_expired_partitions(connection, now=now, table=TIER_HISTORY_TABLE, max_retention_months=1)
+
+    rows = connection.execute(text(
+        "SELECT wave, \"timestamp\" FROM user_tier_history WHERE discordid = 'retention-test'"
+    )).all()
+    assert rows == [(100, FEBRUARY)]
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Tests for which attachments image_fetch admits before and after download
+"""
+
+from io import BytesIO
+from types import SimpleNamespace
+
+from PIL import Image
+
+from image_fetch import MAX_IMAGE_BYTES, NOT_AN_IMAGE, admission_error, sniff_image_type
+
+def attachment(content_type=None, filename="screenshot.png", size=1024):
+    return SimpleNamespace(content_type=content_type, filename=filename, size=size)
+
+def encoded(image_format: str) -> bytes:
+    buffer = BytesIO()
+    Image.new("RGB", (4, 4)).save(buffer, image_format)
+    return buffer.getvalue()
+
+def test_declared_image_types_are_admitted():
+    assert admission_error(attachment("image/png")) is None
+    assert admission_error(attachment("image/jpeg; charset=binary", "photo.txt")) is None
+    assert admission_error(attachment("text/plain", "notes.png")) == NOT_AN_IMAGE
+
+def test_missing_content_type_falls_back_to_the_extension():
+    assert admission_error(attachment(None, "Screenshot.JPG")) is None
+    assert admission_error(attachment("", "screenshot.webp")) is None
+
+def test_attachments_of_unknown_type_are_left_to_the_signature_check():
+    assert admission_error(attachment(None, "screenshot.gif")) is None
+    assert admission_error(attachment(None, "screenshot")) is None
+
+def test_oversized_attachments_are_refused():
+    assert "too large" in admission_error(attachment("image/png", size=MAX_IMAGE_BYTES + 1))
+    assert "too large" in admission_error(attachment(None, "screenshot", size=MAX_IMAGE_BYTES + 1))
+
+def test_image_signatures_are_sniffed():
+    assert sniff_image_type(encoded("PNG")) == "image/png"
+    assert sniff_image_type(encoded("JPEG")) == "image/jpeg"
+    assert sniff_image_type(encoded("WEBP")) == "image/webp"
+    assert sniff_image_type(encoded("GIF")) is None
+    assert sniff_image_type(b"") is None
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Tests for which users LeaderboardCache ranks on each board
+"""
+
+from leaderboard_cache import LeaderboardCache
+
+EMPTY_TIER = "Wave: 0 Coins: 0"
+
+def cache_with_users():
+    cache = LeaderboardCache()
+    cache.update_tiers("1", "wave and coins", {"T1": "Wave: 500 Coins: 1.5M", "T2": "Wave: 120 Coins: 3K"})
+    cache.update_tiers("2", "coins only", {"T1": "Wave: 0 Coins: 2K"})
+    cache.update_tiers("3", "no data", {})
+    cache.update_tiers("4", "empty tiers", {f"T{i}": EMPTY_TIER for i in range(1, 19)})
+    return cache
+
+def test_users_without_data_are_not_ranked():
+    cache = cache_with_users()
+    for discord_id in ("3", "4"):
+        assert cache.rank("coins", discord_id) == (None, 2)
+        assert cache.rank("waves", discord_id) == (None, 1)
+        assert cache.ranks(discord_id) == {}
+
+def test_coins_and_waves_boards_rank_only_non_zero_values():
+    cache = cache_with_users()
+    assert [name for name, _, _ in cache.coins()] == ["wave and coins", "coins only"]
+    assert cache.waves() == [("wave and coins", 1, 500)]
+    assert cache.rank("waves", "2") == (None, 1)
+    assert cache.ranks("1")["coins"] == (1, 2)
+    assert cache.ranks("2")["coins"] == (2, 2)
+
+def test_zero_stats_are_not_ranked():
+    cache = LeaderboardCache()
+    cache.update_stats("1", "has kills", {"orb_kills": "1.2K", "thorn_damage": "0"})
+    cache.update_stats("2", "no kills", {"orb_kills": "0", "thorn_damage": "0"})
+    assert cache.stats("orb_kills") == [("has kills", "1.2K")]
+    assert cache.size("stats:thorn_damage") == 0
+    assert cache.rank("stats:orb_kills", "2") == (None, 1)
+
+def test_tier_boards_rank_tiers_with_coins_but_no_waves():
+    cache = cache_with_users()
+    assert cache.tier(1) == [("wave and coins", 500, "1.5M"), ("coins only", 0, "2K")]
+    assert cache.rank("tier:1", "2") == (2, 2)
+    assert cache.rank("tier:1", "4") == (None, 2)
+    assert cache.size("tier:3") == 0
+    rows = cache.snapshot_rows("tier:1")
+    assert [(row["rank"], row["discordid"], row["wave"], row["display"]) for row in rows] == [(1, "1", 500, "1.5M"), (2, "2", 0, "2K")]
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Tests for number formatting at suffix boundaries and the dashboard's copy of the suffix table
+"""
+
+import os
+import re
+
+from dashboard_backend.number_codec import SUFFIXES, format_number, parse_number
+
+DASHBOARD_JSX = os.path.join(os.path.dirname(os.path.abspath(__file__)), "dashboard-frontend-vite", "src", "pages", "Dashboard.jsx")
+
+SUFFIXES_SMALLEST_FIRST = sorted(SUFFIXES.items(), key=lambda item: item[1])
+
+def test_exact_powers_use_their_own_suffix():
+    for suffix, multiplier in SUFFIXES.items():
+        assert format_number(float(multiplier)) == f"1.00{suffix}", suffix
+
+def test_values_just_below_a_power_use_the_previous_suffix():
+    previous = None
+    for suffix, multiplier in SUFFIXES_SMALLEST_FIRST:
+        expected = f"999.00{previous}" if previous else "999"
+        assert format_number(float(multiplier) * 0.999) == expected, suffix
+        previous = suffix
+
+def test_values_rounding_up_to_a_power_use_its_suffix():
+    # Whole numbers below 1,000 are truncated, so K is only reached at 1,000
+    assert format_number(999.999) == "999"
+    for suffix, multiplier in SUFFIXES_SMALLEST_FIRST[1:]:
+        assert format_number(float(multiplier) * 0.999999) == f"1.00{suffix}", suffix
+
+def test_largest_suffix_scales_beyond_1000():
+    assert format_number(1.5e48) == "1500.00ad"
+
+def test_small_and_negative_values():
+    assert format_number(0.0) == "0"
+    assert format_number(999.0) == "999"
+    assert format_number(-2.5e6) == "-2.50M"
+
+def test_formatted_values_parse_back():
+    for suffix, multiplier in SUFFIXES.items():
+        assert parse_number(format_number(float(multiplier) * 4.25)) == float(multiplier) * 4.25, suffix
+
+def test_dashboard_suffix_table_matches_backend():
+    with open(DASHBOARD_JSX, encoding="utf-8") as f:
+        source = f.read()
+    table = re.search(r"const NUMBER_SUFFIXES = \[(.*?)\];", source, re.S).group(1)
+    dashboard = {suffix: float(multiplier) for suffix, multiplier in re.findall(r"\['(\w+)',\s*([\d.e+]+)\]", table)}
+    assert dashboard == {suffix: float(multiplier) for suffix, multiplier in SUFFIXES.items()}
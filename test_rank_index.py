@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Tests for RankIndex against a sorted-list reference
+"""
+
+import random
+
+from rank_index import RankIndex
+
+def reference(keys: dict) -> list:
+    """[(rank, member, key)] for {member: key}: highest key first, ties by member id"""
+    ordered = sorted(keys.items(), key=lambda item: (tuple(-part for part in item[1]) if isinstance(item[1], tuple) else -item[1], item[0]))
+    return [(rank, member, key) for rank, (member, key) in enumerate(ordered, 1)]
+
+def assert_matches(index: RankIndex, keys: dict):
+    expected = reference(keys)
+    assert len(index) == len(keys)
+    assert index.range(1, len(keys) + 5) == expected
+    for rank, member, key in expected:
+        assert index.rank(member) == rank
+        assert index.key(member) == key
+        assert index.at(rank) == (member, key)
+
+def test_empty_index():
+    index = RankIndex(seed=1)
+    assert len(index) == 0
+    assert index.rank("a") is None
+    assert index.at(1) is None
+    assert index.range(1, 10) == []
+    assert index.around(1, 2) == []
+
+def test_ties_are_broken_by_member_id():
+    index = RankIndex(seed=1)
+    for member in ["c", "a", "d", "b"]:
+        index.update(member, 10)
+    index.update("e", 20)
+    assert [member for _, member, _ in index.top(5)] == ["e", "a", "b", "c", "d"]
+    assert index.rank("c") == 4
+
+def test_tuple_keys_rank_by_each_part():
+    keys = {"a": (3, 100), "b": (3, 200), "c": (5, 0), "d": (3, 200)}
+    index = RankIndex(seed=1)
+    for member, key in keys.items():
+        index.update(member, key)
+    assert [member for _, member, _ in index.top(4)] == ["c", "b", "d", "a"]
+    assert_matches(index, keys)
+
+def test_update_in_place_moves_a_member():
+    index = RankIndex(seed=1)
+    keys = {member: value for member, value in zip("abcde", [50, 40, 30, 20, 10])}
+    for member, key in keys.items():
+        index.update(member, key)
+
+    index.update("e", 45)
+    keys["e"] = 45
+    assert index.rank("e") == 2
+    index.update("a", 5)
+    keys["a"] = 5
+    assert index.rank("a") == 5
+    index.update("c", 30)  # unchanged key
+    assert_matches(index, keys)
+
+def test_remove_and_none_key():
+    index = RankIndex(seed=1)
+    keys = {member: value for member, value in zip("abcd", [4, 3, 2, 1])}
+    for member, key in keys.items():
+        index.update(member, key)
+
+    index.remove("b")
+    del keys["b"]
+    index.update("c", None)
+    del keys["c"]
+    index.remove("missing")
+    assert "b" not in index and index.rank("c") is None
+    assert_matches(index, keys)
+
+def test_range_and_around_bounds():
+    index = RankIndex.build([(f"m{i:02d}", i) for i in range(20)], seed=1)
+    expected = reference({f"m{i:02d}": i for i in range(20)})
+    assert index.range(5, 3) == expected[4:7]
+    assert index.range(0, 2) == expected[:2]
+    assert index.range(19, 10) == expected[18:]
+    assert index.range(21, 5) == []
+    assert index.range(3, 0) == []
+    assert index.around(10, 2) == expected[7:12]
+    assert index.around(1, 3) == expected[:4]
+    assert index.around(20, 3) == expected[16:]
+
+def test_build_skips_none_keys():
+    index = RankIndex.build([("a", 3), ("b", None), ("c", 7)], seed=1)
+    assert_matches(index, {"a": 3, "c": 7})
+
+def test_random_operations_match_sorted_list():
+    rng = random.Random(7)
+    index = RankIndex(seed=7)
+    keys = {}
+    for step in range(3000):
+        member = f"user{rng.randrange(200)}"
+        if rng.random() < 0.2:
+            index.remove(member)
+            keys.pop(member, None)
+        else:
+            # Few distinct keys, so ties are common
+            key = (rng.randrange(5), rng.randrange(5))
+            index.update(member, key)
+            keys[member] = key
+        if step % 250 == 0:
+            assert_matches(index, keys)
+            if keys:
+                rank = rng.randint(1, len(keys))
+                expected = reference(keys)
+                assert index.around(rank, 3) == expected[max(rank - 4, 0):rank + 3]
+    assert_matches(index, keys)
+
+def test_build_matches_incremental_updates():
+    rng = random.Random(3)
+    items = [(f"user{i}", rng.randrange(50)) for i in range(300)]
+    built = RankIndex.build(items, seed=3)
+    incremental = RankIndex(seed=4)
+    for member, key in items:
+        incremental.update(member, key)
+    assert built.range(1, 300) == incremental.range(1, 300) == reference(dict(items))
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Tests for /api/stats/overview against the configured Postgres database.
+
+Everything runs in a transaction that is rolled back, so the database is left
+unchanged. Skipped when no database is reachable.
+"""
+
+import os
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+os.environ.setdefault("SESSION_SECRET", "test-secret")
+
+from fastapi.testclient import TestClient
+from dashboard_backend.database import engine, get_db
+from dashboard_backend.main import app, create_session
+
+@pytest.fixture
+def client():
+    try:
+        connection = engine.connect()
+    except OperationalError:
+        pytest.skip("Postgres is not reachable")
+    transaction = connection.begin()
+    session = Session(bind=connection, join_transaction_mode="create_savepoint")
+    session.execute(text("DELETE FROM user_tier_best"))
+    session.execute(text("DELETE FROM user_data"))
+
+    def override_get_db():
+        yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+    try:
+        test_client = TestClient(app)
+        test_client.cookies.set("session", create_session("overview-test"))
+        yield test_client, session
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+        session.close()
+        transaction.rollback()
+        connection.close()
+
+def add_user(session, discordid, tiers):
+    """tiers: {tier number: (wave, coins)}"""
+    session.execute(
+        text('INSERT INTO user_data (discordid, discordname, "T1") VALUES (:id, :id, :t1)'),
+        {"id": discordid, "t1": "Wave: 1 Coins: 1" if tiers else None}
+    )
+    for tier, (wave, coins) in tiers.items():
+        session.execute(
+            text("INSERT INTO user_tier_best (discordid, tier, wave, coins_value) VALUES (:id, :tier, :wave, :coins)"),
+            {"id": discordid, "tier": tier, "wave": wave, "coins": coins}
+        )
+
+def test_overview_counts_users_and_tiers(client):
+    test_client, session = client
+    add_user(session, "a", {1: (500, 1e6), 3: (120, 2e3)})
+    add_user(session, "b", {1: (800, 5e5)})
+    add_user(session, "c", {})
+
+    response = test_client.get("/api/stats/overview")
+
+    assert response.status_code == 200
+    overview = response.json()
+    assert overview["total_users"] == 3
+    assert overview["users_with_data"] == 2
+    assert overview["tiers"] == [
+        {"tier": "T1", "players": 2, "max_wave": 800},
+        {"tier": "T3", "players": 1, "max_wave": 120},
+    ]
+
+def test_overview_without_users(client):
+    test_client, _ = client
+    overview = test_client.get("/api/stats/overview").json()
+    assert (overview["total_users"], overview["users_with_data"], overview["tiers"]) == (0, 0, [])
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Tests for UploadQueue position updates to waiting jobs
+"""
+
+import asyncio
+
+import upload_queue
+from upload_queue import UploadQueue
+
+def test_waiting_jobs_are_told_when_their_position_changes(monkeypatch):
+    monkeypatch.setattr(upload_queue, "POSITION_UPDATE_SECONDS", 0.01)
+    events = []
+
+    async def scenario():
+        queue = UploadQueue(workers=1)
+        releases = {name: asyncio.Event() for name in ("a", "b", "c")}
+
+        def job(name):
+            async def run():
+                events.append(f"{name} started")
+                await releases[name].wait()
+            return run
+
+        def report(name):
+            async def on_position(position, wait_seconds):
+                events.append(f"{name} at {position}")
+            return on_position
+
+        for name in ("a", "b", "c"):
+            assert queue.submit(job(name), report(name))
+            await asyncio.sleep(0)
+        await asyncio.sleep(0.05)
+        assert events == ["a started"]
+
+        for name in ("a", "b", "c"):
+            releases[name].set()
+            await asyncio.sleep(0.05)
+
+    asyncio.run(scenario())
+    assert events == ["a started", "b started", "c at 1", "c started"]
+
+def test_a_position_update_lands_before_the_job_starts(monkeypatch):
+    monkeypatch.setattr(upload_queue, "POSITION_UPDATE_SECONDS", 0.01)
+    events = []
+
+    async def scenario():
+        queue = UploadQueue(workers=1)
+        release = asyncio.Event()
+
+        async def blocking():
+            await release.wait()
+
+        async def job():
+            events.append("started")
+
+        async def slow_report(position, wait_seconds):
+            release.set()
+            await asyncio.sleep(0.05)
+            events.append(f"at {position}")
+
+        queue.submit(blocking)
+        await asyncio.sleep(0)
+        queue.submit(job, slow_report, position=5)
+        await asyncio.sleep(0.2)
+
+    asyncio.run(scenario())
+    assert events == ["at 1", "started"]
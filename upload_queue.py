@@ -0,0 +1,138 @@
+"""
+Bounded job queue for screenshot uploads.
+
+Every !upload becomes a job in one FIFO queue served by UPLOAD_WORKERS
+workers, so a burst of uploads runs at most that many extractions (Gemini
+calls and worker threads) at a time and the rest wait their turn. When
+UPLOAD_QUEUE_SIZE jobs are already waiting, new uploads are turned away
+instead of piling up.
+
+The wait estimate for a new job uses its place in the queue, the number of
+idle workers and a moving average of how long recent jobs took. A job
+submitted with an on_position callback is told its new position and wait
+whenever they change while it waits, at most every POSITION_UPDATE_SECONDS.
+
+All methods are meant to be called from the bot's event loop thread.
+"""
+
+import asyncio
+import math
+import os
+import time
+from collections import deque
+
+UPLOAD_WORKERS = int(os.getenv("UPLOAD_WORKERS", "4"))
+UPLOAD_QUEUE_SIZE = int(os.getenv("UPLOAD_QUEUE_SIZE", "50"))
+INITIAL_JOB_SECONDS = 10.0      # wait estimate before any job has finished
+JOB_SECONDS_SMOOTHING = 0.2     # weight of the latest job in the moving average
+POSITION_UPDATE_SECONDS = 10.0  # how often waiting jobs are told a changed position
+
+class _WaitingJob:
+    __slots__ = ("job", "on_position", "position", "update")
+
+    def __init__(self, job, on_position, position: int):
+        self.job = job
+        self.on_position = on_position
+        self.position = position    # last position reported to on_position
+        self.update = None          # the latest on_position call, finished before the job starts
+
+class UploadQueue:
+    """FIFO of coroutine functions run by a fixed pool of worker tasks"""
+
+    def __init__(self, workers: int = UPLOAD_WORKERS, max_pending: int = UPLOAD_QUEUE_SIZE):
+        self.workers = workers
+        self._queue = asyncio.Queue(maxsize=max_pending)
+        self._waiting = deque()         # _WaitingJob in queue order, mirroring _queue
+        self._running = 0
+        self._job_seconds = INITIAL_JOB_SECONDS
+        self._tasks = []
+        self._notifier = None
+        self.completed = 0
+        self.shed = 0
+
+    def full(self) -> bool:
+        return self._queue.full()
+
+    def estimate(self) -> tuple:
+        """(queue position, estimated seconds until it starts) for a job submitted now; position 1 is next"""
+        position = self._queue.qsize() + 1
+        return position, self._wait_seconds(position)
+
+    def submit(self, job, on_position=None, position: int = None) -> bool:
+        """Queue job (an async function without arguments); False if the queue is full and it was shed.
+
+        on_position, if given, is awaited as on_position(position, wait_seconds)
+        when the job's queue position differs from the last one reported
+        (initially position, as from estimate(), or where it lands); it is not
+        called once the job starts.
+        """
+        self._start_workers()
+        entry = _WaitingJob(job, on_position, position or self._queue.qsize() + 1)
+        try:
+            self._queue.put_nowait(entry)
+        except asyncio.QueueFull:
+            self.shed += 1
+            return False
+        self._waiting.append(entry)
+        return True
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "running": self._running,
+            "waiting": self._queue.qsize(),
+            "completed": self.completed,
+            "shed": self.shed,
+            "average_job_seconds": round(self._job_seconds, 1)
+        }
+
+    def _wait_seconds(self, position: int) -> float:
+        idle_workers = self.workers - self._running
+        if position <= idle_workers:
+            return 0.0
+        # Jobs ahead run `workers` at a time
+        return math.ceil((position - idle_workers) / self.workers) * self._job_seconds
+
+    def _start_workers(self):
+        self._tasks = [task for task in self._tasks if not task.done()]
+        while len(self._tasks) < self.workers:
+            self._tasks.append(asyncio.create_task(self._worker()))
+        if self._notifier is None or self._notifier.done():
+            self._notifier = asyncio.create_task(self._notify_positions())
+
+    async def _notify_positions(self):
+        """Every POSITION_UPDATE_SECONDS, tell waiting jobs whose position changed"""
+        while True:
+            await asyncio.sleep(POSITION_UPDATE_SECONDS)
+            for entry in list(self._waiting):
+                # Earlier jobs may have started during the previous await
+                if entry.on_position is None or entry not in self._waiting:
+                    continue
+                position = self._waiting.index(entry) + 1
+                if entry.position == position:
+                    continue
+                entry.position = position
+                entry.update = asyncio.ensure_future(entry.on_position(position, self._wait_seconds(position)))
+                try:
+                    await entry.update
+                except Exception as e:
+                    print(f"⚠️ Queue position update failed: {e}")
+
+    async def _worker(self):
+        while True:
+            entry = await self._queue.get()
+            self._waiting.popleft()
+            if entry.update is not None and not entry.update.done():
+                await asyncio.wait([entry.update])
+            self._running += 1
+            started = time.monotonic()
+            try:
+                await entry.job()
+            except Exception as e:
+                print(f"❌ Upload job failed: {e}")
+            finally:
+                self._running -= 1
+                self.completed += 1
+                elapsed = time.monotonic() - started
+                self._job_seconds += JOB_SECONDS_SMOOTHING * (elapsed - self._job_seconds)
+                self._queue.task_done()